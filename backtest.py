@@ -37,48 +37,98 @@ def backtest(symbol):
 
     return win5, win20
 
-import numpy as np
+import pandas as pd
 
-def hedge_expectancy(df, horizon=20):
+EXPECTANCY_HORIZONS = (5, 10, 20, 60)
+
+# extra bars required on top of the horizon (per ticker)
+EXPECTANCY_MIN_BARS = 30
+
+# profit factor cap (no losing trade → capped value)
+PF_CAP = 5.0
+
+
+def hedge_expectancy_panel(close, horizons=EXPECTANCY_HORIZONS):
     """
-    Hedge fund expectancy model.
-    Returns:
-    winrate, avg_win, avg_loss, expectancy, profit_factor
+    Hedge fund expectancy model for every ticker and horizon at once.
+
+    close: DataFrame (date × ticker). Each ticker uses its own bars
+    (missing days skipped), like hedge_expectancy on its frame.
+
+    Returns DataFrame indexed by ticker, per horizon h:
+    win{h}d, avgwin{h}, avgloss{h}, exp{h}, pf{h}, roi{h}, n{h}
+    (NaN where the ticker has fewer than h + 30 bars).
     """
 
-    close = df["Close"]
+    c = close.to_numpy(dtype=float)
 
-    if len(close) < horizon + 30:
-        return None
+    # right-align each column: missing bars to the top
+    order = np.argsort(~np.isnan(c), axis=0, kind="stable")
+    c = np.take_along_axis(c, order, axis=0)
 
-    fwd = close.shift(-horizon) / close - 1
-    fwd = fwd.dropna()
+    bars = (~np.isnan(c)).sum(axis=0)
 
-    if len(fwd) == 0:
-        return None
+    out = {}
+
+    for h in horizons:
 
-    wins = fwd[fwd > 0]
-    losses = fwd[fwd <= 0]
+        if h < len(c):
+            fwd = c[h:] / c[:-h] - 1
+        else:
+            fwd = np.full((0, c.shape[1]), np.nan)
 
-    winrate = float(len(wins) / len(fwd))
+        known = ~np.isnan(fwd)
+        win = known & (fwd > 0)
+        loss = known & (fwd <= 0)
 
-    avg_win = float(wins.mean()) if len(wins) > 0 else 0
-    avg_loss = float(abs(losses.mean())) if len(losses) > 0 else 0
+        n = known.sum(axis=0)
+        n_win = win.sum(axis=0)
+        n_loss = loss.sum(axis=0)
 
-    expectancy = (winrate * avg_win) - ((1 - winrate) * avg_loss)
+        total_gain = np.where(win, fwd, 0).sum(axis=0)
+        total_loss = np.abs(np.where(loss, fwd, 0).sum(axis=0))
 
-    total_gain = float(wins.sum()) if len(wins) > 0 else 0
-    total_loss = float(abs(losses.sum())) if len(losses) > 0 else 0
+        with np.errstate(divide="ignore", invalid="ignore"):
 
-    if total_loss == 0:
-        profit_factor = 5.0
-    else:
-        profit_factor = total_gain / total_loss
-    
-    profit_factor = min(profit_factor, 5.0)
+            winrate = n_win / n
+            avg_win = np.where(n_win > 0, total_gain / n_win, 0.0)
+            avg_loss = np.where(n_loss > 0, total_loss / n_loss, 0.0)
 
-    trades_count = len(fwd)
+            pf = np.where(total_loss == 0, PF_CAP, total_gain / total_loss)
 
-    roi = expectancy * trades_count
+        expectancy = winrate * avg_win - (1 - winrate) * avg_loss
+        pf = np.minimum(pf, PF_CAP)
 
-    return winrate, avg_win, avg_loss, expectancy, profit_factor, roi
\ No newline at end of file
+        ok = (bars >= h + EXPECTANCY_MIN_BARS) & (n > 0)
+
+        out[f"win{h}d"] = np.where(ok, winrate, np.nan)
+        out[f"avgwin{h}"] = np.where(ok, avg_win, np.nan)
+        out[f"avgloss{h}"] = np.where(ok, avg_loss, np.nan)
+        out[f"exp{h}"] = np.where(ok, expectancy, np.nan)
+        out[f"pf{h}"] = np.where(ok, pf, np.nan)
+        out[f"roi{h}"] = np.where(ok, expectancy * n, np.nan)
+        out[f"n{h}"] = np.where(ok, n, 0)
+
+    return pd.DataFrame(out, index=close.columns)
+
+
+def hedge_expectancy(df, horizon=20):
+    """
+    Hedge fund expectancy model.
+    Returns:
+    winrate, avg_win, avg_loss, expectancy, profit_factor, roi
+    """
+
+    row = hedge_expectancy_panel(df[["Close"]], horizons=(horizon,)).iloc[0]
+
+    if row[f"n{horizon}"] == 0:
+        return None
+
+    return (
+        float(row[f"win{horizon}d"]),
+        float(row[f"avgwin{horizon}"]),
+        float(row[f"avgloss{horizon}"]),
+        float(row[f"exp{horizon}"]),
+        float(row[f"pf{horizon}"]),
+        float(row[f"roi{horizon}"]),
+    )
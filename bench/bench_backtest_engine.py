@@ -0,0 +1,165 @@
+"""
+Backtest engine benchmark: row-by-row pandas loop vs array simulators.
+
+Synthetic universe of 5 years x N tickers with random BUY/SELL
+signals. The legacy loop is timed on a sample and extrapolated
+(it takes minutes on the full universe); trade lists are compared
+on that sample.
+
+    python bench/bench_backtest_engine.py [n_tickers] [legacy_sample]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import backtest_engine
+
+BARS = 5 * 250
+
+
+# =========================
+# LEGACY (ROW LOOP) REFERENCE
+# =========================
+def legacy_signal(df, fee=0.001):
+
+    trades = []
+    position = None
+    entry = None
+
+    for i in range(len(df)):
+
+        price = df["Close"].iloc[i]
+        buy = df["BUY"].iloc[i]
+        sell = df["SELL"].iloc[i]
+
+        if pd.notna(buy) and position is None:
+            entry = price
+            position = True
+
+        elif pd.notna(sell) and position:
+            trades.append((price - entry) / entry - fee * 2)
+            position = None
+
+    return trades
+
+
+def legacy_tp_sl(df, sl=0.07, tp=0.15):
+
+    trades = []
+    position = None
+    entry = None
+
+    for i in range(len(df)):
+
+        price = df["Close"].iloc[i]
+
+        if pd.notna(df["BUY"].iloc[i]) and position is None:
+            entry = price
+            position = True
+
+        if position:
+
+            if df["High"].iloc[i] >= entry * (1 + tp):
+                trades.append(tp - 0.002)
+                position = None
+
+            elif df["Low"].iloc[i] <= entry * (1 - sl):
+                trades.append(-sl - 0.002)
+                position = None
+
+    return trades
+
+
+def legacy_trailing(df, trail=0.08):
+
+    trades = []
+    position = None
+    entry = None
+    high_since_entry = None
+
+    for i in range(len(df)):
+
+        price = df["Close"].iloc[i]
+
+        if pd.notna(df["BUY"].iloc[i]) and position is None:
+            entry = price
+            high_since_entry = price
+            position = True
+
+        if position:
+
+            high_since_entry = max(high_since_entry, df["High"].iloc[i])
+            stop = high_since_entry * (1 - trail)
+
+            if df["Low"].iloc[i] <= stop:
+                trades.append((stop - entry) / entry - 0.002)
+                position = None
+
+    return trades
+
+
+# =========================
+# BENCH
+# =========================
+def universe(n, seed=7):
+
+    rng = np.random.default_rng(seed)
+    frames = []
+
+    for _ in range(n):
+
+        c = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, BARS)))
+
+        frames.append(pd.DataFrame({
+            "Close": c,
+            "High": c * (1 + rng.uniform(0, 0.03, BARS)),
+            "Low": c * (1 - rng.uniform(0, 0.03, BARS)),
+            "BUY": np.where(rng.random(BARS) < 0.05, c, np.nan),
+            "SELL": np.where(rng.random(BARS) < 0.05, c, np.nan),
+        }))
+
+    return frames
+
+
+def run_all(frames, sims):
+
+    t = time.perf_counter()
+    out = [[sim(df) for sim in sims] for df in frames]
+
+    return time.perf_counter() - t, out
+
+
+def main():
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 950
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    frames = universe(n)
+
+    fast = [
+        backtest_engine.backtest_signal,
+        backtest_engine.backtest_tp_sl,
+        backtest_engine.backtest_trailing,
+    ]
+    legacy = [legacy_signal, legacy_tp_sl, legacy_trailing]
+
+    fast_s, fast_out = run_all(frames, fast)
+    legacy_s, legacy_out = run_all(frames[:sample], legacy)
+
+    legacy_full = legacy_s * n / sample
+    same = fast_out[:sample] == legacy_out
+
+    print(f"universe     {n} tickers x {BARS} bars")
+    print(f"legacy loop  {legacy_full:9.1f} s  (extrapolated from {sample})")
+    print(f"arrays       {fast_s:9.2f} s")
+    print(f"speedup      {legacy_full / fast_s:9.0f}x")
+    print(f"identical    {same}")
+
+
+if __name__ == "__main__":
+    main()
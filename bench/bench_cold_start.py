@@ -0,0 +1,64 @@
+"""
+Cold-start benchmark: import time + network attempts per module.
+
+Each module is imported in a fresh interpreter with socket.connect
+patched to count (and refuse) connections, so an import that
+touches the network shows up as net>0 and does not hang offline.
+
+    python bench/bench_cold_start.py
+"""
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "utils.chart_generator",
+    "entry_engine",
+    "scanner",
+]
+
+PROBE = r"""
+import socket, time, sys
+calls = [0]
+def refuse(self, *a, **k):
+    calls[0] += 1
+    raise OSError("network disabled by bench")
+socket.socket.connect = refuse
+socket.socket.connect_ex = refuse
+t = time.perf_counter()
+try:
+    __import__(sys.argv[1])
+    err = ""
+except Exception as e:
+    err = repr(e)
+print(f"{time.perf_counter() - t:.3f} {calls[0]} {err}")
+"""
+
+
+def probe(module):
+
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, module],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    ).stdout.strip().splitlines()
+
+    secs, net, *err = (out[-1] if out else "nan 0 no output").split(" ", 2)
+
+    return float(secs), int(net), (err[0] if err else "")
+
+
+def main():
+
+    print(f"{'module':28} {'import s':>9} {'net':>4}")
+
+    for m in MODULES:
+        secs, net, err = probe(m)
+        print(f"{m:28} {secs:9.3f} {net:4d} {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+IDX stock-summary fetch benchmark against the local stand-in server
+(flow_engine.idx_standin), no network needed.
+
+    legacy     new requests.Session per call, cache-busting "_=" param,
+               full JSON parse every time (old fetch_idx)
+    transport  shared keep-alive session, gzip, ETag conditional GET
+               (flow_engine.idx_transport)
+
+Scenarios: unchanged summary, summary changing every K answers,
+and injected 503s to exercise the retry loop.
+
+    python bench/bench_idx_fetch.py [n_fetches] [latency_s]
+"""
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flow_engine import idx_standin
+from flow_engine.idx_transport import (
+    SUMMARY_PATH, SUMMARY_PARAMS, IdxTransport, parse_summary, fetch_stock_summary
+)
+
+
+# =========================
+# LEGACY REFERENCE
+# =========================
+def legacy_fetch(base_url):
+
+    session = requests.Session()
+
+    url = f"{base_url}{SUMMARY_PATH}?length=9999&start=0&_={int(time.time()*1000)}"
+
+    r = session.get(url, headers={"Cache-Control": "no-cache"}, timeout=20)
+    r.raise_for_status()
+
+    return parse_summary(r.json())
+
+
+# =========================
+# BENCH
+# =========================
+def timed(fn, n):
+
+    t = time.perf_counter()
+    for _ in range(n):
+        fn()
+
+    return time.perf_counter() - t
+
+
+def scenario(name, n, latency, rotate_every=0):
+
+    server, url, standin = idx_standin.serve(latency=latency, rotate_every=rotate_every)
+
+    legacy_s = timed(lambda: legacy_fetch(url), n)
+
+    t = IdxTransport(url)
+    fast_s = timed(lambda: t.get(SUMMARY_PATH, parse_summary, SUMMARY_PARAMS), n)
+
+    server.shutdown()
+
+    print(f"{name:<22} legacy {n/legacy_s:7.1f}/s   transport {n/fast_s:7.1f}/s   "
+          f"x{legacy_s/fast_s:5.1f}   [{t.summary()}]")
+
+
+def retries(n, fail):
+
+    server, url, standin = idx_standin.serve(fail=fail, seed=1)
+
+    t = IdxTransport(url)
+    ok = 0
+
+    start = time.perf_counter()
+
+    # the retry loop prints one warning per failed attempt
+    with redirect_stdout(io.StringIO()):
+        for _ in range(n):
+            try:
+                fetch_stock_summary(retries=5, backoff=0.01, t=t)
+                ok += 1
+            except Exception:
+                pass
+
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+
+    print(f"retry fail={fail:.0%}        ok {ok}/{n}   "
+          f"attempts/fetch {t.stats['requests']/n:.2f}   {elapsed:.2f}s   {standin.stats}")
+
+
+def main():
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+
+    print(f"{n} fetches, server latency {latency*1000:.0f} ms\n")
+
+    scenario("unchanged summary", n, latency)
+    scenario("changes every 5", n, latency, rotate_every=5)
+
+    print()
+
+    for fail in (0.1, 0.3, 0.5):
+        retries(n, fail)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Signal engine benchmark: per-ticker signals.evaluate vs signals_panel.
+
+Synthetic universe (random walks, uneven history lengths, a few
+missing bars), no network. Also checks both paths agree.
+
+    python bench/bench_signals_panel.py [n_tickers]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import signals
+import signals_panel
+from utils import panel_store
+
+CTX = {"ready": True, "ret20": 0.02}
+
+
+def universe(n, bars=70, seed=1):
+
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2025-01-01", periods=bars)
+    frames = {}
+
+    for i in range(n):
+
+        k = int(rng.integers(25, bars))
+        c = 1000 * np.exp(np.cumsum(rng.normal(0, 0.03, k)))
+
+        df = pd.DataFrame({
+            "Open": c,
+            "High": c * (1 + rng.uniform(0, 0.03, k)),
+            "Low": c * (1 - rng.uniform(0, 0.03, k)),
+            "Close": c,
+            "Volume": rng.lognormal(15, 1, k),
+        }, index=dates[-k:])
+
+        if i % 7 == 0:
+            df = df.drop(df.index[5])
+
+        frames[f"T{i:03d}.JK"] = df
+
+    return frames
+
+
+def mismatches(ref, res):
+
+    bad = 0
+
+    for t, r in ref.items():
+
+        row = res.loc[t]
+
+        if r is None or not row["valid"]:
+            bad += (r is None) == bool(row["valid"])
+            continue
+
+        bad += any(
+            not np.isclose(float(val), float(row[k]), equal_nan=True)
+            for k, val in r.items()
+        )
+
+    return bad
+
+
+def main():
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 950
+    frames = universe(n)
+
+    t = time.perf_counter()
+    ref = {s: signals.evaluate(df.copy(), CTX) for s, df in frames.items()}
+    per_ticker = time.perf_counter() - t
+
+    panel = panel_store.align(frames, signals_panel.FIELDS)
+
+    t = time.perf_counter()
+    res = signals_panel.evaluate_panel(panel, ihsg=CTX)
+    vectorized = time.perf_counter() - t
+
+    print(f"tickers      {n}")
+    print(f"per-ticker   {per_ticker * 1000:9.1f} ms")
+    print(f"panel        {vectorized * 1000:9.1f} ms")
+    print(f"speedup      {per_ticker / vectorized:9.0f}x")
+    print(f"mismatches   {mismatches(ref, res)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from features import features
+
+
 def accumulation_strength(df):
     """
     Detect broker-style accumulation:
@@ -7,13 +10,15 @@ def accumulation_strength(df):
     close = df["Close"]
     vol = df["Volume"]
 
-    avg_vol20 = float(vol.rolling(20).mean().iloc[-1].item())
+    f = features(df)
+
+    avg_vol20 = float(f.rolling_mean("Volume", 20).iloc[-1].item())
 
     # Flat return 5 days
     ret5 = float(((close.iloc[-1] / close.iloc[-6]) - 1).item())
 
     # Tight candle ranges
-    ranges = (df["High"] - df["Low"]) / close
+    ranges = f.series("Range") / close
     tight = float(ranges.tail(5).mean().item()) < 0.02
 
     # Volume pressure
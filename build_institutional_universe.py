@@ -1,5 +1,11 @@
+import os
+import sys
+import json
+import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from utils import panel_store, price_store
+from utils.yahoo_pro import download_prices
 
 INPUT_FILE = "data/universe.csv"
 OUTPUT_FILE = "data/universe_institutional.csv"
@@ -7,50 +13,209 @@ OUTPUT_FILE = "data/universe_institutional.csv"
 MIN_AVG_VALUE = 50_000_000_000   # Rp 50B/day liquidity
 MAX_STOCKS = 200                 # Top 200 institutional names
 
+# =========================================
+# LIQUIDITY HISTORY + CHECKPOINT
+# =========================================
+#
+# Daily traded value (Close × Volume) of every universe ticker is
+# kept as a (date × ticker) store, so the top-200 is a ranking of
+# the last WINDOW rows, updated with new days instead of rebuilt:
+#
+#   data/liquidity/           panel_store layout, field "Value"
+#   data/universe_checkpoint.json   tickers done / failed today
+#
+# Tickers whose bars in the price panel are current are read from
+# it (no network). The rest are downloaded concurrently in CHUNK
+# batches; each batch is stored and checkpointed, so an interrupted
+# build resumes where it stopped (failed tickers are retried).
+#
+#   python build_institutional_universe.py [--full]
+
+LIQ_DIR = "data/liquidity"
+CHECKPOINT_FILE = "data/universe_checkpoint.json"
+LIQ_FIELDS = ["Value"]
+
+WINDOW = 20         # avg traded value window (bars)
+MIN_BARS = 10       # bars needed inside the window
+FRESH_DAYS = 4      # panel older than this (calendar days) is not used
+CHUNK = 50          # tickers per download batch / checkpoint
+
+
+# =========================
+# CHECKPOINT
+# =========================
+def load_checkpoint(day):
+    """
+    {"day", "done", "failed"} of today's build (fresh if another day).
+    """
+
+    cp = None
+
+    if os.path.exists(CHECKPOINT_FILE):
+        try:
+            with open(CHECKPOINT_FILE) as f:
+                cp = json.load(f)
+        except:
+            cp = None
+
+    if not cp or cp.get("day") != day:
+        cp = {"day": day, "done": [], "failed": []}
+
+    return cp
+
+
+def save_checkpoint(cp):
+
+    os.makedirs(os.path.dirname(CHECKPOINT_FILE), exist_ok=True)
+
+    tmp = CHECKPOINT_FILE + ".tmp"
+
+    with open(tmp, "w") as f:
+        json.dump(cp, f)
+
+    os.replace(tmp, CHECKPOINT_FILE)
 
-def avg_traded_value(symbol):
+
+# =========================
+# LIQUIDITY
+# =========================
+def from_panel(tickers, today):
     """
-    Calculate avg traded value over last 20 trading days.
+    (dates, tickers, (WINDOW, n) traded value) for the tickers whose
+    last panel bar is the panel's latest session, if that session is
+    at most FRESH_DAYS old. Nothing when the panel is stale.
     """
-    try:
-        df = yf.download(symbol, period="1mo", interval="1d", progress=False)
 
-        if df.empty or len(df) < 10:
-            return 0
+    panel = price_store.load_panel()
+
+    if panel is None or not len(panel["dates"]):
+        return None, [], None
+
+    last = pd.Timestamp(panel["dates"][-1])
+
+    if (today - last).days > FRESH_DAYS:
+        return None, [], None
+
+    known = [t for t in tickers if t in panel["col"]]
+    cols = np.array([panel["col"][t] for t in known], dtype=int)
+
+    close = np.asarray(panel["Close"][-WINDOW:])[:, cols]
+    volume = np.asarray(panel["Volume"][-WINDOW:])[:, cols]
 
-        value = (df["Close"] * df["Volume"]).mean()
-        return float(value)
+    current = ~np.isnan(close[-1])
+
+    value = close[:, current] * volume[:, current]
+
+    return panel["dates"][-WINDOW:], [t for t, ok in zip(known, current) if ok], value
+
+
+def record(frames):
+    """
+    Store the daily traded value of {ticker: OHLCV DataFrame}.
+    """
 
-    except:
-        return 0
+    values = {
+        t: pd.DataFrame({"Value": df["Close"] * df["Volume"]})
+        for t, df in frames.items()
+        if df is not None and not df.empty
+    }
 
+    panel_store.upsert(LIQ_DIR, LIQ_FIELDS, values)
 
-def build():
+
+def ranking(tickers=None):
+    """
+    Avg traded value over the last WINDOW stored sessions per ticker
+    (at least MIN_BARS of them), largest first.
+    """
+
+    liq = panel_store.load(LIQ_DIR, LIQ_FIELDS)
+
+    if liq is None:
+        return pd.Series(dtype=float)
+
+    value = np.asarray(liq["Value"][-WINDOW:])
+    bars = (~np.isnan(value)).sum(axis=0)
+
+    with np.errstate(invalid="ignore"):
+        avg = np.nansum(value, axis=0) / np.maximum(bars, 1)
+
+    s = pd.Series(avg, index=liq["tickers"])[bars >= MIN_BARS]
+
+    if tickers is not None:
+        s = s[s.index.isin(tickers)]
+
+    return s[s > 0].sort_values(ascending=False)
+
+
+# =========================
+# BUILD
+# =========================
+def build(full=False):
     print("\n🏛️ Building Institutional Universe (Top Liquidity 200)")
     print("=====================================================")
 
     tickers = pd.read_csv(INPUT_FILE, header=None)[0].tolist()
 
-    scores = []
-    for i, sym in enumerate(tickers):
+    # Skip invalid tickers
+    tickers = [s for s in tickers if not s.startswith("$")]
+
+    today = pd.Timestamp.today().normalize()
+
+    # --full: ignore today's checkpoint and the price panel
+    cp = {"day": str(today.date()), "done": [], "failed": []} if full else load_checkpoint(str(today.date()))
+
+    # resume from the tickers done; failed ones are retried
+    skip = set(cp["done"])
+    todo = [s for s in tickers if s not in skip]
+
+    cp["failed"] = []
+
+    if skip:
+        print(f"↩️ Resuming: {len(skip)} done, {len(todo)} left")
+
+    # =========================
+    # FROM PRICE PANEL
+    # =========================
+    if todo and not full:
+
+        dates, local, value = from_panel(todo, today)
+
+        if local:
+            panel_store.upsert_arrays(LIQ_DIR, LIQ_FIELDS, dates, local, {"Value": value})
+            cp["done"] += local
+            save_checkpoint(cp)
+
+        print(f"📦 From price panel: {len(local)}")
+
+        local = set(local)
+        todo = [s for s in todo if s not in local]
+
+    # =========================
+    # DOWNLOAD MISSING
+    # =========================
+    print(f"Downloading {len(todo)} stocks...")
+
+    for i in range(0, len(todo), CHUNK):
 
-        # Skip invalid tickers
-        if sym.startswith("$"):
-            continue
+        chunk = todo[i:i + CHUNK]
+        prices = download_prices(chunk, min_rows=MIN_BARS)
 
-        if i % 50 == 0:
-            print(f"Checking {i}/{len(tickers)} stocks...")
+        record(prices)
 
-        v = avg_traded_value(sym)
+        cp["done"] += [s for s in chunk if s in prices]
+        cp["failed"] += [s for s in chunk if s not in prices]
+        save_checkpoint(cp)
 
-        if v > 0:
-            scores.append((sym, v))
+        print(f"   {min(i + CHUNK, len(todo))}/{len(todo)}")
 
-    # Sort by liquidity
-    scores.sort(key=lambda x: x[1], reverse=True)
+    # =========================
+    # RANK
+    # =========================
+    scores = ranking(tickers)
 
     # Filter top liquid names
-    elite = [s for s, v in scores if v >= MIN_AVG_VALUE][:MAX_STOCKS]
+    elite = scores[scores >= MIN_AVG_VALUE].index[:MAX_STOCKS].tolist()
 
     pd.DataFrame(elite).to_csv(OUTPUT_FILE, index=False, header=False)
 
@@ -61,4 +226,4 @@ def build():
 
 
 if __name__ == "__main__":
-    build()
+    build(full="--full" in sys.argv)
@@ -1,3 +1,5 @@
+import os
+
 TELEGRAM_TOKEN = "YOUR_BOT_TOKEN"
 CHAT_ID = "YOUR_CHAT_ID"
 SCORE_VERSION = "v4"
@@ -32,3 +34,38 @@ else:  # AGGRESSIVE
 # ==========================
 MAX_ALERTS = 5
 BATCH_LIMIT = 200   # keep safe (avoid yfinance crash)
+
+# ==========================
+# YAHOO FETCH LIMITS
+# ==========================
+YAHOO_RATE = 2.0          # HTTP requests / second (token refill), one per ticker
+YAHOO_BURST = 4           # max burst (also the yf.download chunk size)
+FETCH_CONCURRENCY = 4     # in-flight HTTP requests (yf.download threads)
+FETCH_TIMEOUT = 45        # seconds per request
+FETCH_RETRIES = 3
+
+# ==========================
+# FRAME CACHE
+# ==========================
+FRAME_CACHE_MB = 64       # byte budget of the in-process price cache
+FRAME_CACHE_TTL = 300     # seconds, only enforced during market hours
+
+# ==========================
+# RESULT CACHE
+# ==========================
+RESULT_CACHE_MB = 32      # disk budget of memoized backtest / sweep results
+
+# ==========================
+# IDX FETCH
+# ==========================
+# point at flow_engine.idx_standin (e.g. http://127.0.0.1:8765) to run offline
+IDX_BASE_URL = os.environ.get("IDX_BASE_URL", "https://www.idx.co.id")
+IDX_TIMEOUT = 20          # seconds per request
+IDX_RETRIES = 5
+
+# ==========================
+# FUNDAMENTALS STORE
+# ==========================
+FUND_TTL_DAYS = 30        # statement fields (ROE, growth, margins, debt)
+FUND_PRICE_TTL_DAYS = 3   # price-dependent ratios (PE, PBV, dividend yield)
+FUND_WORKERS = 4          # refresh thread pool (still paced by YAHOO_RATE)
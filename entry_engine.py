@@ -3,10 +3,13 @@ import time
 import pandas as pd
 from datetime import datetime
 
-from utils.yahoo_pro import download_price
+from utils.yahoo_pro import download_price, download_prices
 from telegram_engine import send, send_photo
 from utils.chart_generator import generate_chart
 from utils.entry_scoring import entry_score
+from utils.market_clock import market_open
+from utils.market_context import market_context
+from flow_engine import foreign_intraday
 
 
 WATCHLIST_FILE = "runtime/watchlist.csv"
@@ -14,16 +17,8 @@ WATCHLIST_FILE = "runtime/watchlist.csv"
 CHECK_INTERVAL = 600   # 10 minutes
 ALERT_COOLDOWN = 1800  # 30 minutes
 
+FOREIGN_VELOCITY_MIN = 10_000_000   # IDR / minute of net foreign buying
 
-def market_open():
-
-    now = datetime.now()
-    t = now.hour * 60 + now.minute
-
-    session1 = 9*60 <= t <= 11*60+30
-    session2 = 13*60+30 <= t <= 15*60
-
-    return session1 or session2
 
 # ==========================
 # ALERT MEMORY
@@ -56,14 +51,10 @@ def mark_alert(sym):
 # ENTRY DETECTION
 # ==========================
 
-def detect_entry(sym, r, ihsg):
+def detect_entry(sym, r, ctx, df=None, flow=None):
 
-    df = None
-    for _ in range(3):
+    if df is None:
         df = download_price(sym)
-        if df is not None and not df.empty:
-            break
-        time.sleep(1)
 
     if df is None or df.empty or len(df) < 30:
         return None
@@ -74,19 +65,15 @@ def detect_entry(sym, r, ihsg):
     # MARKET CONTEXT
     # ========================
 
+    # precomputed once per bar by utils.market_context
     market_trend = "SIDEWAYS"
 
-    if ihsg is not None and len(ihsg) > 50:
-
-        ihsg["MA20"] = ihsg["Close"].rolling(20).mean()
-        ihsg["MA50"] = ihsg["Close"].rolling(50).mean()
-
-        last = ihsg.iloc[-1]
+    if ctx is not None and ctx["bars"] > 50:
 
-        if last["Close"] > last["MA20"] > last["MA50"]:
+        if ctx["trend"] == "UPTREND":
             market_trend = "BULL"
 
-        elif last["Close"] < last["MA20"] < last["MA50"]:
+        elif ctx["trend"] == "DOWNTREND":
             market_trend = "BEAR"
 
     # ========================
@@ -236,6 +223,22 @@ def detect_entry(sym, r, ihsg):
     ):
         confirmations.append("BREAKOUT")
 
+    # ========================
+    # LIVE FOREIGN FLOW
+    # ========================
+
+    # intraday velocity from flow_engine.foreign_intraday snapshots
+    if flow is not None:
+
+        code = sym.split(".")[0].upper()
+
+        if code in flow.index:
+
+            f = flow.loc[code]
+
+            if f["net"] > 0 and f["velocity"] > FOREIGN_VELOCITY_MIN:
+                confirmations.append("FOREIGN_FLOW")
+
     # ========================
     # SCORE
     # ========================
@@ -316,8 +319,6 @@ def run():
 
     while True:
 
-        ihsg = download_price("^JKSE")
-
         if not market_open():
 
             print("Market Closed")
@@ -335,13 +336,31 @@ def run():
 
             print("\nChecking entries", datetime.now())
 
+            # index indicators: once per bar, shared by every symbol
+            ctx = market_context()
+
+            prices = download_prices([r["symbol"] for r in watchlist])
+
+            # live foreign flow: local delta snapshots, no IDX download
+            try:
+                flow = foreign_intraday.velocity()
+            except Exception as e:
+                print("Intraday flow unavailable", e)
+                flow = None
+
             for r in watchlist:
 
                 sym = r["symbol"]
 
                 try:
 
-                    signal = detect_entry(sym, r, ihsg)
+                    df = prices.get(sym)
+
+                    # failed in the batch: no one-by-one re-download
+                    if df is None:
+                        continue
+
+                    signal = detect_entry(sym, r, ctx, df, flow)
 
                     if signal is None:
                         continue
@@ -353,7 +372,7 @@ def run():
 
                     send(msg)
 
-                    chart = generate_chart(sym, r)
+                    chart = generate_chart(sym, r, df)
 
                     if chart and os.path.exists(chart):
                         send_photo(chart)
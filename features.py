@@ -0,0 +1,148 @@
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+
+# =========================================
+# SHARED FEATURE FRAME
+# =========================================
+#
+# Indicators of one OHLCV frame, built on first use and reused by
+# signals, broker_style, scanner and chart_generator.
+#
+# Memo is per frame object (the frame cache hands out the same
+# DataFrame per symbol) and per last bar: a frame that grew a new
+# bar starts a fresh memo. Registry entries die with their frame.
+
+MAX_FRAMES = 1024
+
+_frames = OrderedDict()   # id(df) -> (weakref, stamp, memo)
+
+
+class Features:
+    """
+    Lazy, memoized indicator series of one frame.
+    """
+
+    def __init__(self, df, memo):
+        self.df = df
+        self._memo = memo
+
+    def _get(self, key, fn):
+
+        val = self._memo.get(key)
+
+        if val is None:
+            val = self._memo[key] = fn()
+
+        return val
+
+    # ==========================
+    # ROLLING WINDOWS
+    # ==========================
+    def rolling_mean(self, col, n):
+        return self._get(("mean", col, n), lambda: self.series(col).rolling(n).mean())
+
+    def rolling_max(self, col, n):
+        return self._get(("max", col, n), lambda: self.series(col).rolling(n).max())
+
+    def rolling_min(self, col, n):
+        return self._get(("min", col, n), lambda: self.series(col).rolling(n).min())
+
+    def rolling_sum(self, col, n):
+        return self._get(("sum", col, n), lambda: self.series(col).rolling(n).sum())
+
+    def ema(self, col, span):
+        return self._get(
+            ("ema", col, span),
+            lambda: self.series(col).ewm(span=span, adjust=False).mean()
+        )
+
+    # ==========================
+    # DERIVED SERIES
+    # ==========================
+    def series(self, col):
+        """
+        OHLCV column or a derived series:
+        Value (Close*Volume), Range (High-Low), TR (true range), Return.
+        """
+
+        if col in self.df.columns and col not in DERIVED:
+            return self.df[col]
+
+        return self._get(("series", col), lambda: DERIVED[col](self))
+
+    def atr(self, n=14):
+        """
+        True-range ATR (stoploss / chart).
+        """
+        return self.rolling_mean("TR", n)
+
+    def range_atr(self, n=14):
+        """
+        High-low range ATR (take profit).
+        """
+        return self.rolling_mean("Range", n)
+
+    def peak(self):
+        return self._get("peak", lambda: self.df["Close"].max())
+
+
+def _true_range(f):
+
+    df = f.df
+    prev = df["Close"].shift()
+
+    return pd.concat([
+        (df["High"] - df["Low"]).abs(),
+        (df["High"] - prev).abs(),
+        (df["Low"] - prev).abs(),
+    ], axis=1).max(axis=1)
+
+
+DERIVED = {
+    "Value": lambda f: f.df["Close"] * f.df["Volume"],
+    "Range": lambda f: f.df["High"] - f.df["Low"],
+    "TR": _true_range,
+    "Return": lambda f: f.df["Close"].pct_change(),
+}
+
+
+# =========================================
+# REGISTRY
+# =========================================
+def _stamp(df):
+
+    if df.empty:
+        return 0, None
+
+    return len(df), df.index[-1]
+
+
+def _drop(key):
+    _frames.pop(key, None)
+
+
+def features(df):
+    """
+    Feature object of df (same memo for the same frame and last bar).
+    """
+
+    key = id(df)
+    stamp = _stamp(df)
+
+    hit = _frames.get(key)
+
+    if hit is not None and hit[0]() is df and hit[1] == stamp:
+        _frames.move_to_end(key)
+        return Features(df, hit[2])
+
+    memo = {}
+    _frames[key] = (weakref.ref(df, lambda _, k=key: _drop(k)), stamp, memo)
+    _frames.move_to_end(key)
+
+    while len(_frames) > MAX_FRAMES:
+        _frames.popitem(last=False)
+
+    return Features(df, memo)
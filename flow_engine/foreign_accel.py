@@ -1,39 +1,19 @@
-import pandas as pd
-import glob
-import os
-
-HISTORY_DIR = "data/foreign_history"
+from flow_engine import foreign_db
 
 
 # =========================
-# LOAD HISTORY FILES
+# LOAD HISTORY
 # =========================
 def load_history(days=5):
+    """
+    Market total ForeignNet of the last `days` stored days.
+    """
 
-    files = sorted(glob.glob(f"{HISTORY_DIR}/foreign_*.csv"))
-
-    if not files:
+    try:
+        return [float(x) for x in foreign_db.daily_totals(days)]
+    except:
         return []
 
-    files = files[-days:]
-
-    totals = []
-
-    for f in files:
-        try:
-            df = pd.read_csv(f)
-
-            if "ForeignNet" not in df.columns:
-                continue
-
-            total = float(df["ForeignNet"].sum())
-            totals.append(total)
-
-        except:
-            continue
-
-    return totals
-
 
 # =========================
 # MAIN ACCEL ENGINE
@@ -1,100 +1,30 @@
 import os
-import requests
 import pandas as pd
-import time
-import random
 from datetime import datetime
 
+from flow_engine import foreign_db
+from flow_engine.idx_transport import fetch_stock_summary
+
 CACHE_DIR = "data/foreign_cache"
-HIST_DIR = "data/foreign_history"
 
 os.makedirs(CACHE_DIR, exist_ok=True)
-os.makedirs(HIST_DIR, exist_ok=True)
-
-IDX_ENDPOINT = "https://www.idx.co.id/primary/TradingSummary/GetStockSummary"
-
-USER_AGENTS = [
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_5)",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
-    "Mozilla/5.0 (X11; Linux x86_64)",
-]
 
 
+# =========================
+# FETCH
+# =========================
 def fetch_idx():
+    """
+    Today's foreign buy / sell per ticker from the IDX stock summary
+    (shared session, conditional GET: flow_engine.idx_transport).
+    """
 
-    session = requests.Session()
-
-    time.sleep(random.uniform(1,3))
-
-    for attempt in range(5):
-
-        try:
-
-            ts = str(int(datetime.now().timestamp()*1000))
-
-            url = f"{IDX_ENDPOINT}?length=9999&start=0&_={ts}"
-
-            headers = {
-                "User-Agent": random.choice(USER_AGENTS),
-                "Referer": "https://www.idx.co.id/",
-                "Accept": "application/json, text/plain, */*",
-                "X-Requested-With": "XMLHttpRequest",
-                "Cache-Control": "no-cache",
-                "Pragma": "no-cache",
-                "Connection": "keep-alive"
-            }
-
-            r = session.get(url, headers=headers, timeout=20)
-
-            r.raise_for_status()
-
-            data = r.json().get("data")
-
-            if not data:
-                raise Exception("Empty IDX data")
+    df = fetch_stock_summary()
 
-            df = pd.DataFrame(data)
+    print("🌍 IDX rows:", len(df))
+    print("🌍 TOTAL FOREIGN:", int(df["ForeignNet"].sum()))
 
-            df.columns = [c.lower() for c in df.columns]
-
-            df = df.rename(columns={
-                "stockcode": "Ticker",
-                "foreignbuy": "ForeignBuy",
-                "foreignsell": "ForeignSell"
-            })
-            
-            required = ["Ticker", "ForeignBuy", "ForeignSell"]
-
-            for c in required:
-                if c not in df.columns:
-                    raise Exception(f"IDX column missing: {c}")
-            
-            df = df.dropna(subset=["Ticker"])
-
-            df["Ticker"] = df["Ticker"].astype(str)
-
-            df["ForeignBuy"] = pd.to_numeric(df["ForeignBuy"], errors="coerce").fillna(0)
-            df["ForeignSell"] = pd.to_numeric(df["ForeignSell"], errors="coerce").fillna(0)
-
-            df["ForeignNet"] = df["ForeignBuy"] - df["ForeignSell"]
-
-            df = df[["Ticker","ForeignNet"]]
-
-            print("🌍 IDX rows:", len(df))
-            print("🌍 TOTAL FOREIGN:", int(df["ForeignNet"].sum()))
-
-            return df
-
-        except Exception as e:
-
-            print(f"⚠️ IDX attempt {attempt+1} failed -> {e}")
-
-            # exponential backoff
-            sleep_time = random.uniform(2,5) * (attempt+1)
-
-            time.sleep(sleep_time)
-
-    raise Exception("❌ IDX API blocked after retries")
+    return df
 
 # =========================
 # SAVE TODAY
@@ -104,10 +34,9 @@ def save_today(df):
     today = datetime.now().strftime("%Y-%m-%d")
 
     cache_path = f"{CACHE_DIR}/foreign_today.csv"
-    hist_path = f"{HIST_DIR}/foreign_{today}.csv"
 
     df.to_csv(cache_path, index=False)
-    df.to_csv(hist_path, index=False)
+    foreign_db.upsert_day(df, today)
 
     print("📦 Foreign saved:", today)
 
@@ -143,23 +72,16 @@ def save_history_if_changed():
         return
 
     today = datetime.now().strftime("%Y-%m-%d")
-    new_path = f"{HIST_DIR}/foreign_{today}.csv"
 
     new_df = pd.read_csv(cache_path)
-    new_total = new_df["ForeignNet"].sum()
-
-    files = sorted(os.listdir(HIST_DIR))
-    if files:
-        last = files[-1]
-        last_df = pd.read_csv(f"{HIST_DIR}/{last}")
-        last_total = last_df["ForeignNet"].sum()
 
-        if abs(new_total - last_total) < 100000000:
-            print("⚠️ Foreign not changed → skip history save")
-            return
+    # stale IDX feed: same totals as the last stored day
+    if foreign_db.is_stale(new_df, today):
+        print("⚠️ Foreign not changed → skip history save")
+        return
 
-    new_df.to_csv(new_path, index=False)
-    print("📚 New foreign history saved:", new_path)
+    foreign_db.upsert_day(new_df, today)
+    print("📚 Foreign history stored:", today)
 
 # =========================
 # MAIN
@@ -0,0 +1,386 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from utils import panel_store
+from flow_engine import sector_index
+
+
+# =========================================
+# FOREIGN FLOW STORE
+# =========================================
+#
+# One (date × ticker) store for the daily foreign flow, same
+# columnar layout as the price panel (utils.panel_store):
+#
+#   data/foreign_db/dates.npy        sorted trading dates (index)
+#   data/foreign_db/tickers.json     ticker dictionary (column codes)
+#   data/foreign_db/<Field>.npy      ForeignNet / ForeignBuy / ForeignSell
+#
+# Writers upsert one day at a time (re-saving a day is a no-op),
+# readers memory-map the arrays: a year of flow loads in ms.
+# The old per-day CSVs in data/foreign_history are imported once.
+#
+# Daily aggregates live next to it (data/foreign_db/daily), one
+# column per group ("MARKET" + each sector) and one field each for
+# the net total and the breadth counts. They are recomputed for the
+# ingested days only, so totals / sector flow / breadth are a row
+# lookup for acceleration, the overlay and the Excel dashboard.
+
+DB_DIR = "data/foreign_db"
+AGG_DIR = f"{DB_DIR}/daily"
+LEGACY_DIR = "data/foreign_history"
+SECTOR_MAP = "data/sector_map.csv"
+
+FIELDS = ["ForeignNet", "ForeignBuy", "ForeignSell"]
+AGG_FIELDS = ["Total", "Accum", "Distrib"]    # net sum, # names > 0, # names < 0
+
+MARKET = "MARKET"
+
+# a day whose market net is within this of the previous stored
+# day is a stale IDX feed (previous session served again)
+STALE_TOLERANCE = 100_000_000
+
+
+def _normalize(df):
+
+    df = df.rename(columns={"StockCode": "Ticker", "stockCode": "Ticker", "Kode": "Ticker"})
+    df = df.dropna(subset=["Ticker"])
+
+    df["Ticker"] = df["Ticker"].astype(str).str.upper().str.strip()
+    df = df.drop_duplicates("Ticker", keep="last")
+
+    for f in FIELDS:
+        if f in df.columns:
+            df[f] = pd.to_numeric(df[f], errors="coerce")
+
+    if "ForeignNet" not in df.columns and {"ForeignBuy", "ForeignSell"} <= set(df.columns):
+        df["ForeignNet"] = df["ForeignBuy"] - df["ForeignSell"]
+
+    return df
+
+
+# =========================================
+# WRITE
+# =========================================
+def upsert_days(days):
+    """
+    Merge {date: DataFrame(Ticker, ForeignNet[, ForeignBuy, ForeignSell])}
+    in one write.
+    """
+
+    days = {pd.Timestamp(d).normalize(): _normalize(df) for d, df in days.items() if df is not None}
+    days = {d: df for d, df in days.items() if not df.empty}
+
+    if not days:
+        return
+
+    dates = sorted(days)
+    tickers = sorted(set().union(*[df["Ticker"] for df in days.values()]))
+    col = pd.Index(tickers)
+
+    arrays = {f: np.full((len(dates), len(tickers)), np.nan) for f in FIELDS}
+
+    for i, d in enumerate(dates):
+
+        df = days[d]
+        cols = col.get_indexer(df["Ticker"])
+
+        for f in FIELDS:
+            if f in df.columns:
+                arrays[f][i, cols] = df[f].to_numpy(dtype=float)
+
+    panel_store.upsert_arrays(DB_DIR, FIELDS, dates, tickers, arrays)
+
+    update_aggregates(dates)
+
+
+def upsert_day(df, day=None):
+    """
+    Store one day of foreign flow (default: today).
+    """
+
+    if day is None:
+        day = datetime.now().strftime("%Y-%m-%d")
+
+    upsert_days({day: df})
+
+
+def import_csv_history(path=LEGACY_DIR):
+    """
+    Import foreign_YYYY-MM-DD.csv files (one write).
+    """
+
+    days = {}
+
+    for f in sorted(glob.glob(f"{path}/foreign_*.csv")):
+        try:
+            days[os.path.basename(f)[8:18]] = pd.read_csv(f)
+        except:
+            continue
+
+    upsert_days(days)
+
+    if days:
+        print(f"📦 Foreign store imported: {len(days)} days")
+
+    return len(days)
+
+
+# =========================================
+# DAILY AGGREGATES
+# =========================================
+def aggregate(net, tickers):
+    """
+    (groups, {field: (D, G) array}) of a (D, N) ForeignNet block:
+    column 0 is the whole market, then one column per sector present.
+    """
+
+    names = sector_index.names(SECTOR_MAP)
+    codes = sector_index.codes(tickers, SECTOR_MAP)
+    present = np.unique(codes)
+
+    net = np.asarray(net, dtype=float)
+
+    with np.errstate(invalid="ignore"):
+        blocks = {
+            "Total": net,
+            "Accum": (net > 0).astype(float),
+            "Distrib": (net < 0).astype(float),
+        }
+
+    arrays = {}
+
+    for f, v in blocks.items():
+        by_sector = sector_index.group_sum(v, codes, len(names))[:, present]
+        arrays[f] = np.column_stack([np.nansum(v, axis=1), by_sector])
+
+    return [MARKET] + [names[c] for c in present], arrays
+
+
+def update_aggregates(dates=None):
+    """
+    Recompute the aggregates of the given stored dates (default: all).
+    """
+
+    db = panel_store.load(DB_DIR, FIELDS)
+
+    if db is None:
+        return
+
+    if dates is None:
+        rows = np.arange(len(db["dates"]))
+    else:
+        days = np.asarray(pd.DatetimeIndex(dates).values, dtype="datetime64[D]")
+        rows = np.searchsorted(db["dates"], days)
+
+    groups, arrays = aggregate(np.asarray(db["ForeignNet"])[rows], db["tickers"])
+
+    panel_store.upsert_arrays(AGG_DIR, AGG_FIELDS, db["dates"][rows], groups, arrays)
+
+
+def load_aggregates():
+    """
+    {"dates", "tickers" (groups), "col", field: (D, G) array} or None.
+    """
+
+    if load() is None:
+        return None
+
+    if not panel_store.exists(AGG_DIR):
+        update_aggregates()
+
+    return panel_store.load(AGG_DIR, AGG_FIELDS)
+
+
+def _agg_row(day):
+
+    agg = load_aggregates()
+
+    if agg is None or not len(agg["dates"]):
+        return None, None
+
+    if day is None:
+        return agg, len(agg["dates"]) - 1
+
+    d = np.datetime64(pd.Timestamp(day).date())
+    i = np.searchsorted(agg["dates"], d)
+
+    if i == len(agg["dates"]) or agg["dates"][i] != d:
+        return agg, None
+
+    return agg, i
+
+
+def market_total(day=None):
+    """
+    Market net foreign of one day (default: latest stored), 0 if missing.
+    """
+
+    agg, i = _agg_row(day)
+
+    if i is None:
+        return 0
+
+    return float(agg["Total"][i, agg["col"][MARKET]])
+
+
+def sector_totals(day=None):
+    """
+    Net foreign per sector of one day (default: latest), largest first.
+    """
+
+    agg, i = _agg_row(day)
+
+    if i is None:
+        return pd.Series(dtype=float)
+
+    groups = [g for g in agg["tickers"] if g != MARKET]
+    cols = [agg["col"][g] for g in groups]
+
+    s = pd.Series(np.asarray(agg["Total"][i])[cols], index=groups).dropna()
+
+    return s.sort_values(ascending=False)
+
+
+def breadth(day=None, group=MARKET):
+    """
+    {"accum": n, "distrib": n} names with net buy / net sell.
+    """
+
+    agg, i = _agg_row(day)
+
+    if i is None or group not in agg["col"]:
+        return {"accum": 0, "distrib": 0}
+
+    j = agg["col"][group]
+
+    return {
+        "accum": int(agg["Accum"][i, j]),
+        "distrib": int(agg["Distrib"][i, j]),
+    }
+
+
+# =========================================
+# READ
+# =========================================
+def load(mmap=True):
+    """
+    Whole store as {"dates", "tickers", "col", field: (D, N) array},
+    or None if empty.
+    """
+
+    if not panel_store.exists(DB_DIR) and glob.glob(f"{LEGACY_DIR}/foreign_*.csv"):
+        import_csv_history()
+
+    return panel_store.load(DB_DIR, FIELDS, mmap=mmap)
+
+
+def query(tickers=None, days=None, start=None, end=None, field="ForeignNet"):
+    """
+    Range query: (dates, tickers, (D, N) array).
+
+    days: last N stored trading days (after start/end filtering).
+    Unknown tickers come back as all-NaN columns.
+    """
+
+    db = load()
+
+    if db is None:
+        return np.array([], dtype="datetime64[D]"), list(tickers or []), np.empty((0, len(tickers or [])))
+
+    dates = db["dates"]
+
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start).date()), "left")
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end).date()), "right")
+
+    if days is not None:
+        lo = max(lo, hi - days)
+
+    arr = db[field][lo:hi]
+
+    if tickers is None:
+        return dates[lo:hi], db["tickers"], np.asarray(arr)
+
+    tickers = [t.upper() for t in tickers]
+    cols = np.array([db["col"].get(t, -1) for t in tickers], dtype=int)
+
+    out = np.asarray(arr)[:, np.maximum(cols, 0)]
+    out[:, cols < 0] = np.nan
+
+    return dates[lo:hi], tickers, out
+
+
+def day_map(day, field="ForeignNet"):
+    """
+    {TICKER: value} stored for one date ({} if the day is missing).
+    """
+
+    db = load()
+
+    if db is None:
+        return {}
+
+    d = np.datetime64(pd.Timestamp(day).date())
+    i = np.searchsorted(db["dates"], d)
+
+    if i == len(db["dates"]) or db["dates"][i] != d:
+        return {}
+
+    row = np.asarray(db[field][i])
+    ok = ~np.isnan(row)
+
+    return dict(zip(np.asarray(db["tickers"])[ok], row[ok]))
+
+
+def last_day(field="ForeignNet"):
+    """
+    (date, {TICKER: value}) of the latest stored day, or (None, {}).
+    """
+
+    db = load()
+
+    if db is None or not len(db["dates"]):
+        return None, {}
+
+    day = pd.Timestamp(db["dates"][-1])
+
+    return day, day_map(day, field)
+
+
+def is_stale(df, day):
+    """
+    True if df (one day of flow) repeats the last stored day before `day`.
+    """
+
+    totals = daily_totals()
+    totals = totals[totals.index < pd.Timestamp(day).normalize()]
+
+    if not len(totals):
+        return False
+
+    total = _normalize(df)["ForeignNet"].sum()
+
+    return abs(total - totals.iloc[-1]) < STALE_TOLERANCE
+
+
+def daily_totals(days=None):
+    """
+    Market-wide net foreign per stored day (oldest first).
+    """
+
+    agg = load_aggregates()
+
+    if agg is None:
+        return pd.Series(dtype=float)
+
+    total = np.asarray(agg["Total"][:, agg["col"][MARKET]])
+    dates = pd.DatetimeIndex(agg["dates"])
+
+    if days is not None:
+        total = total[-days:]
+        dates = dates[-days:]
+
+    return pd.Series(total, index=dates)
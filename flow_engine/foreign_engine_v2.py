@@ -1,89 +1,98 @@
 import pandas as pd
-import glob
-import os
+import numpy as np
 
-HIST_PATH = "data/foreign_history"
+from flow_engine import foreign_db
+
+WINDOWS = (5, 20, 60)      # momentum windows (trading days)
+MOMENTUM = "momentum5"     # ranking column, "momentum" in the per-stock dicts
 
 
 # ==========================
 # LOAD HISTORY
 # ==========================
-def load_history(days=5):
+def load_matrix(days=None):
+    """
+    Aligned (date × ticker) ForeignNet matrix from the foreign store
+    (flow_engine.foreign_db), whole history or the last `days` days.
+    A ticker missing on a day is NaN on that date only, so row -1 is
+    always today and row -2 yesterday.
 
-    files = sorted(glob.glob(f"{HIST_PATH}/foreign_*.csv"))[-days:]
-    if not files:
-        return None
+    Returns dict:
+    {"dates", "tickers", "col", "ForeignNet": (D, N) array}
+    """
 
-    dfs = []
-    for f in files:
-        df = pd.read_csv(f)
-        dfs.append(df)
+    dates, tickers, net = foreign_db.query(days=days)
 
-    return dfs
+    return {
+        "dates": pd.DatetimeIndex(dates),
+        "tickers": tickers,
+        "col": {t: j for j, t in enumerate(tickers)},
+        "ForeignNet": net,
+    }
 
 
 # ==========================
-# BUILD STOCK MATRIX
+# PER STOCK ANALYSIS
 # ==========================
-def build_matrix(dfs):
+def flow_table(matrix, windows=WINDOWS):
+    """
+    Vectorized flow stats of every ticker present today:
 
-    merged = {}
+    net          today's ForeignNet
+    delta        today - yesterday
+    accel        delta - previous delta (0 with < 3 days)
+    momentum{w}  net summed over the last w days, per window
+    rank         1 = strongest 5-day momentum
 
-    for i, df in enumerate(dfs):
-        for _, row in df.iterrows():
-            t = row["Ticker"]
-            merged.setdefault(t, []).append(row["ForeignNet"])
+    Days a ticker is missing count as zero flow.
+    """
 
-    return merged
+    net = matrix["ForeignNet"]
+    days = len(net)
 
+    if days < 2:
+        return pd.DataFrame()
 
-# ==========================
-# PER STOCK ANALYSIS
-# ==========================
-def analyze_stock_flow(matrix):
+    flow = np.nan_to_num(net)
 
-    out = {}
+    # prefix sums: any window is one subtraction
+    csum = np.vstack([np.zeros(net.shape[1]), np.cumsum(flow, axis=0)])
 
-    for t, arr in matrix.items():
+    def momentum(w):
+        return csum[-1] - csum[max(days - w, 0)]
 
-        if len(arr) < 2:
-            continue
+    # the 5-day ranking window is always computed, once
+    windows = dict.fromkeys((5,) + tuple(windows))
 
-        today = arr[-1]
-        yday = arr[-2]
+    today = flow[-1]
+    delta = flow[-1] - flow[-2]
+    accel = delta - (flow[-2] - flow[-3]) if days >= 3 else np.zeros_like(delta)
 
-        delta = today - yday
+    table = pd.DataFrame({
+        "net": today,
+        "delta": delta,
+        "accel": accel,
+        **{f"momentum{w}": momentum(w) for w in windows},
+    }, index=pd.Index(matrix["tickers"], name="Ticker"))
 
-        if len(arr) >= 3:
-            prev = arr[-3]
-            accel = delta - (yday - prev)
-        else:
-            accel = 0
+    table = table[~np.isnan(net[-1])]
 
-        momentum = sum(arr)
+    table = table.sort_values(MOMENTUM, ascending=False, kind="stable")
+    table["rank"] = np.arange(1, len(table) + 1)
 
-        out[t] = {
-            "net": today,
-            "delta": delta,
-            "accel": accel,
-            "momentum": momentum
-        }
+    return table
 
-    return out
 
+def _stock_rows(table):
 
-# ==========================
-# RANKING ENGINE
-# ==========================
-def rank_foreign(flow):
+    cols = ["net", "delta", "accel", MOMENTUM]
+
+    return table[cols].rename(columns={MOMENTUM: "momentum"}).to_dict("index")
 
-    ranked = sorted(
-        flow.items(),
-        key=lambda x: x[1]["momentum"],
-        reverse=True
-    )
 
-    return ranked
+def analyze_stock_flow(matrix):
+
+    return _stock_rows(flow_table(matrix))
 
 
 # ==========================
@@ -111,12 +120,13 @@ def classify_flow(d):
 # ==========================
 def run_foreign_engine():
 
-    dfs = load_history(5)
-    if dfs is None or len(dfs) < 2:
+    matrix = load_matrix(max(WINDOWS))
+    if len(matrix["dates"]) < 2:
         return None, "INSUFFICIENT_DATA"
 
-    matrix = build_matrix(dfs)
-    flow = analyze_stock_flow(matrix)
-    ranked = rank_foreign(flow)
+    table = flow_table(matrix)
+
+    # already ranked by momentum
+    ranked = list(_stock_rows(table).items())
 
     return ranked, "READY"
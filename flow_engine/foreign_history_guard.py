@@ -2,8 +2,9 @@ import os
 import pandas as pd
 from datetime import datetime
 
+from flow_engine import foreign_db
+
 CACHE = "data/foreign_cache/foreign_today.csv"
-HISTORY = "data/foreign_history"
 
 
 def save_history_if_changed():
@@ -13,20 +14,16 @@ def save_history_if_changed():
         return
 
     today = datetime.now().strftime("%Y-%m-%d")
-    new_file = f"{HISTORY}/foreign_{today}.csv"
 
     new_df = pd.read_csv(CACHE)
     new_total = new_df["ForeignNet"].sum()
 
-    files = sorted(os.listdir(HISTORY))
-    if files:
-        last_file = files[-1]
-        last_df = pd.read_csv(f"{HISTORY}/{last_file}")
-        last_total = last_df["ForeignNet"].sum()
+    totals = foreign_db.daily_totals()
+    totals = totals[totals.index < pd.Timestamp(today)]
 
-        if abs(new_total - last_total) < 1e-6:
-            print("⚠️ Foreign unchanged → skip history save")
-            return
+    if len(totals) and abs(new_total - totals.iloc[-1]) < 1e-6:
+        print("⚠️ Foreign unchanged → skip history save")
+        return
 
-    new_df.to_csv(new_file, index=False)
-    print("✅ Saved new foreign history:", new_file)
\ No newline at end of file
+    foreign_db.upsert_day(new_df, today)
+    print("✅ Saved new foreign history:", today)
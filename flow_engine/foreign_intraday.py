@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from utils.market_clock import market_open, trading_day
+
+
+# =========================================
+# INTRADAY FOREIGN FLOW (DELTA SNAPSHOTS)
+# =========================================
+#
+# During both sessions the IDX stock summary (cumulative foreign
+# buy / sell of the day) is snapshotted every SNAPSHOT_MINUTES.
+# Only tickers whose totals moved since the previous snapshot are
+# written:
+#
+#   data/foreign_intraday/YYYY-MM-DD/tickers.json   ticker dictionary
+#   data/foreign_intraday/YYYY-MM-DD/HHMMSS.npz     idx, buy, sell deltas
+#
+# Readers rebuild the cumulative (snapshot × ticker) matrix by
+# applying new delta files to the in-process state, so the entry
+# engine gets per-ticker flow velocity without touching IDX.
+
+INTRADAY_DIR = "data/foreign_intraday"
+
+SNAPSHOT_MINUTES = 5
+VELOCITY_MINUTES = 30
+
+_state = {}     # day -> {"files", "tickers", "times", "buy", "sell"}
+
+
+def _day_dir(day):
+    return f"{INTRADAY_DIR}/{day}"
+
+
+def _read_tickers(path):
+
+    f = f"{path}/tickers.json"
+
+    if not os.path.exists(f):
+        return []
+
+    with open(f) as fh:
+        return json.load(fh)
+
+
+def _write_tickers(path, tickers):
+
+    tmp = f"{path}/.tickers.json.tmp"
+
+    with open(tmp, "w") as fh:
+        json.dump(tickers, fh)
+
+    os.replace(tmp, f"{path}/tickers.json")
+
+
+# =========================
+# READ
+# =========================
+def load_day(day=None):
+    """
+    Cumulative intraday flow of one day (default: today):
+
+    {"times": DatetimeIndex (S,), "tickers": list (N),
+     "buy": (S, N), "sell": (S, N)}
+
+    Only delta files not seen by this process are read.
+    """
+
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    path = _day_dir(day)
+
+    files = []
+
+    if os.path.isdir(path):
+        files = sorted(f for f in os.listdir(path) if f.endswith(".npz") and not f.startswith("."))
+
+    st = _state.get(day)
+
+    if st is None or st["files"] != files[:len(st["files"])]:
+        st = {"files": [], "tickers": [], "times": [], "buy": [], "sell": []}
+        _state[day] = st
+
+    new = files[len(st["files"]):]
+
+    if new:
+
+        st["tickers"] = _read_tickers(path)
+        n = len(st["tickers"])
+
+        buy = st["buy"][-1] if st["buy"] else np.zeros(0)
+        sell = st["sell"][-1] if st["sell"] else np.zeros(0)
+
+        for f in new:
+
+            d = np.load(f"{path}/{f}")
+
+            buy = np.concatenate([buy, np.zeros(n - len(buy))])
+            sell = np.concatenate([sell, np.zeros(n - len(sell))])
+
+            buy[d["idx"]] += d["buy"]
+            sell[d["idx"]] += d["sell"]
+
+            st["times"].append(pd.Timestamp(f"{day} {f[0:2]}:{f[2:4]}:{f[4:6]}"))
+            st["buy"].append(buy.copy())
+            st["sell"].append(sell.copy())
+            st["files"].append(f)
+
+    n = len(st["tickers"])
+
+    def matrix(rows):
+        if not rows:
+            return np.zeros((0, n))
+        return np.vstack([np.concatenate([r, np.zeros(n - len(r))]) for r in rows])
+
+    return {
+        "times": pd.DatetimeIndex(st["times"]),
+        "tickers": st["tickers"],
+        "buy": matrix(st["buy"]),
+        "sell": matrix(st["sell"]),
+    }
+
+
+def velocity(minutes=VELOCITY_MINUTES, day=None):
+    """
+    Per-ticker intraday foreign flow, indexed by ticker:
+
+    net         cumulative net foreign so far today
+    flow        net change over the last `minutes`
+    velocity    flow per minute (IDR / min)
+
+    Empty DataFrame with fewer than two snapshots.
+    """
+
+    d = load_day(day)
+    times = d["times"]
+
+    if len(times) < 2:
+        return pd.DataFrame(columns=["net", "flow", "velocity"])
+
+    net = d["buy"] - d["sell"]
+
+    # latest snapshot at least `minutes` old, else the first one
+    start = times[-1] - pd.Timedelta(minutes=minutes)
+    i = max(int(np.searchsorted(times, start, side="right")) - 1, 0)
+
+    elapsed = (times[-1] - times[i]).total_seconds() / 60
+    flow = net[-1] - net[i]
+
+    return pd.DataFrame({
+        "net": net[-1],
+        "flow": flow,
+        "velocity": flow / elapsed if elapsed > 0 else 0.0,
+    }, index=pd.Index(d["tickers"], name="Ticker"))
+
+
+# =========================
+# WRITE
+# =========================
+def take_snapshot(df, now=None):
+    """
+    Store one snapshot of the cumulative day totals
+    (Ticker, ForeignBuy, ForeignSell). Returns # tickers changed.
+    """
+
+    now = now or datetime.now()
+    day = now.strftime("%Y-%m-%d")
+    path = _day_dir(day)
+
+    os.makedirs(path, exist_ok=True)
+
+    df = df.dropna(subset=["Ticker"])
+    tick = df["Ticker"].astype(str).str.upper().str.strip()
+
+    prev = load_day(day)
+    tickers = list(prev["tickers"])
+
+    known = set(tickers)
+    added = [t for t in dict.fromkeys(tick) if t not in known]
+
+    if added:
+        tickers += added
+        _write_tickers(path, tickers)
+
+    n = len(tickers)
+
+    last_buy = prev["buy"][-1] if len(prev["buy"]) else np.zeros(0)
+    last_sell = prev["sell"][-1] if len(prev["sell"]) else np.zeros(0)
+
+    buy = np.concatenate([last_buy, np.zeros(n - len(last_buy))])
+    sell = np.concatenate([last_sell, np.zeros(n - len(last_sell))])
+
+    cols = pd.Index(tickers).get_indexer(tick)
+
+    new_buy = buy.copy()
+    new_sell = sell.copy()
+    new_buy[cols] = pd.to_numeric(df["ForeignBuy"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    new_sell[cols] = pd.to_numeric(df["ForeignSell"], errors="coerce").fillna(0).to_numpy(dtype=float)
+
+    idx = np.flatnonzero((new_buy != buy) | (new_sell != sell)).astype(np.int32)
+
+    name = now.strftime("%H%M%S")
+    tmp = f"{path}/.{name}.tmp.npz"
+
+    np.savez(tmp, idx=idx, buy=new_buy[idx] - buy[idx], sell=new_sell[idx] - sell[idx])
+    os.replace(tmp, f"{path}/{name}.npz")
+
+    return len(idx)
+
+
+# =========================
+# END OF DAY
+# =========================
+def store_close(day):
+    """
+    Last snapshot of `day` → foreign store, unless the store already
+    has that day (foreign_auto's later fetch wins) or the snapshot
+    repeats the previous stored day (stale feed). Returns True if stored.
+    """
+
+    from flow_engine import foreign_db
+
+    d = load_day(day)
+
+    if not len(d["times"]):
+        return False
+
+    if foreign_db.day_map(day):
+        print("📚 Intraday close skipped (day already stored):", day)
+        return False
+
+    df = pd.DataFrame({
+        "Ticker": d["tickers"],
+        "ForeignBuy": d["buy"][-1],
+        "ForeignSell": d["sell"][-1],
+    })
+
+    if foreign_db.is_stale(df, day):
+        print("⚠️ Intraday close same as previous day → skip:", day)
+        return False
+
+    foreign_db.upsert_day(df, day)
+    print("📚 Intraday close stored:", day)
+
+    return True
+
+
+# =========================
+# SCHEDULER
+# =========================
+def run_intraday(interval=SNAPSHOT_MINUTES):
+    """
+    Snapshot every `interval` minutes while a session is open.
+    After the close of a trading day the last snapshot goes to the
+    foreign store (store_close). Weekends / holidays are skipped.
+    """
+
+    from flow_engine.foreign_auto import fetch_idx
+
+    print(f"\n🌍 FOREIGN INTRADAY ({interval} min)")
+
+    stored = None
+
+    while True:
+
+        today = datetime.now().strftime("%Y-%m-%d")
+
+        if not market_open():
+
+            # end of day: last snapshot becomes the daily record
+            if trading_day() and stored != today and datetime.now().hour >= 15:
+                store_close(today)
+                stored = today
+
+            time.sleep(60)
+            continue
+
+        try:
+            changed = take_snapshot(fetch_idx())
+            print(f"📸 Snapshot {datetime.now():%H:%M} changed={changed}")
+        except Exception as e:
+            print("⚠️ Snapshot failed", e)
+
+        time.sleep(interval * 60)
+
+
+if __name__ == "__main__":
+    run_intraday()
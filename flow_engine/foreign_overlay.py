@@ -1,14 +1,20 @@
+from flow_engine import foreign_db
 from flow_engine.foreign_cache_guard import get_foreign_data
 from flow_engine.foreign_accel import compute_acceleration
 from flow_engine.foreign_sector import sector_rotation
 
 def apply_foreign_overlay(results):
 
-    df = get_foreign_data()   # ⬅️ FAIL-SAFE
-    if "Ticker" not in df.columns:
-        raise Exception("Foreign data missing Ticker column")
     accel = compute_acceleration()
-    sector_flow = sector_rotation(df)
+
+    # precomputed sector totals of the latest stored day
+    sector_flow = foreign_db.sector_totals()
+
+    if sector_flow.empty:
+        df = get_foreign_data()   # ⬅️ FAIL-SAFE
+        if "Ticker" not in df.columns:
+            raise Exception("Foreign data missing Ticker column")
+        sector_flow = sector_rotation(df)
 
     top_sector = sector_flow.index[0]
 
@@ -1,7 +1,8 @@
-import pandas as pd
 import os
 
-SECTOR_MAP = "data/sector_map.csv"
+from flow_engine import sector_index
+
+SECTOR_MAP = sector_index.SECTOR_MAP
 
 
 def sector_rotation(df):
@@ -13,24 +14,6 @@ def sector_rotation(df):
     # ===== FAIL-SAFE =====
     if not os.path.exists(SECTOR_MAP):
         print("⚠️ sector_map.csv not found → using UNKNOWN sector")
-        df["Sector"] = "Unknown"
-        return df.groupby("Sector")["ForeignNet"].sum()
-
-    # ===== LOAD MAP =====
-    smap = pd.read_csv(SECTOR_MAP)
-
-    # normalize ticker
-    smap["Ticker"] = smap["Ticker"].str.replace(".JK", "", regex=False)
-    df["Ticker"] = df["Ticker"].astype(str)
-
-    # merge
-    df = df.merge(smap, on="Ticker", how="left")
-    df["Sector"] = df["Sector"].fillna("Unknown")
-
-    sector_flow = (
-        df.groupby("Sector")["ForeignNet"]
-        .sum()
-        .sort_values(ascending=False)
-    )
 
-    return sector_flow
+    # integer sector codes + bincount (flow_engine.sector_index)
+    return sector_index.sector_flow(df["Ticker"], df["ForeignNet"])
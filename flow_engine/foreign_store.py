@@ -1,15 +1,16 @@
-import os
-import pandas as pd
 from datetime import datetime
 
-DATA_DIR = "data/foreign_history"
+from flow_engine import foreign_db
+
 
 def store_daily(df):
+    """
+    Upsert today's flow into the foreign store (flow_engine.foreign_db).
+    Returns the stored date ("YYYY-MM-DD").
+    """
 
-    os.makedirs(DATA_DIR, exist_ok=True)
     today = datetime.now().strftime("%Y-%m-%d")
 
-    path = f"{DATA_DIR}/foreign_{today}.csv"
-    df.to_csv(path, index=False)
+    foreign_db.upsert_day(df, today)
 
-    return path
+    return today
@@ -1,108 +1,115 @@
-import yfinance as yf
+import os
+import numpy as np
+import pandas as pd
+
+from flow_engine import fundamental_store
+from modes import MODES
+
+FUND_FILE = "data/fundamentals.csv"    # auto_fundamentals.build
+
+# scored metrics (0 when missing)
+METRICS = ["roe", "growth", "eps_growth", "margin", "debt", "pe", "pbv", "eps"]
 
 # ==========================
-# SAFE GET
+# LOAD
 # ==========================
-def safe(x, default=0):
-    try:
-        if x is None:
-            return default
-        return float(x)
-    except:
-        return default
+def _bare(tickers):
+    return pd.Index(tickers).astype(str).str.upper().str.strip().str.replace(".JK", "", regex=False)
+
+
+def load_table():
+    """
+    Whole fundamentals table indexed by bare ticker: the store
+    (flow_engine.fundamental_store) first, data/fundamentals.csv
+    (per, div_yield, ...) filling what the store lacks.
+    """
+
+    store = pd.DataFrame.from_dict(fundamental_store.load_all(), orient="index")
+
+    if not store.empty:
+        store.index = _bare(store.index)
+        store = store[~store.index.duplicated(keep="last")]
+
+    if os.path.exists(FUND_FILE):
+
+        csv = pd.read_csv(FUND_FILE)
+        csv.index = _bare(csv.pop("symbol"))
+        csv = csv[~csv.index.duplicated(keep="last")].rename(columns={"per": "pe"})
+
+        store = csv if store.empty else store.combine_first(csv)
+
+    return store.apply(pd.to_numeric, errors="coerce")
 
 # ==========================
-# MAIN FUNDAMENTAL
+# SCORE TABLE
 # ==========================
-def get_fundamental(sym):
+def fundamental_table(tickers=None):
     """
-    Balanced fund model:
-    quality + growth + value
+    Balanced fund model (quality + growth + value) for every ticker
+    in one vectorized pass, indexed like `tickers` (default: all).
+
+    fund_score, quality, quality_score / growth_score / debt_score /
+    value_score, the METRICS, per / div_yield, and one boolean
+    column per modes.py screen. Tickers without fundamentals score
+    0 / "UNKNOWN" and pass no screen.
     """
 
-    try:
-        t = yf.Ticker(sym)
-        info = t.info
-    except:
-        return {
-            "fund_score": 0,
-            "quality": "UNKNOWN"
-        }
-
-    # ======================
-    # CORE METRICS
-    # ======================
-    roe = safe(info.get("returnOnEquity"))
-    growth = safe(info.get("revenueGrowth"))
-    eps_growth = safe(info.get("earningsGrowth"))
-    margin = safe(info.get("profitMargins"))
-    debt = safe(info.get("debtToEquity"))
-    pe = safe(info.get("trailingPE"))
-    pbv = safe(info.get("priceToBook"))
-    eps = safe(info.get("trailingEps"))
-    der = debt
-
-    score = 0
-
-    # ======================
-    # QUALITY
-    # ======================
-    if roe > 0.15:
-        score += 8
-    elif roe > 0.10:
-        score += 5
-
-    if margin > 0.15:
-        score += 5
-
-    # ======================
-    # GROWTH
-    # ======================
-    if growth > 0.15:
-        score += 8
-    elif growth > 0.05:
-        score += 5
-
-    if eps_growth > 0.15:
-        score += 6
-
-    # ======================
-    # DEBT
-    # ======================
-    if debt > 0 and debt < 1:
-        score += 5
-    elif debt > 2:
-        score -= 5
-
-    # ======================
-    # VALUE
-    # ======================
-    if pe > 0 and pe < 12:
-        score += 5
-    elif pe > 40:
-        score -= 5
+    raw = load_table()
+
+    tickers = list(raw.index) if tickers is None else list(dict.fromkeys(tickers))
+
+    raw = raw.reindex(_bare(tickers))
+    raw.index = pd.Index(tickers, name="Ticker")
+
+    for c in METRICS + ["div_yield"]:
+        if c not in raw.columns:
+            raw[c] = np.nan
+
+    raw["per"] = raw["pe"]
+
+    m = raw[METRICS].fillna(0)
+
+    roe, growth, eps_growth = m["roe"], m["growth"], m["eps_growth"]
+    margin, debt, pe = m["margin"], m["debt"], m["pe"]
+
+    out = pd.DataFrame(index=raw.index)
+
+    out["quality_score"] = np.select([roe > 0.15, roe > 0.10], [8, 5], 0) + np.where(margin > 0.15, 5, 0)
+    out["growth_score"] = np.select([growth > 0.15, growth > 0.05], [8, 5], 0) + np.where(eps_growth > 0.15, 6, 0)
+    out["debt_score"] = np.select([(debt > 0) & (debt < 1), debt > 2], [5, -5], 0)
+    out["value_score"] = np.select([(pe > 0) & (pe < 12), pe > 40], [5, -5], 0)
 
     # clamp
-    score = max(min(score, 40), -10)
-
-    # quality label
-    if score >= 25:
-        q = "HIGH"
-    elif score >= 10:
-        q = "MID"
-    else:
-        q = "LOW"
-
-    return {
-        "fund_score": score,
-        "quality": q,
-        "roe": roe,
-        "growth": growth,
-        "eps_growth": eps_growth,
-        "margin": margin,
-        "debt": debt,
-        "der": der,
-        "pbv": pbv,
-        "eps": eps,
-        "pe": pe
-    }
\ No newline at end of file
+    score = out[["quality_score", "growth_score", "debt_score", "value_score"]].sum(axis=1).clip(-10, 40)
+
+    known = raw[METRICS].notna().any(axis=1)
+
+    out["fund_score"] = score.where(known, 0).astype(int)
+    out["quality"] = np.where(
+        known,
+        np.select([score >= 25, score >= 10], ["HIGH", "MID"], "LOW"),
+        "UNKNOWN"
+    )
+
+    out[METRICS] = m
+    out["der"] = m["debt"]
+    out["per"] = raw["per"]
+    out["div_yield"] = raw["div_yield"]
+
+    # screens on the raw values: a missing ratio fails the screen
+    for name, screen in MODES.items():
+        out[name] = screen(raw).fillna(False).astype(bool)
+
+    return out
+
+
+# ==========================
+# MAIN FUNDAMENTAL
+# ==========================
+def get_fundamental(sym):
+    """
+    One row of fundamental_table() as a dict.
+    Reads the stores only, never the network.
+    """
+
+    return fundamental_table([sym]).iloc[0].to_dict()
@@ -0,0 +1,240 @@
+import os
+import sys
+import time
+import sqlite3
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import FUND_TTL_DAYS, FUND_PRICE_TTL_DAYS, FUND_WORKERS
+from utils.rate_guard import guard
+
+
+# =========================================
+# FUNDAMENTALS STORE
+# =========================================
+#
+# yfinance .info is the slowest call per symbol and the numbers
+# move quarterly, so it is fetched by a refresh job, not the scan:
+#
+#   data/fundamentals.db   SQLite, one row per (ticker, field)
+#                          with its own fetch timestamp
+#
+# A field is stale after its TTL (statement fields FUND_TTL_DAYS,
+# price ratios FUND_PRICE_TTL_DAYS). refresh() re-fetches stale
+# tickers on a FUND_WORKERS thread pool, paced by the shared Yahoo
+# token bucket. Readers only query the store: a scan on a warm store
+# makes zero .info requests.
+#
+#   python -m flow_engine.fundamental_store [--force]
+
+DB_PATH = "data/fundamentals.db"
+UNIVERSE_FILE = "data/universe_institutional.csv"
+
+DAY = 86400
+
+# yfinance info key -> stored field, TTL (days)
+FIELDS = {
+    "returnOnEquity": ("roe", FUND_TTL_DAYS),
+    "revenueGrowth": ("growth", FUND_TTL_DAYS),
+    "earningsGrowth": ("eps_growth", FUND_TTL_DAYS),
+    "profitMargins": ("margin", FUND_TTL_DAYS),
+    "debtToEquity": ("debt", FUND_TTL_DAYS),
+    "trailingEps": ("eps", FUND_TTL_DAYS),
+    "trailingPE": ("pe", FUND_PRICE_TTL_DAYS),
+    "priceToBook": ("pbv", FUND_PRICE_TTL_DAYS),
+    "dividendYield": ("div_yield", FUND_PRICE_TTL_DAYS),
+}
+
+TTL = {name: ttl * DAY for name, ttl in FIELDS.values()}
+
+stats = {"info_calls": 0, "info_errors": 0}
+_stats_lock = threading.Lock()
+
+_snapshot = {}    # stamp -> {TICKER: {field: value}}
+
+
+def connect(path=DB_PATH):
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS fundamentals (
+            ticker  TEXT NOT NULL,
+            field   TEXT NOT NULL,
+            value   REAL,
+            fetched REAL NOT NULL,
+            PRIMARY KEY (ticker, field)
+        )
+    """)
+
+    return con
+
+
+def _num(x):
+    try:
+        return None if x is None else float(x)
+    except:
+        return None
+
+
+# =========================
+# WRITE
+# =========================
+def put(con, sym, info, now=None):
+    """
+    Store the FIELDS of one .info dict (missing keys stored as NULL,
+    so an absent ratio is not re-fetched before its TTL).
+    """
+
+    now = now or time.time()
+
+    con.executemany(
+        "INSERT OR REPLACE INTO fundamentals VALUES (?, ?, ?, ?)",
+        [(sym.upper(), name, _num(info.get(key)), now) for key, (name, _) in FIELDS.items()]
+    )
+
+
+def fetch_info(sym):
+    """
+    One rate-limited yfinance .info request (counted in stats).
+    """
+
+    import yfinance as yf
+
+    guard()
+
+    with _stats_lock:
+        stats["info_calls"] += 1
+
+    return yf.Ticker(sym).info
+
+
+# =========================
+# READ
+# =========================
+def _stamp(path):
+    return tuple(os.path.getmtime(f) if os.path.exists(f) else None for f in (path, path + "-wal"))
+
+
+def load_all(path=DB_PATH):
+    """
+    {TICKER: {field: value}} of the whole store, memoized until the
+    database changes on disk. Never touches the network.
+    """
+
+    if not os.path.exists(path):
+        return {}
+
+    stamp = (path, _stamp(path))
+
+    if stamp not in _snapshot:
+
+        con = connect(path)
+        rows = con.execute("SELECT ticker, field, value FROM fundamentals").fetchall()
+        con.close()
+
+        out = {}
+        for t, f, v in rows:
+            out.setdefault(t, {})[f] = v
+
+        _snapshot.clear()
+        _snapshot[stamp] = out
+
+    return _snapshot[stamp]
+
+
+def get(sym, path=DB_PATH):
+    """
+    Stored fields of one ticker, or None if never fetched.
+    """
+
+    return load_all(path).get(sym.upper())
+
+
+def stale(tickers, now=None, path=DB_PATH):
+    """
+    Tickers with a missing field or one older than its TTL.
+    """
+
+    now = now or time.time()
+
+    if not os.path.exists(path):
+        return list(tickers)
+
+    con = connect(path)
+    rows = con.execute("SELECT ticker, field, fetched FROM fundamentals").fetchall()
+    con.close()
+
+    fresh = {}
+    for t, f, fetched in rows:
+        if f in TTL and now - fetched < TTL[f]:
+            fresh[t] = fresh.get(t, 0) + 1
+
+    return [t for t in tickers if fresh.get(t.upper(), 0) < len(TTL)]
+
+
+# =========================
+# REFRESH JOB
+# =========================
+def refresh(tickers, workers=FUND_WORKERS, force=False, path=DB_PATH):
+    """
+    Fetch .info for stale tickers (all with force) on a thread pool.
+    Writes happen on the calling thread. Returns # tickers stored.
+    """
+
+    todo = list(tickers) if force else stale(tickers, path=path)
+
+    print(f"📚 Fundamentals: {len(todo)}/{len(tickers)} stale")
+
+    if not todo:
+        return 0
+
+    con = connect(path)
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+
+        jobs = {pool.submit(fetch_info, sym): sym for sym in todo}
+
+        for job in as_completed(jobs):
+
+            sym = jobs[job]
+
+            try:
+                info = job.result()
+            except Exception as e:
+                with _stats_lock:
+                    stats["info_errors"] += 1
+                print(f"⚠️ Fundamental fetch failed {sym}:", e)
+                continue
+
+            if not info:
+                continue
+
+            put(con, sym, info)
+            done += 1
+
+            if done % 50 == 0:
+                con.commit()
+                print(f"   {done}/{len(todo)}")
+
+    con.commit()
+    con.close()
+
+    print(f"✅ Fundamentals stored: {done} ({summary()})")
+
+    return done
+
+
+def summary():
+    return f"{stats['info_calls']} .info calls | {stats['info_errors']} errors"
+
+
+if __name__ == "__main__":
+
+    universe = pd.read_csv(UNIVERSE_FILE, header=None)[0].tolist()
+
+    refresh(universe, force="--force" in sys.argv)
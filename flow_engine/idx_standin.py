@@ -0,0 +1,235 @@
+import os
+import glob
+import gzip
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import numpy as np
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# =========================================
+# IDX STAND-IN SERVER
+# =========================================
+#
+# Local replacement for the IDX trading-summary endpoint, for
+# offline benchmarks and retry tests of flow_engine.idx_transport:
+#
+#   GET /primary/TradingSummary/GetStockSummary
+#
+# Replays recorded payloads (data/idx_recorded/*.json, raw IDX
+# JSON) or synthetic 960-ticker tables. Supports gzip, ETag /
+# Last-Modified with 304 answers, and injected latency / failures.
+#
+#   python -m flow_engine.idx_standin --port 8765 --latency 0.05 --fail 0.1
+#   IDX_BASE_URL=http://127.0.0.1:8765 python -m flow_engine.foreign_auto
+
+RECORD_DIR = "data/idx_recorded"
+SUMMARY_PATH = "/primary/TradingSummary/GetStockSummary"
+
+
+def synthetic_payload(n=960, seed=0):
+    """
+    IDX-shaped JSON with n tickers of random foreign buy / sell.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    return {
+        "draw": 0,
+        "recordsTotal": n,
+        "recordsFiltered": n,
+        "data": [
+            {
+                "No": i + 1,
+                "StockCode": f"S{i:03d}",
+                "StockName": f"STOCK {i}",
+                "Close": float(rng.integers(50, 10000)),
+                "Volume": float(rng.integers(0, 10**8)),
+                "Value": float(rng.integers(0, 10**11)),
+                "ForeignBuy": float(rng.integers(0, 10**10)),
+                "ForeignSell": float(rng.integers(0, 10**10)),
+            }
+            for i in range(n)
+        ],
+    }
+
+
+def load_recordings(path=RECORD_DIR):
+
+    out = []
+
+    for f in sorted(glob.glob(f"{path}/*.json")):
+        with open(f) as fh:
+            out.append(json.load(fh))
+
+    return out
+
+
+def record(payload, path=RECORD_DIR):
+    """
+    Save one raw IDX payload for replay.
+    """
+
+    os.makedirs(path, exist_ok=True)
+
+    f = f"{path}/summary_{time.strftime('%Y%m%d_%H%M%S')}.json"
+
+    with open(f, "w") as fh:
+        json.dump(payload, fh)
+
+    return f
+
+
+class _Body:
+    """
+    One payload, pre-encoded once: raw / gzip bytes and validators.
+    """
+
+    def __init__(self, payload):
+        self.raw = json.dumps(payload).encode()
+        self.gzip = gzip.compress(self.raw, 5)
+        self.etag = '"' + hashlib.sha1(self.raw).hexdigest()[:16] + '"'
+        self.modified = formatdate(time.time(), usegmt=True)
+
+
+class StandIn:
+    """
+    Payload rotation + failure / latency settings shared by handlers.
+
+    rotate_every: serve the next payload after this many 200 answers
+                  (0: never, an unchanged summary)
+    fail:         probability of an injected 503
+    latency:      seconds added to every answer (+ up to `jitter`)
+    """
+
+    def __init__(self, payloads, latency=0.0, jitter=0.0, fail=0.0, rotate_every=0, seed=None):
+        self.bodies = [_Body(p) for p in payloads]
+        self.latency = latency
+        self.jitter = jitter
+        self.fail = fail
+        self.rotate_every = rotate_every
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.pos = 0
+        self.served = 0
+        self.stats = {"200": 0, "304": 0, "503": 0, "404": 0}
+
+    def current(self):
+        with self.lock:
+            return self.bodies[self.pos]
+
+    def served_one(self):
+        """
+        Count a 200 answer; move to the next payload every rotate_every.
+        """
+
+        with self.lock:
+
+            self.served += 1
+
+            if self.rotate_every and self.served % self.rotate_every == 0:
+                self.pos = (self.pos + 1) % len(self.bodies)
+
+    def roll_failure(self):
+        with self.lock:
+            return self.rng.random() < self.fail
+
+
+def _handler(standin):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version = "HTTP/1.1"    # keep-alive
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code, body=b"", headers=None):
+
+            self.send_response(code)
+
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+
+            if body:
+                self.wfile.write(body)
+
+            with standin.lock:
+                standin.stats[str(code)] = standin.stats.get(str(code), 0) + 1
+
+        def do_GET(self):
+
+            if standin.latency or standin.jitter:
+                time.sleep(standin.latency + random.uniform(0, standin.jitter))
+
+            if self.path.split("?")[0] != SUMMARY_PATH:
+                return self._send(404)
+
+            if standin.roll_failure():
+                return self._send(503, b"Service Unavailable")
+
+            body = standin.current()
+
+            validators = {"ETag": body.etag, "Last-Modified": body.modified}
+
+            if self.headers.get("If-None-Match") == body.etag:
+                return self._send(304, headers=validators)
+
+            headers = {"Content-Type": "application/json", **validators}
+
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                data = body.gzip
+                headers["Content-Encoding"] = "gzip"
+            else:
+                data = body.raw
+
+            self._send(200, data, headers)
+            standin.served_one()
+
+    return Handler
+
+
+def serve(port=0, payloads=None, background=True, **settings):
+    """
+    Start the stand-in on 127.0.0.1:port (0: any free port).
+    Returns (server, base_url, standin); background=False blocks.
+    """
+
+    # two synthetic days so rotation changes the ETag
+    payloads = payloads or load_recordings() or [synthetic_payload(seed=s) for s in (0, 1)]
+
+    standin = StandIn(payloads, **settings)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(standin))
+    server.daemon_threads = True
+
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        print(f"🧪 IDX stand-in on {base_url} ({len(payloads)} payloads)")
+        server.serve_forever()
+
+    return server, base_url, standin
+
+
+if __name__ == "__main__":
+
+    ap = argparse.ArgumentParser(description="Local IDX trading-summary stand-in")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--fail", type=float, default=0.0)
+    ap.add_argument("--rotate", type=int, default=0)
+    a = ap.parse_args()
+
+    serve(a.port, background=False, latency=a.latency, jitter=a.jitter,
+          fail=a.fail, rotate_every=a.rotate)
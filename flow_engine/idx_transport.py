@@ -0,0 +1,202 @@
+import time
+import random
+import threading
+import requests
+import pandas as pd
+
+from config import IDX_BASE_URL, IDX_TIMEOUT, IDX_RETRIES
+
+
+# =========================================
+# IDX TRANSPORT
+# =========================================
+#
+# One keep-alive session per process for every IDX endpoint:
+#
+#   connection reuse    requests.Session (pooled TCP / TLS)
+#   gzip                Accept-Encoding, decoded by requests
+#   conditional GET     ETag / Last-Modified remembered per URL;
+#                       a 304 returns the last parsed result
+#                       without reading or parsing a body
+#
+# The base URL comes from config.IDX_BASE_URL (env IDX_BASE_URL),
+# so fetchers can be pointed at flow_engine.idx_standin offline.
+
+SUMMARY_PATH = "/primary/TradingSummary/GetStockSummary"
+SUMMARY_PARAMS = {"length": 9999, "start": 0}
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_5)",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Mozilla/5.0 (X11; Linux x86_64)",
+]
+
+
+class IdxTransport:
+    """
+    Shared HTTP session with validators and parsed-result cache.
+    get(path, parse) returns parse(json) or the cached value on 304.
+    Safe to share across threads: cache and stats are updated
+    under self.lock.
+    """
+
+    def __init__(self, base_url=IDX_BASE_URL, timeout=IDX_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": random.choice(USER_AGENTS),
+            "Referer": "https://www.idx.co.id/",
+            "Accept": "application/json, text/plain, */*",
+            "Accept-Encoding": "gzip, deflate",
+            "X-Requested-With": "XMLHttpRequest",
+            "Connection": "keep-alive",
+        })
+        self.cache = {}    # url -> (etag, last_modified, parsed)
+        self.lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "not_modified": 0,
+            "parsed": 0,
+            "errors": 0,
+            "bytes": 0,
+        }
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def _count(self, key, n=1):
+
+        with self.lock:
+            self.stats[key] += n
+
+    def get(self, path, parse, params=None):
+
+        url = self.url(path)
+
+        with self.lock:
+            etag, modified, cached = self.cache.get(url, (None, None, None))
+
+        headers = {}
+        if cached is not None:
+            if etag:
+                headers["If-None-Match"] = etag
+            if modified:
+                headers["If-Modified-Since"] = modified
+
+        self._count("requests")
+
+        try:
+            r = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        except Exception:
+            self._count("errors")
+            raise
+
+        if r.status_code == 304 and cached is not None:
+            self._count("not_modified")
+            return cached
+
+        if r.status_code >= 400:
+            self._count("errors")
+        r.raise_for_status()
+
+        self._count("bytes", len(r.content))
+
+        parsed = parse(r.json())
+        self._count("parsed")
+
+        with self.lock:
+            self.cache[url] = (r.headers.get("ETag"), r.headers.get("Last-Modified"), parsed)
+
+        return parsed
+
+    def summary(self):
+
+        with self.lock:
+            s = dict(self.stats)
+
+        return (
+            f"{s['requests']} req | 304 {s['not_modified']} | "
+            f"parsed {s['parsed']} | errors {s['errors']} | {s['bytes']/1e6:.1f} MB"
+        )
+
+
+_transport = {}
+_transport_lock = threading.Lock()
+
+
+def transport(base_url=None):
+    """
+    Process-wide transport per base URL (default config.IDX_BASE_URL).
+    """
+
+    base_url = base_url or IDX_BASE_URL
+
+    with _transport_lock:
+        if base_url not in _transport:
+            _transport[base_url] = IdxTransport(base_url)
+
+        return _transport[base_url]
+
+
+# =========================
+# STOCK SUMMARY
+# =========================
+def parse_summary(payload):
+    """
+    GetStockSummary JSON → Ticker, ForeignBuy, ForeignSell, ForeignNet.
+    """
+
+    data = payload.get("data")
+
+    if not data:
+        raise Exception("Empty IDX data")
+
+    df = pd.DataFrame(data)
+
+    df.columns = [c.lower() for c in df.columns]
+
+    df = df.rename(columns={
+        "stockcode": "Ticker",
+        "foreignbuy": "ForeignBuy",
+        "foreignsell": "ForeignSell"
+    })
+
+    for c in ["Ticker", "ForeignBuy", "ForeignSell"]:
+        if c not in df.columns:
+            raise Exception(f"IDX column missing: {c}")
+
+    df = df.dropna(subset=["Ticker"])
+
+    df["Ticker"] = df["Ticker"].astype(str)
+
+    df["ForeignBuy"] = pd.to_numeric(df["ForeignBuy"], errors="coerce").fillna(0)
+    df["ForeignSell"] = pd.to_numeric(df["ForeignSell"], errors="coerce").fillna(0)
+
+    df["ForeignNet"] = df["ForeignBuy"] - df["ForeignSell"]
+
+    return df[["Ticker", "ForeignBuy", "ForeignSell", "ForeignNet"]].reset_index(drop=True)
+
+
+def fetch_stock_summary(retries=IDX_RETRIES, backoff=2.0, t=None):
+    """
+    Stock summary with retry + jittered exponential backoff.
+    No delay before the first attempt. Returns a copy (callers
+    may mutate it; the cached parse stays intact).
+    """
+
+    t = t or transport()
+
+    for attempt in range(retries):
+
+        try:
+            return t.get(SUMMARY_PATH, parse_summary, SUMMARY_PARAMS).copy()
+
+        except Exception as e:
+
+            print(f"⚠️ IDX attempt {attempt+1} failed -> {e}")
+
+            if attempt < retries - 1:
+                time.sleep(random.uniform(0.5, 1.0) * backoff * (2 ** attempt))
+
+    raise Exception("❌ IDX API blocked after retries")
@@ -0,0 +1,154 @@
+import os
+import numpy as np
+import pandas as pd
+
+
+# =========================================
+# SECTOR INDEX
+# =========================================
+#
+# data/sector_map.csv read once per process (re-read when the file
+# changes) into integer sector codes:
+#
+#   names            sector names, sorted, UNKNOWN last
+#   code[TICKER]     position in names (bare ticker, no ".JK")
+#
+# Sector analytics are then bincounts over a code array instead of
+# string merges / groupby / dict loops, so the foreign store
+# aggregates, the overlay, the Excel dashboard and the Telegram
+# message all group tickers the same way.
+
+SECTOR_MAP = "data/sector_map.csv"
+UNKNOWN = "Unknown"
+
+_index = {}     # path -> (mtime, {"names", "code"})
+_codes = {}     # path -> (mtime, tickers tuple, codes)
+
+
+def _bare(ticker):
+    return str(ticker).upper().strip().replace(".JK", "")
+
+
+def load(path=SECTOR_MAP):
+    """
+    {"names": [sector, ..., UNKNOWN], "code": {TICKER: int}}.
+    Missing map: every ticker is UNKNOWN.
+    """
+
+    stamp = os.path.getmtime(path) if os.path.exists(path) else None
+
+    hit = _index.get(path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+
+    tickers, sectors = [], []
+
+    if stamp is not None:
+        df = pd.read_csv(path).dropna(subset=["Ticker"])
+        tickers = [_bare(t) for t in df["Ticker"]]
+        sectors = df["Sector"].fillna(UNKNOWN).astype(str).str.strip().tolist()
+
+    names = sorted(set(sectors) - {UNKNOWN}) + [UNKNOWN]
+    pos = {s: i for i, s in enumerate(names)}
+
+    index = {
+        "names": names,
+        "code": {t: pos[s] for t, s in zip(tickers, sectors)},
+    }
+
+    _index[path] = (stamp, index)
+
+    return index
+
+
+def names(path=SECTOR_MAP):
+    return load(path)["names"]
+
+
+def sector_of(ticker, path=SECTOR_MAP):
+
+    index = load(path)
+
+    return index["names"][index["code"].get(_bare(ticker), len(index["names"]) - 1)]
+
+
+def codes(tickers, path=SECTOR_MAP):
+    """
+    int array of sector codes, UNKNOWN for unmapped tickers.
+    The last ticker list is memoized (stores reuse the same columns).
+    """
+
+    index = load(path)
+    tickers = tuple(tickers)
+
+    hit = _codes.get(path)
+    if hit is not None and hit[0] is _index[path][0] and hit[1] == tickers:
+        return hit[2]
+
+    unknown = len(index["names"]) - 1
+    code = index["code"]
+
+    out = np.fromiter((code.get(_bare(t), unknown) for t in tickers), dtype=np.intp, count=len(tickers))
+
+    _codes[path] = (_index[path][0], tickers, out)
+
+    return out
+
+
+# =========================
+# AGGREGATES
+# =========================
+def group_sum(values, codes, n):
+    """
+    Sum of values per code (NaN counts as 0).
+    values (N,) → (n,), values (D, N) → (D, n).
+    """
+
+    v = np.nan_to_num(np.asarray(values, dtype=float))
+
+    if v.ndim == 1:
+        return np.bincount(codes, weights=v, minlength=n)
+
+    d = v.shape[0]
+    flat = (np.arange(d)[:, None] * n + codes[None, :]).ravel()
+
+    return np.bincount(flat, weights=v.ravel(), minlength=d * n).reshape(d, n)
+
+
+def sector_stats(tickers, flow=None, score=None, path=SECTOR_MAP):
+    """
+    One row per sector with at least one ticker:
+
+    count       # tickers
+    flow        sum of flow          accum / distrib   # flow > 0 / < 0
+    score       average score
+    """
+
+    sec = names(path)
+    c = codes(tickers, path)
+    n = len(sec)
+
+    count = np.bincount(c, minlength=n)
+    out = {"count": count}
+
+    if flow is not None:
+        flow = np.asarray(flow, dtype=float)
+        with np.errstate(invalid="ignore"):
+            out["flow"] = group_sum(flow, c, n)
+            out["accum"] = np.bincount(c, weights=flow > 0, minlength=n).astype(int)
+            out["distrib"] = np.bincount(c, weights=flow < 0, minlength=n).astype(int)
+
+    if score is not None:
+        out["score"] = group_sum(score, c, n) / np.maximum(count, 1)
+
+    df = pd.DataFrame(out, index=pd.Index(sec, name="Sector"))
+
+    return df[df["count"] > 0]
+
+
+def sector_flow(tickers, flow, path=SECTOR_MAP):
+    """
+    Net flow per sector, largest first.
+    """
+
+    return sector_stats(tickers, flow=flow, path=path)["flow"].sort_values(ascending=False)
@@ -5,7 +5,7 @@ def score_value_mode(f):
     if f is None:
         return False
 
-    return (f["pbv"] < 1.5) and (f["roe"] > 0.12)
+    return (f["pbv"] < 1.5) & (f["roe"] > 0.12)
 
 
 def score_growth_mode(f):
@@ -15,7 +15,7 @@ def score_growth_mode(f):
     if f is None:
         return False
 
-    return (f["per"] < 15) and (f["eps_growth"] > 0.10)
+    return (f["per"] < 15) & (f["eps_growth"] > 0.10)
 
 
 def score_dividend_mode(f):
@@ -25,7 +25,7 @@ def score_dividend_mode(f):
     if f is None:
         return False
 
-    return (f["div_yield"] > 0.04) and (f["pbv"] < 2.0)
+    return (f["div_yield"] > 0.04) & (f["pbv"] < 2.0)
 
 
 def score_magic_formula(f):
@@ -36,7 +36,7 @@ def score_magic_formula(f):
     if f is None:
         return False
 
-    return (f["per"] < 15) and (f["roe"] > 0.15)
+    return (f["per"] < 15) & (f["roe"] > 0.15)
 
 
 def score_turnaround_mode(f):
@@ -47,4 +47,15 @@ def score_turnaround_mode(f):
     if f is None:
         return False
 
-    return (f["pbv"] < 1.0) and (f["eps_growth"] > 0.0)
+    return (f["pbv"] < 1.0) & (f["eps_growth"] > 0.0)
+
+
+# every screen works on one fundamentals dict or on a whole
+# fundamentals table (DataFrame → boolean column)
+MODES = {
+    "value_mode": score_value_mode,
+    "growth_mode": score_growth_mode,
+    "dividend_mode": score_dividend_mode,
+    "magic_formula": score_magic_formula,
+    "turnaround_mode": score_turnaround_mode,
+}
@@ -0,0 +1,376 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from config import MIN_SCORE
+from defensive import allowed_sectors
+from weighting import portfolio_weights
+from signals_panel import evaluate_history
+from flow_engine import sector_index
+from utils import panel_store, price_store
+from utils.beifraksi import tick_sizes
+
+
+# =========================================
+# PORTFOLIO BACKTEST
+# =========================================
+#
+# Simulates the allocation rules over the cached price panel:
+#
+#   index ^JKSE          → regime (PANIC / RISK-OFF / NEUTRAL / RISK-ON)
+#   sector strength      → ranked sectors (sector_rotation blend)
+#   defensive.allowed_sectors + weighting.portfolio_weights
+#                        → sector weights + CASH
+#   signals_panel score  → top names per sector, equal split
+#
+# Decisions use the close of a rebalance bar, orders fill at the
+# next open on the BEI tick grid (buys one tick up, sells on the
+# tick below), in round lots, with broker fees. Everything up to
+# the order loop is (date × ticker) arrays; scores are computed
+# once, so allocation rules can be iterated with simulate().
+
+REPORT_FILE = "reports/portfolio_equity.csv"
+
+INITIAL_CAPITAL = 1_000_000_000
+LOT = 100
+FEE_BUY = 0.0015
+FEE_SELL = 0.0025
+
+NAMES_PER_SECTOR = 2
+REBALANCE = "W"          # "D" daily, "W" last bar of each week
+
+# 5-day index return bands (market_context regime5) + panic band
+RISK_ON_RET5 = 0.02
+RISK_OFF_RET5 = -0.03
+PANIC_RET5 = -0.06
+
+
+# =========================
+# INPUTS
+# =========================
+def load_sectors(tickers):
+    """
+    (sector names, int code per ticker) from flow_engine.sector_index,
+    the grouping the scanner and the sector engine use. Names are
+    uppercased for the defensive.py keyword rules; UNKNOWN is last.
+    """
+
+    names = [n.upper() for n in sector_index.names()]
+
+    return names, sector_index.codes(tickers)
+
+
+def _ret(close, n):
+
+    out = np.full(close.shape, np.nan)
+    out[n:] = close[n:] / close[:-n] - 1
+
+    return out
+
+
+def regimes(index_close):
+    """
+    Regime on every bar from the index 5-day return.
+    """
+
+    ret5 = _ret(index_close, 5)
+
+    out = np.full(len(index_close), "NEUTRAL", dtype=object)
+
+    with np.errstate(invalid="ignore"):
+        out[ret5 > RISK_ON_RET5] = "RISK-ON"
+        out[ret5 < RISK_OFF_RET5] = "RISK-OFF"
+        out[ret5 < PANIC_RET5] = "PANIC"
+
+    return out
+
+
+def sector_strength(close, codes, n_sectors):
+    """
+    (date × sector) 0.6 * ret20 + 0.4 * ret5, averaged over the
+    sector's names with data (sector_rotation.compute_sector_leaders).
+    """
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        blend = 0.6 * _ret(close, 20) + 0.4 * _ret(close, 5)
+
+    total = sector_index.group_sum(blend, codes, n_sectors)
+    count = sector_index.group_sum(~np.isnan(blend), codes, n_sectors)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def load_inputs(tickers=None, min_score=MIN_SCORE):
+    """
+    Everything simulate() needs, from one panel load and one
+    score history pass.
+    """
+
+    panel = price_store.load_panel()
+
+    if panel is None:
+        return None
+
+    if tickers is None:
+        tickers = [t for t in panel["tickers"] if not t.startswith("^")]
+
+    tickers = [t for t in tickers if t in panel["col"]]
+    cols = [panel["col"][t] for t in tickers]
+
+    dates = pd.DatetimeIndex(panel["dates"])
+
+    index = panel_store.frame(panel, "^JKSE", ["Close"])
+
+    if index is not None:
+        index_close = index["Close"].reindex(dates).ffill().to_numpy(dtype=float)
+    else:
+        index_close = np.full(len(dates), np.nan)
+
+    history = evaluate_history(
+        panel, tickers=tickers,
+        ihsg=index["Close"] if index is not None else None
+    )
+
+    close = np.asarray(panel["Close"])[:, cols]
+    opens = np.asarray(panel["Open"])[:, cols]
+
+    # valuation carries the last close over days without a bar
+    last_close = pd.DataFrame(close).ffill().to_numpy()
+
+    names, codes = load_sectors(tickers)
+
+    return {
+        "dates": dates,
+        "tickers": tickers,
+        "sector_names": names,
+        "codes": codes,
+        "open": np.where(np.isnan(opens), close, opens),
+        "close": last_close,
+        "score": np.nan_to_num(history["score"], nan=-np.inf),
+        "eligible": history["valid"] & (history["score"] >= min_score),
+        "regime": regimes(index_close),
+        "strength": sector_strength(last_close, codes, len(names)),
+    }
+
+
+# =========================
+# ALLOCATION
+# =========================
+def target_weights(inputs, t, top_n=NAMES_PER_SECTOR,
+                   weights_fn=portfolio_weights, sectors_fn=allowed_sectors):
+    """
+    Ticker weights (fractions) decided on bar t.
+    """
+
+    names = inputs["sector_names"]
+    strength = inputs["strength"][t]
+    regime = inputs["regime"][t]
+
+    ranked = [
+        names[s] for s in np.argsort(-np.nan_to_num(strength, nan=-np.inf), kind="stable")
+        if not np.isnan(strength[s]) and s != len(names) - 1
+    ]
+
+    weights = weights_fn(regime, sectors_fn(regime, ranked))
+
+    w = np.zeros(len(inputs["tickers"]))
+    eligible = inputs["eligible"][t]
+    score = inputs["score"][t]
+
+    for sector, pct in weights.items():
+
+        if sector == "CASH" or sector not in names:
+            continue
+
+        members = np.flatnonzero((inputs["codes"] == names.index(sector)) & eligible)
+
+        # no signal in the sector: its slice stays in cash
+        if not len(members):
+            continue
+
+        pick = members[np.argsort(-score[members], kind="stable")[:top_n]]
+        w[pick] = pct / 100 / len(pick)
+
+    return w
+
+
+def rebalance_days(dates, freq=REBALANCE):
+
+    if freq == "D":
+        return np.ones(len(dates), dtype=bool)
+
+    week = dates.to_period("W").asi8
+
+    return np.append(week[1:] != week[:-1], True)
+
+
+# =========================
+# EXECUTION
+# =========================
+def _execute(shares, cash, w, px, mark, fee_buy, fee_sell):
+    """
+    Move holdings to weights w at open prices px (NaN: not traded).
+    Returns shares, cash, traded value, fees.
+    """
+
+    tradable = ~np.isnan(px)
+    value_px = np.where(tradable, px, mark)
+
+    equity = cash + np.nansum(shares * value_px)
+
+    tick = tick_sizes(px)
+    buy_px = (np.floor(px / tick) + 1) * tick
+    sell_px = np.floor(px / tick) * tick
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        target = np.floor(w * equity / (buy_px * (1 + fee_buy)) / LOT) * LOT
+
+    target = np.where(tradable, target, shares)
+
+    sell = np.clip(shares - target, 0, None)
+    buy = np.clip(target - shares, 0, None)
+
+    sold = np.nansum(sell * sell_px)
+    cash += sold * (1 - fee_sell)
+
+    cost = np.nansum(buy * buy_px) * (1 + fee_buy)
+
+    # rounding / fees can overshoot the cash left: scale buys down
+    if cost > cash:
+        buy = np.floor(buy * cash / cost / LOT) * LOT
+        cost = np.nansum(buy * buy_px) * (1 + fee_buy)
+
+    bought = cost / (1 + fee_buy)
+    cash -= cost
+
+    fees = sold * fee_sell + bought * fee_buy
+
+    return shares - sell + buy, cash, sold + bought, fees
+
+
+def simulate(
+    inputs,
+    start=None,
+    end=None,
+    rebalance=REBALANCE,
+    top_n=NAMES_PER_SECTOR,
+    capital=INITIAL_CAPITAL,
+    fee_buy=FEE_BUY,
+    fee_sell=FEE_SELL,
+    weights_fn=portfolio_weights,
+    sectors_fn=allowed_sectors
+):
+    """
+    Daily equity of the allocation rules between start and end.
+
+    Returns DataFrame indexed by date:
+    equity, cash, exposure, drawdown, turnover, fees, regime, holdings
+    """
+
+    dates = inputs["dates"]
+
+    rows = np.arange(len(dates))
+    if start is not None:
+        rows = rows[dates[rows] >= pd.Timestamp(start)]
+    if end is not None:
+        rows = rows[dates[rows] <= pd.Timestamp(end)]
+
+    reb = rebalance_days(dates, rebalance)
+
+    shares = np.zeros(len(inputs["tickers"]))
+    cash = float(capital)
+    pending = None
+
+    out = {k: np.zeros(len(rows)) for k in ("equity", "cash", "turnover", "fees", "holdings")}
+
+    for i, t in enumerate(rows):
+
+        mark = inputs["close"][t]
+
+        if pending is not None:
+            before = cash + np.nansum(shares * mark)
+            shares, cash, traded, fees = _execute(
+                shares, cash, pending, inputs["open"][t], mark, fee_buy, fee_sell
+            )
+            out["turnover"][i] = traded / 2 / before if before > 0 else 0
+            out["fees"][i] = fees
+            pending = None
+
+        out["equity"][i] = cash + np.nansum(shares * mark)
+        out["cash"][i] = cash
+        out["holdings"][i] = np.count_nonzero(shares)
+
+        # the last bar has no next open to fill at
+        if reb[t] and i < len(rows) - 1:
+            pending = target_weights(inputs, t, top_n, weights_fn, sectors_fn)
+
+    curve = pd.DataFrame(out, index=dates[rows])
+
+    curve["exposure"] = 1 - curve["cash"] / curve["equity"]
+    curve["drawdown"] = curve["equity"] / curve["equity"].cummax() - 1
+    curve["regime"] = inputs["regime"][rows]
+    curve["holdings"] = curve["holdings"].astype(int)
+
+    return curve
+
+
+def summary(curve):
+
+    equity = curve["equity"]
+    years = max(len(curve) / 250, 1e-9)
+    daily = equity.pct_change().dropna()
+
+    return {
+        "total_return": equity.iloc[-1] / equity.iloc[0] - 1,
+        "cagr": (equity.iloc[-1] / equity.iloc[0]) ** (1 / years) - 1,
+        "max_drawdown": curve["drawdown"].min(),
+        "sharpe": daily.mean() / daily.std() * np.sqrt(250) if daily.std() > 0 else np.nan,
+        "turnover_per_year": curve["turnover"].sum() / years,
+        "fees": curve["fees"].sum(),
+        "avg_exposure": curve["exposure"].mean(),
+    }
+
+
+# =========================
+# MAIN
+# =========================
+def run_portfolio(start=None, end=None, rebalance=REBALANCE, save=True, **kwargs):
+
+    t0 = time.time()
+
+    inputs = load_inputs()
+
+    if inputs is None:
+        print("❌ Price panel empty")
+        return pd.DataFrame()
+
+    t1 = time.time()
+
+    curve = simulate(inputs, start, end, rebalance, **kwargs)
+
+    if curve.empty:
+        print("No bars in range")
+        return curve
+
+    s = summary(curve)
+
+    print(f"\n📈 PORTFOLIO BACKTEST ({rebalance}) {curve.index[0].date()} → {curve.index[-1].date()}")
+    print(f"Return     {s['total_return']*100:8.2f}%   CAGR {s['cagr']*100:6.2f}%")
+    print(f"Max DD     {s['max_drawdown']*100:8.2f}%   Sharpe {s['sharpe']:.2f}")
+    print(f"Turnover   {s['turnover_per_year']:8.2f}x / year")
+    print(f"Fees       {s['fees']:,.0f}")
+    print(f"Exposure   {s['avg_exposure']*100:8.1f}%")
+    print(f"⏱️ inputs {t1 - t0:.1f}s, simulation {time.time() - t1:.2f}s")
+
+    if save:
+        os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+        curve.to_csv(REPORT_FILE)
+        print("💾 Equity curve saved:", REPORT_FILE)
+
+    return curve
+
+
+if __name__ == "__main__":
+    run_portfolio()
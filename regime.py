@@ -1,4 +1,4 @@
-import yfinance as yf
+from utils.market_context import market_context
 
 
 def market_regime():
@@ -7,20 +7,10 @@ def market_regime():
     Always returns scalar result.
     """
 
-    df = yf.download("^JKSE", period="1mo", interval="1d", progress=False)
+    # shared with scanner / entry engine / charts: no extra download
+    ctx = market_context()
 
-    if df.empty or len(df) < 6:
+    if not ctx["ready"] or ctx["bars"] < 6:
         return "NEUTRAL"
 
-    # Ensure scalar float
-    close_today = float(df["Close"].iloc[-1])
-    close_5d = float(df["Close"].iloc[-6])
-
-    ret5 = (close_today / close_5d) - 1
-
-    if ret5 < -0.03:
-        return "RISK-OFF"
-    elif ret5 > 0.02:
-        return "RISK-ON"
-    else:
-        return "NEUTRAL"
+    return ctx["regime5"]
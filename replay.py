@@ -0,0 +1,343 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from signals_panel import SCAN_BARS, evaluate_panel, last_bars, result as signal_result
+from scan_rules import (
+    MIN_AVG_VOLUME, WATCHLIST_TOPN, scan_universe, normalize_ticks, apply_flow,
+    detect_accumulation, percentile_scores
+)
+from flow_engine import foreign_db
+from utils import price_store
+
+
+# =========================================
+# WALK-FORWARD REPLAY
+# =========================================
+#
+# scanner.run "as of" past trading days, cached data only:
+#
+#   price panel (utils.price_store)         → signals, gates, ticks, accumulation
+#   foreign store (flow_engine.foreign_db)  → flow tier (same day, else 0)
+#
+# Fundamentals are not replayed (only today's snapshot exists,
+# using it would leak the future). No downloads, no Telegram.
+#
+# Each day's top-N watchlist is then marked to market with the
+# bars that followed: forward returns and the SL / TP2 outcome.
+
+REPORT_FILE = "reports/replay_watchlist.csv"
+
+REPLAY_DAYS = 250
+HORIZONS = (5, 20)
+FEE = 0.001
+
+_worker = {}
+
+
+# =========================
+# CACHED INPUTS
+# =========================
+def load_foreign_history():
+    """
+    {date: {TICKER: ForeignNet}} for every day in the foreign store.
+    """
+
+    dates, tickers, net = foreign_db.query()
+    tickers = np.asarray(tickers)
+
+    out = {}
+
+    for d, row in zip(pd.DatetimeIndex(dates), net):
+        ok = ~np.isnan(row)
+        out[d] = dict(zip(tickers[ok], row[ok]))
+
+    return out
+
+
+def index_returns(panel, symbol="^JKSE", n=20):
+    """
+    Index n-bar return on every panel date (NaN without data).
+    """
+
+    from utils import panel_store
+
+    index = panel_store.frame(panel, symbol, ["Close"])
+
+    if index is None:
+        return np.full(len(panel["dates"]), np.nan)
+
+    close = index["Close"].dropna()
+    ret = close / close.shift(n) - 1
+
+    return ret.reindex(pd.DatetimeIndex(panel["dates"])).to_numpy(dtype=float)
+
+
+def _day_stats(sub, tickers):
+    """
+    Per-ticker gate / tick / accumulation inputs on the last row of sub,
+    the same numbers scanner.run takes from features() on its frame.
+    """
+
+    tickers, bars = last_bars(sub, tickers, 20)
+
+    with np.errstate(all="ignore"):
+        stats = {
+            "last": bars["Close"][-1],
+            "vol": bars["Volume"][-1],
+            "avgvol": bars["Volume"].mean(axis=0),
+            "high20": bars["High"].max(axis=0),
+            "high10": bars["High"][-10:].max(axis=0),
+            "low10": bars["Low"][-10:].min(axis=0),
+        }
+
+    return {t: {k: float(v[i]) for k, v in stats.items()} for i, t in enumerate(tickers)}
+
+
+# =========================
+# ONE DAY
+# =========================
+def _init_worker(tickers, index_ret, foreign):
+    """
+    Pool initializer. The foreign history and index returns are
+    loaded once by the parent (a cold foreign store is imported
+    there, not by every worker at once); the panel is memory-mapped.
+    """
+
+    panel = price_store.load_panel()
+
+    _worker["panel"] = panel
+    _worker["tickers"] = tickers
+    _worker["cols"] = [panel["col"][t] for t in tickers]
+    _worker["index_ret"] = index_ret
+    _worker["foreign"] = foreign
+
+
+def scan_day(t, top_n=WATCHLIST_TOPN):
+    """
+    Watchlist of panel row t: list of (sym, res), best first.
+    """
+
+    panel = _worker["panel"]
+    tickers = _worker["tickers"]
+    cols = _worker["cols"]
+
+    # the panel as it looked after the close of row t
+    sub = {f: panel[f][:t + 1] for f in price_store.FIELDS}
+    sub.update({"dates": panel["dates"][:t + 1], "tickers": panel["tickers"], "col": panel["col"]})
+
+    live = [s for s, j in zip(tickers, cols) if not np.isnan(panel["Close"][t, j])]
+
+    idx_ret = _worker["index_ret"][t]
+    ihsg = None if np.isnan(idx_ret) else float(idx_ret)
+
+    table = evaluate_panel(sub, tickers=live, ihsg=ihsg, lookback=SCAN_BARS)
+
+    day = pd.Timestamp(panel["dates"][t])
+    foreign_map = _worker["foreign"].get(day, {})
+
+    stats = _day_stats(sub, list(table.index[table["valid"]]))
+
+    results = []
+
+    for sym, s in stats.items():
+
+        res = signal_result(table, sym)
+
+        if not res:
+            continue
+
+        # rolling(20) needs 20 bars: NaN fails the gate like in the scanner
+        if np.isnan(s["avgvol"]) or s["avgvol"] < MIN_AVG_VOLUME:
+            continue
+
+        res["raw_score"] = float(res["score"])
+
+        normalize_ticks(res, s["high20"])
+
+        net = foreign_map.get(sym.split(".")[0].upper(), 0)
+        apply_flow(res, net)
+
+        try:
+            detect_accumulation(res, net, s)
+        except:
+            res["accumulation"] = False
+
+        res["close"] = s["last"]
+
+        results.append((sym, res))
+
+    if not results:
+        return []
+
+    return percentile_scores(results)[:top_n]
+
+
+# =========================
+# FORWARD P&L
+# =========================
+def mark_to_market(panel, sym, t, res, horizons=HORIZONS, fee=FEE):
+    """
+    Entry at the close of row t. Forward close returns per horizon,
+    then SL / TP2 over the longest horizon (TP first on a shared bar,
+    like utils.backtest_engine), else exit at the last close.
+    """
+
+    j = panel["col"][sym]
+
+    rows = np.flatnonzero(~np.isnan(panel["Close"][t + 1:, j]))[:max(horizons)] + t + 1
+
+    entry = res["close"]
+    close = np.asarray(panel["Close"][rows, j])
+    high = np.asarray(panel["High"][rows, j])
+    low = np.asarray(panel["Low"][rows, j])
+
+    out = {}
+
+    for h in horizons:
+        out[f"fwd{h}"] = close[h - 1] / entry - 1 if len(close) >= h else np.nan
+
+    tp = res["tp2"]
+    sl = res["stoploss"]
+
+    hit = (high >= tp) | (low <= sl)
+
+    if hit.any():
+        k = int(hit.argmax())
+        outcome = "TP" if high[k] >= tp else "SL"
+        exit_price = tp if outcome == "TP" else sl
+        exit_bars = k + 1
+    elif len(close):
+        outcome = "OPEN"
+        exit_price = close[-1]
+        exit_bars = len(close)
+    else:
+        return {**out, "outcome": "NO DATA", "exit_bars": 0, "pnl": np.nan}
+
+    return {
+        **out,
+        "outcome": outcome,
+        "exit_bars": exit_bars,
+        "pnl": exit_price / entry - 1 - fee * 2,
+    }
+
+
+def _replay_task(task):
+
+    t, top_n, horizons, fee = task
+    panel = _worker["panel"]
+
+    rows = []
+
+    for rank, (sym, res) in enumerate(scan_day(t, top_n), 1):
+
+        rows.append({
+            "date": pd.Timestamp(panel["dates"][t]),
+            "rank": rank,
+            "ticker": sym,
+            "score": res["score"],
+            "raw_score": res["raw_score"],
+            "close": res["close"],
+            "entry_low": res["entry_low"],
+            "entry_high": res["entry_high"],
+            "stoploss": res["stoploss"],
+            "tp1": res["tp1"],
+            "tp2": res["tp2"],
+            "tp3": res["tp3"],
+            "flow_tier": res["flow_tier"],
+            "foreign_net": res["foreign_net"],
+            "accumulation": res["accumulation"],
+            **mark_to_market(panel, sym, t, res, horizons, fee),
+        })
+
+    return rows
+
+
+# =========================
+# MAIN
+# =========================
+def run_replay(
+    start=None,
+    end=None,
+    days=REPLAY_DAYS,
+    top_n=WATCHLIST_TOPN,
+    horizons=HORIZONS,
+    fee=FEE,
+    workers=None,
+    save=True
+):
+    """
+    Replay the scanner on every panel date in [start, end]
+    (default: the last `days` dates). Dates run in parallel.
+
+    Returns one row per (date, pick) with the watchlist fields,
+    fwd{h} returns, SL/TP2 outcome and pnl.
+    """
+
+    t0 = time.time()
+
+    panel = price_store.load_panel()
+
+    if panel is None:
+        print("❌ Price panel empty")
+        return pd.DataFrame()
+
+    dates = pd.DatetimeIndex(panel["dates"])
+    rows = np.arange(SCAN_BARS, len(dates))
+
+    if start is not None:
+        rows = rows[dates[rows] >= pd.Timestamp(start)]
+    if end is not None:
+        rows = rows[dates[rows] <= pd.Timestamp(end)]
+    if start is None and end is None:
+        rows = rows[-days:]
+
+    # same population as scanner.run (ranked against the same names)
+    universe = scan_universe()
+    tickers = [t for t in universe if t in panel["col"]]
+
+    if len(tickers) < len(universe):
+        print(f"⚠️ {len(universe) - len(tickers)} universe tickers not in the price panel")
+
+    print(f"⏪ Replay {len(rows)} days x {len(tickers)} tickers")
+
+    tasks = [(int(t), top_n, horizons, fee) for t in rows]
+
+    # single writer: import / read the foreign store before forking
+    foreign_db.load()
+    foreign = load_foreign_history()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(tickers, index_returns(panel), foreign)
+    ) as pool:
+        picks = [r for day in pool.map(_replay_task, tasks, chunksize=4) for r in day]
+
+    out = pd.DataFrame(picks)
+
+    if out.empty:
+        print("No picks")
+        return out
+
+    if save:
+        os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+        out.to_csv(REPORT_FILE, index=False)
+        print("💾 Replay saved:", REPORT_FILE)
+
+    print("\n📊 REPLAY SUMMARY")
+    for h in horizons:
+        r = out[f"fwd{h}"].dropna()
+        if len(r):
+            print(f"fwd{h:<3} avg {r.mean()*100:6.2f}%  win {(r > 0).mean()*100:5.1f}%  n={len(r)}")
+    print("outcome", out["outcome"].value_counts().to_dict())
+    print(f"pnl avg {out['pnl'].mean()*100:.2f}%")
+    print(f"⏱️ {time.time() - t0:.1f}s")
+
+    return out
+
+
+if __name__ == "__main__":
+    run_replay()
@@ -0,0 +1,178 @@
+from flow_engine.foreign_stock import classify
+from utils.beifraksi import tick_size, floor_tick, ceil_tick
+
+
+# =========================================
+# SCANNER POST-PROCESSING RULES
+# =========================================
+#
+# Pure functions on one evaluate() result, shared by the live
+# scanner (scanner.run) and the historical replay (replay.py).
+# No I/O, no "now" (except reading the universe list).
+
+UNIVERSE_FILE = "data/universe_institutional.csv"
+BATCH_LIMIT = 200            # names scanned per run
+
+MIN_AVG_VOLUME = 500_000     # 20-day average volume gate
+WATCHLIST_TOPN = 15          # names published per scan
+
+
+def scan_universe(path=UNIVERSE_FILE, limit=BATCH_LIMIT):
+    """
+    Tickers scanned by scanner.run: the first `limit` names
+    of the institutional universe.
+    """
+
+    import pandas as pd
+
+    return pd.read_csv(path, header=None)[0].tolist()[:limit]
+
+
+def accum_tier(net):
+    """
+    Klasifikasi kekuatan akumulasi foreign.
+    """
+    if net >= 200_000_000_000:
+        return "ULTRA ACCUM"
+    elif net >= 50_000_000_000:
+        return "STRONG ACCUM"
+    elif net >= 5_000_000_000:
+        return "ACCUM"
+    elif net <= -100_000_000_000:
+        return "HEAVY DISTRIB"
+    elif net <= -20_000_000_000:
+        return "DISTRIB"
+    return "NEUTRAL"
+
+
+# =========================
+# NORMALIZE BEI TICK SIZE
+# =========================
+def normalize_ticks(res, recent_high):
+    """
+    Snap entry / SL / TP to BEI ticks and keep them ordered.
+    recent_high: 20-day high.
+    """
+
+    res["entry_low"]  = floor_tick(res["entry_low"])
+    res["entry_high"] = ceil_tick(res["entry_high"])
+
+    res["stoploss"] = floor_tick(res["stoploss"])
+
+    res["tp1"] = ceil_tick(res["tp1"])
+    res["tp2"] = ceil_tick(res["tp2"])
+    res["tp3"] = ceil_tick(res["tp3"])
+
+    tick = tick_size(res["entry_low"])
+
+    # minimal entry range = 5 tick
+    min_range = tick * 4
+
+    if res["entry_high"] - res["entry_low"] < min_range:
+        res["entry_high"] = ceil_tick(res["entry_low"] + min_range)
+    if res["entry_high"] > recent_high * 0.99:
+        res["entry_high"] = floor_tick(recent_high * 0.99)
+    if res["tp2"] <= res["entry_high"]:
+        res["tp2"] = ceil_tick(res["entry_high"] * 1.05)
+    if res["tp1"] <= res["entry_high"]:
+        res["tp1"] =  ceil_tick(res["entry_high"] * 1.03)
+    if res["tp3"] <= res["tp2"]:
+        res["tp3"] = ceil_tick(res["tp2"] * 1.08)
+    if res["entry_high"] <= res["entry_low"]:
+        res["entry_high"] = ceil_tick(res["entry_low"] + tick * 2)
+
+    return res
+
+
+# =========================
+# FOREIGN FLOW
+# =========================
+def apply_flow(res, net):
+    """
+    Foreign net → status, tier and raw_score bump.
+    """
+
+    res["foreign_net"] = net
+    res["foreign_status"] = classify(net)
+    res["accum_tier"] = accum_tier(net)
+
+    if net >= 200_000_000_000:
+        res["raw_score"] += 12
+        res["flow_tier"] = "ULTRA"
+    elif net >= 50_000_000_000:
+        res["raw_score"] += 8
+        res["flow_tier"] = "STRONG"
+    elif net >= 5_000_000_000:
+        res["raw_score"] += 3
+        res["flow_tier"] = "ACCUM"
+    elif net <= -150_000_000_000:
+        res["raw_score"] -= 12
+        res["flow_tier"] = "HEAVY SELL"
+    elif net <= -30_000_000_000:
+        res["raw_score"] -= 6
+        res["flow_tier"] = "SELL"
+    else:
+        res["flow_tier"] = "NEUTRAL"
+
+    return res
+
+
+# =========================
+# ACCUMULATION DETECTOR
+# =========================
+def accumulation_stats(feat):
+    """
+    Last-bar inputs of detect_accumulation from a features.Features.
+    """
+
+    df = feat.df
+
+    return {
+        "last": df["Close"].iloc[-1],
+        "vol": df["Volume"].iloc[-1],
+        "avgvol": feat.rolling_mean("Volume", 20).iloc[-1],
+        "high20": feat.rolling_max("High", 20).iloc[-1],
+        "high10": feat.rolling_max("High", 10).iloc[-1],
+        "low10": feat.rolling_min("Low", 10).iloc[-1],
+    }
+
+
+def detect_accumulation(res, net, s):
+    """
+    Foreign buying into a tight range below the 20-day high.
+    """
+
+    sideways_range = (s["high10"] - s["low10"]) / s["last"]
+
+    if (
+        net > 0 and
+        s["last"] < s["high20"] * 0.98 and
+        s["vol"] > s["avgvol"] * 1.2 and
+        sideways_range < 0.08
+    ):
+        res["accumulation"] = True
+        res["raw_score"] += 5
+    else:
+        res["accumulation"] = False
+
+    return res
+
+
+# =========================
+# PERCENTILE SCORE
+# =========================
+def percentile_scores(results):
+    """
+    raw_score → cross-sectional percentile (0-100), sorted best first.
+    results: list of (sym, res).
+    """
+
+    raw_scores = [r["raw_score"] for _, r in results]
+
+    for sym, r in results:
+        pct = sum(s <= r["raw_score"] for s in raw_scores) / len(raw_scores)
+        r["score"] = int(pct * 100)
+
+    results.sort(key=lambda x: x[1]["score"], reverse=True)
+
+    return results
@@ -1,5 +1,5 @@
 import os
-import time
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
@@ -7,60 +7,38 @@ from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 
-from signals import evaluate
-from backtest import hedge_expectancy
-from flow_engine.foreign_stock import stock_foreign_map, classify
-from flow_engine.fundamental_engine import get_fundamental
-from utils.yahoo_pro import download_price
-from utils.rate_guard import guard
+from features import features
+from signals_panel import evaluate_frames, result as signal_result
+from backtest import EXPECTANCY_MIN_BARS, hedge_expectancy_panel
+from flow_engine import foreign_db, sector_index, fundamental_store
+from flow_engine.foreign_stock import stock_foreign_map
+from flow_engine.fundamental_engine import fundamental_table
+from modes import MODES
+from utils.yahoo_pro import download_prices
 from utils.safe_loop import memory_guard
+from utils import frame_cache
+from utils import price_store
+from utils.market_context import market_context
 from telegram_engine import send, send_photo, send_file
 from utils.chart_generator import generate_chart
-from utils.beifraksi import tick_size, floor_tick, ceil_tick
-from twitter_engine import tweet
+from scan_rules import (
+    MIN_AVG_VOLUME, WATCHLIST_TOPN, scan_universe, normalize_ticks, apply_flow,
+    accumulation_stats, detect_accumulation, percentile_scores
+)
 from twitter_signal import build_tweet
 from utils.twitter_guard import allow
 
 TWITTER_ENABLED = False
 
-WATCHLIST_TOPN = 15
-BATCH_LIMIT = 200
-
-price_cache = {}
-
-def get_market_context(ihsg_df):
-
-    if ihsg_df is None or ihsg_df.empty:
-        return "UNKNOWN", "UNKNOWN"
-
-    df = ihsg_df.copy()
-
-    df["MA20"] = df["Close"].rolling(20).mean()
-    df["MA50"] = df["Close"].rolling(50).mean()
-
-    last = df.iloc[-1]
-
-    trend = "SIDEWAYS"
-
-    if last["Close"] > last["MA20"] > last["MA50"]:
-        trend = "UPTREND"
-
-    elif last["Close"] < last["MA20"] < last["MA50"]:
-        trend = "DOWNTREND"
-
-    # Market regime
-    regime = "NEUTRAL"
-
-    if trend == "UPTREND":
-        regime = "RISK-ON"
-
-    elif trend == "DOWNTREND":
-        regime = "RISK-OFF"
-
-    return regime, trend
+# fundamental_table columns copied into each result
+FUND_COLUMNS = ["roe", "growth", "margin", "pe", "der", "pbv", "eps", "per", "div_yield"] + list(MODES)
 
 def build_telegram_message(results, market_regime, ihsg_trend):
 
+    # same sector flow as the Excel "Top Foreign Sectors"
+    flow = sector_flow_today(results)
+    top_sector = f"{flow.index[0]} ({flow.iloc[0]/1e9:+.1f}B)" if not flow.empty else "-"
+
     msg = f"""
 📊 IHSG SMART MONEY
 🕒 {datetime.now().strftime("%d %b %H:%M")}
@@ -68,6 +46,7 @@ def build_telegram_message(results, market_regime, ihsg_trend):
 🌏 Market Regime
 IHSG Trend : {ihsg_trend}
 Risk Mode  : {market_regime}
+Top Sector : {top_sector}
 
 ━━━━━━━━━━━━━━━━
 """
@@ -85,9 +64,6 @@ Risk Mode  : {market_regime}
         tp = int(r["tp2"])
         sl = int(r["stoploss"])
 
-        win20 = r.get("win20d",0)*100
-        exp20 = r.get("exp20",0)*100
-
         foreign = r.get("foreign_net",0)
 
         if abs(foreign) >= 1e9:
@@ -112,49 +88,111 @@ Score : {r['score']}
 🌍 Foreign Flow
 {ftxt} | {r.get("foreign_status","")}
 
-BACKTEST (1 Month) :
-📈 WinRate: {win20:.0f}%
-⚡ Expectancy: {exp20:.2f}%
+BACKTEST (1W / 1M / 3M) :
+📈 WinRate: {horizon_stats(r, "win{}d", 0)}
+⚡ Expectancy: {horizon_stats(r, "exp{}", 2)}
 💰 ProfitFactor: {pf:.2f} {badge}
 ━━━━━━━━━━━━━━━━
 """
 
     return msg
 
-def safe_download(sym):
+# ==========================
+# EXPECTANCY (UNIVERSE)
+# ==========================
+EXPECTANCY_BARS = 250
+REPORT_HORIZONS = (5, 20, 60)    # 1W / 1M / 3M
 
-    if sym in price_cache:
-        return price_cache[sym]
+# the scan only fetches 3mo: tickers whose panel history is too short
+# for the 3M horizon get this much history once, the daily deltas
+# keep it growing afterwards
+EXPECTANCY_PERIOD = "1y"
+EXPECTANCY_HISTORY = max(REPORT_HORIZONS) + EXPECTANCY_MIN_BARS
 
-    for _ in range(3):
-        try:
-            df = download_price(sym)
+def seed_history(tickers):
+    """
+    Download EXPECTANCY_PERIOD of bars for the tickers with fewer
+    than EXPECTANCY_HISTORY bars in the price panel.
+    """
+
+    panel = price_store.load_panel()
 
-            if df is not None and not df.empty:
+    if panel is None:
+        short = list(tickers)
+    else:
+        known = [t for t in tickers if t in panel["col"]]
+        cols = [panel["col"][t] for t in known]
 
-                if len(price_cache) > 250:
-                    price_cache.clear()
+        bars = np.isfinite(np.asarray(panel["Close"])[:, cols]).sum(axis=0)
 
-                price_cache[sym] = df
-                return df
-        except:
-            pass
+        short = [t for t in tickers if t not in panel["col"]]
+        short += [t for t, n in zip(known, bars) if n < EXPECTANCY_HISTORY]
+
+    if short:
+        print(f"📥 Seeding {EXPECTANCY_PERIOD} history for expectancy: {len(short)} tickers")
+        download_prices(short, period=EXPECTANCY_PERIOD)
 
-        time.sleep(1)
+def expectancy_table(tickers):
+    """
+    backtest.hedge_expectancy_panel over the cached price panel
+    (last EXPECTANCY_BARS bars), one row per ticker.
+
+    One vectorized call: cheaper than any per-ticker cache lookup.
+    """
+
+    panel = price_store.load_panel()
+
+    if panel is None:
+        return pd.DataFrame()
+
+    tickers = [t for t in tickers if t in panel["col"]]
+    cols = [panel["col"][t] for t in tickers]
+
+    close = pd.DataFrame(
+        np.asarray(panel["Close"][-EXPECTANCY_BARS:])[:, cols],
+        columns=tickers
+    )
+
+    return hedge_expectancy_panel(close)
+
+def pct(r, key, digits):
+    v = r.get(key)
+    return "-" if v is None else f"{v*100:.{digits}f}%"
+
+def horizon_stats(r, key, digits):
+    """
+    "1W / 1M / 3M" text of one expectancy stat, e.g. key "win{}d".
+    """
 
-    return None
+    return " / ".join(pct(r, key.format(h), digits) for h in REPORT_HORIZONS)
 
 # ==========================
-# SECTOR MAP
+# SECTOR
 # ==========================
-def load_sector_map():
-    path = "data/sector_map.csv"
-    if not os.path.exists(path):
-        return {}
-    df = pd.read_csv(path)
-    return dict(zip(df["Ticker"], df["Sector"]))
+def sector_table(results):
+    """
+    Per-sector count / foreign flow / breadth / avg score of the
+    scan results (flow_engine.sector_index bincounts).
+    """
 
-SECTOR_MAP = load_sector_map()
+    return sector_index.sector_stats(
+        [sym for sym, _ in results],
+        flow=[r.get("foreign_net", 0) for _, r in results],
+        score=[r["score"] for _, r in results],
+    )
+
+def sector_flow_today(results):
+    """
+    Net foreign per sector, largest first: whole market from the
+    foreign store aggregates, the scan results if the store is empty.
+    """
+
+    flow = foreign_db.sector_totals()
+
+    if flow.empty and results:
+        flow = sector_table(results)["flow"].sort_values(ascending=False)
+
+    return flow
 
 # ==========================
 # STAR
@@ -321,13 +359,7 @@ def export_terminal_excel(results, total_foreign_today, top_foreign, market_regi
         ws["B9"].fill = red
     
     # ===== TOP SECTOR FLOW =====
-    sector_flow = {}
-    for sym,r in results:
-        sec = r.get("sector","Unknown")
-        sector_flow.setdefault(sec,0)
-        sector_flow[sec]+=r.get("foreign_net",0)
-
-    top_sector_flow = sorted(sector_flow.items(), key=lambda x:x[1], reverse=True)[:5]
+    top_sector_flow = list(sector_flow_today(results).head(5).items())
 
     ws["A10"] = "Top Foreign Sectors"
     ws["A10"].font = label_font
@@ -341,30 +373,8 @@ def export_terminal_excel(results, total_foreign_today, top_foreign, market_regi
     ws["A16"] = "Top Sector Winners"
     ws["A16"].font = label_font
 
-    sector_strength = {}
-
-    for sym, r in results:
-        sec = r.get("sector", "Unknown")
-
-        if sec not in sector_strength:
-            sector_strength[sec] = {
-                "scores": [],
-                "foreign": 0
-            }
-
-        sector_strength[sec]["scores"].append(r["score"])
-        sector_strength[sec]["foreign"] += r.get("foreign_net", 0)
-
-    # hitung avg score + total foreign
-    sector_rank = []
-
-    for sec, data in sector_strength.items():
-        avg_score = sum(data["scores"]) / len(data["scores"])
-        foreign = data["foreign"]
-
-        sector_rank.append((sec, avg_score, foreign))
-
-    sector_rank.sort(key=lambda x: x[1], reverse=True)
+    # avg score + total foreign per sector (flow_engine.sector_index)
+    sector_rank = list(sector_table(results).sort_values("score", ascending=False)[["score", "flow"]].itertuples())
 
     row = 17
 
@@ -416,6 +426,15 @@ def export_terminal_excel(results, total_foreign_today, top_foreign, market_regi
     ws["E14"].fill = fill
     ws["E14"].font = big_font
 
+    # ===== FOREIGN BREADTH =====
+    br = foreign_db.breadth()
+
+    ws["D16"] = "Foreign Breadth (Buy / Sell)"
+    ws["D16"].font = label_font
+    ws["E16"] = f"{br['accum']} / {br['distrib']}"
+    ws["E16"].font = big_font
+    ws["E16"].fill = green if br["accum"] >= br["distrib"] else red
+
     # ===== WIDTH =====
     ws.column_dimensions["A"].width=26
     ws.column_dimensions["B"].width=18
@@ -432,7 +451,8 @@ def export_terminal_excel(results, total_foreign_today, top_foreign, market_regi
     ws = wb.create_sheet("WATCHLIST")
     ws.append([
         "Rank","Ticker","Score","Entry","SL","TP1","TP2","TP3",
-        "Win20D","Exp20D","PF20","Foreign","Status"
+        "Win20D","Exp20D","PF20","Win5D","Exp5D","Win60D","Exp60D",
+        "Foreign","Status"
     ])
 
     for i,(sym,r) in enumerate(results[:20],1):
@@ -453,6 +473,10 @@ def export_terminal_excel(results, total_foreign_today, top_foreign, market_regi
             f"{win20:.0f}%",
             f"{exp20:.2f}%",
             round(r.get("pf20",1),2),
+            pct(r, "win5d", 0),
+            pct(r, "exp5", 2),
+            pct(r, "win60d", 0),
+            pct(r, "exp60", 2),
             net,
             r.get("foreign_status","")
         ])
@@ -560,11 +584,11 @@ def export_terminal_excel(results, total_foreign_today, top_foreign, market_regi
     ws.append([
         "Rank","Ticker","FundScore","Quality",
         "ROE","RevenueGrowth","Margin","PE",
-        "PBV", "DER", "EPS"
+        "PBV", "DER", "EPS", "Screens"
     ])
 
     header_font = Font(bold=True)
-    for c in range(1,12):
+    for c in range(1,13):
         ws.cell(row=1,column=c).font = header_font
 
     # ranking berdasarkan fund_score
@@ -601,7 +625,8 @@ def export_terminal_excel(results, total_foreign_today, top_foreign, market_regi
             pe,
             r.get("pbv"),
             r.get("der"),
-            r.get("eps")
+            r.get("eps"),
+            ", ".join(m for m in MODES if r.get(m))
         ])
 
         row = ws.max_row
@@ -660,6 +685,13 @@ def export_terminal_excel(results, total_foreign_today, top_foreign, market_regi
     print("💼 EXCEL EXPORTED:", file)
 
 def load_foreign_today():
+    """
+    Market net foreign of the latest stored day (foreign_db aggregates),
+    foreign_today.csv if the store is empty.
+    """
+    if foreign_db.load() is not None:
+        return foreign_db.market_total()
+
     path = "data/foreign_cache/foreign_today.csv"
     if not os.path.exists(path):
         return 0
@@ -667,22 +699,6 @@ def load_foreign_today():
     df = pd.read_csv(path)
     return df["ForeignNet"].sum()
 
-def accum_tier(net):
-    """
-    Klasifikasi kekuatan akumulasi foreign.
-    """
-    if net >= 200_000_000_000:
-        return "ULTRA ACCUM"
-    elif net >= 50_000_000_000:
-        return "STRONG ACCUM"
-    elif net >= 5_000_000_000:
-        return "ACCUM"
-    elif net <= -100_000_000_000:
-        return "HEAVY DISTRIB"
-    elif net <= -20_000_000_000:
-        return "DISTRIB"
-    return "NEUTRAL"
-
 def save_watchlist(results):
 
     os.makedirs("runtime", exist_ok=True)
@@ -716,52 +732,57 @@ def run():
     print("\n🏛️ IHSG INSTITUTIONAL SCANNER")
     print("Time:", datetime.now())
 
-    tickers = pd.read_csv("data/universe_institutional.csv", header=None)[0].tolist()
-    tickers = tickers[:BATCH_LIMIT]
+    tickers = scan_universe()
 
-    market_regime = "UNKNOWN"
-    ihsg_trend = "UNKNOWN"
+    # index loaded once, indicators shared read-only with every symbol
+    ctx = market_context()
 
-    try:
-        ihsg_df = safe_download("^JKSE")
-        
-        if ihsg_df is None or ihsg_df.empty: 
-            print("IHSG Failed, Fallback Empty")
-            ihsg_df = pd.DataFrame()
-        else:
-            market_regime, ihsg_trend = get_market_context(ihsg_df)
+    if not ctx["ready"]:
+        print("IHSG Failed, Fallback Empty")
 
-    except Exception as e:
-        print("IHSG Downloader error", e)
-        ihsg_df = pd.DataFrame()
+    market_regime = ctx["regime"]
+    ihsg_trend = ctx["trend"]
+
+    # =========================
+    # BATCH DOWNLOAD UNIVERSE
+    # =========================
+    print(f"📥 Batch download {len(tickers)} tickers")
+    prices = download_prices(tickers)
+
+    # whole universe scored / backtested in one vectorized pass
+    signal_table = evaluate_frames(prices, ctx)
+
+    seed_history(list(prices))
+    expectancy = expectancy_table(list(prices))
 
     results = []
     foreign_map = stock_foreign_map()
 
     print("🌍 Foreign loaded:", len(foreign_map))
 
+    # fundamentals + modes.py screens of the whole universe, joined by ticker
+    fund_rows = fundamental_table(tickers).to_dict("index")
+
     for i, sym in enumerate(tickers):
 
         if i % 50 == 0:
             print(f"Scanning {i}/{len(tickers)} {sym}")
 
         # =========================
-        # DOWNLOAD
+        # BATCH FRAME
         # =========================
-        try:
-            guard()
-            df = safe_download(sym)
-            memory_guard(i)
-        except Exception as e:
-            print(f"Download error {sym}:", e)
-            continue
+        # failed in the batch: skipped, not re-downloaded one by one
+        df = prices.get(sym)
+        memory_guard(i)
 
         if df is None or df.empty or len(df) < 30:
             print(f"Skip {sym} (no data)")
             continue
-        avg_vol = df["Volume"].rolling(20).mean().iloc[-1]
 
-        if pd.isna(avg_vol) or avg_vol < 500000:
+        feat = features(df)
+        avg_vol = feat.rolling_mean("Volume", 20).iloc[-1]
+
+        if pd.isna(avg_vol) or avg_vol < MIN_AVG_VOLUME:
             print(f"Skip {sym} (low liquidity)")
             continue
 
@@ -769,50 +790,18 @@ def run():
         # =========================
         # EVALUATE
         # =========================
-        try:
-            res = evaluate(df, ihsg_df)
-        except Exception as e:
-            print(f"Eval error {sym}:", e)
-            continue
+        res = signal_result(signal_table, sym)
 
         if not res:
             continue
 
         res["raw_score"] = float(res["score"])
-        res["sector"] = SECTOR_MAP.get(sym, "Unknown")
+        res["sector"] = sector_index.sector_of(sym)
 
         # =========================
         # NORMALIZE BEI TICK SIZE
         # =========================
-
-        res["entry_low"]  = floor_tick(res["entry_low"])
-        res["entry_high"] = ceil_tick(res["entry_high"])
-
-        res["stoploss"] = floor_tick(res["stoploss"])
-
-        res["tp1"] = ceil_tick(res["tp1"])
-        res["tp2"] = ceil_tick(res["tp2"])
-        res["tp3"] = ceil_tick(res["tp3"])
-
-        tick = tick_size(res["entry_low"])
-
-        # minimal entry range = 5 tick
-        min_range = tick * 4
-
-        recent_high = df["High"].rolling(20).max().iloc[-1]
-
-        if res["entry_high"] - res["entry_low"] < min_range:
-            res["entry_high"] = ceil_tick(res["entry_low"] + min_range)
-        if res["entry_high"] > recent_high * 0.99:
-            res["entry_high"] = floor_tick(recent_high * 0.99)
-        if res["tp2"] <= res["entry_high"]:
-            res["tp2"] = ceil_tick(res["entry_high"] * 1.05)
-        if res["tp1"] <= res["entry_high"]:
-            res["tp1"] =  ceil_tick(res["entry_high"] * 1.03)
-        if res["tp3"] <= res["tp2"]:
-            res["tp3"] = ceil_tick(res["tp2"] * 1.08)
-        if res["entry_high"] <= res["entry_low"]:
-            res["entry_high"] = ceil_tick(res["entry_low"] + tick * 2)
+        normalize_ticks(res, feat.rolling_max("High", 20).iloc[-1])
 
         # =========================
         # FOREIGN DATA
@@ -820,83 +809,39 @@ def run():
         base = sym.split(".")[0].upper()
         net = foreign_map.get(base, 0)
 
-        res["foreign_net"] = net
-        res["foreign_status"] = classify(net)
-        res["accum_tier"] = accum_tier(net)
-
-        # ===== FLOW SCORE =====
-        if net >= 200_000_000_000:
-            res["raw_score"] += 12
-            res["flow_tier"] = "ULTRA"
-        elif net >= 50_000_000_000:
-            res["raw_score"] += 8
-            res["flow_tier"] = "STRONG"
-        elif net >= 5_000_000_000:
-            res["raw_score"] += 3
-            res["flow_tier"] = "ACCUM"
-        elif net <= -150_000_000_000:
-            res["raw_score"] -= 12
-            res["flow_tier"] = "HEAVY SELL"
-        elif net <= -30_000_000_000:
-            res["raw_score"] -= 6
-            res["flow_tier"] = "SELL"
-        else:
-            res["flow_tier"] = "NEUTRAL"
+        apply_flow(res, net)
 
         # =========================
         # ACCUMULATION DETECTOR
         # =========================
         try:
-            high20 = df["High"].rolling(20).max().iloc[-1]
-            low10 = df["Low"].rolling(10).min().iloc[-1]
-            high10 = df["High"].rolling(10).max().iloc[-1]
-
-            last = df["Close"].iloc[-1]
-            vol = df["Volume"].iloc[-1]
-            avgvol = df["Volume"].rolling(20).mean().iloc[-1]
-
-            sideways_range = (high10 - low10) / last
-
-            if (
-                net > 0 and
-                last < high20 * 0.98 and
-                vol > avgvol * 1.2 and
-                sideways_range < 0.08
-            ):
-                res["accumulation"] = True
-                res["raw_score"] += 5
-            else:
-                res["accumulation"] = False
-
+            detect_accumulation(res, net, accumulation_stats(feat))
         except:
             res["accumulation"] = False
 
         # =========================
         # EXPECTANCY
         # =========================
-        try:
-            exp20 = hedge_expectancy(df, horizon=20)
-            if exp20:
-                res["win20d"], _, _, res["exp20"], res["pf20"], res["roi20"] = exp20
-        except:
-            pass
+        if sym in expectancy.index:
+
+            stats = expectancy.loc[sym]
+
+            for h in REPORT_HORIZONS:
+                if stats[f"n{h}"] > 0:
+                    for key in (f"win{h}d", f"exp{h}", f"pf{h}", f"roi{h}"):
+                        res[key] = float(stats[key])
 
         # =========================
         # FUNDAMENTAL
         # =========================
-        fund = get_fundamental(sym)
+        fund = fund_rows.get(sym)
         if fund:
-            res["fund_score"] = fund.get("fund_score", 0)
-            res["fund_quality"] = fund.get("quality", "NEUTRAL")
-            res["raw_score"] += fund.get("fund_score", 0) * 0.6
-
-            res["roe"] = fund.get("roe")
-            res["growth"] = fund.get("growth")
-            res["margin"] = fund.get("margin")
-            res["pe"] = fund.get("pe")
-            res["der"] = fund.get("der")
-            res["pbv"] = fund.get("pbv")
-            res["eps"] = fund.get("eps")
+            res["fund_score"] = fund["fund_score"]
+            res["fund_quality"] = fund["quality"]
+            res["raw_score"] += fund["fund_score"] * 0.6
+
+            for key in FUND_COLUMNS:
+                res[key] = fund[key]
 
         results.append((sym, res))
         
@@ -906,13 +851,7 @@ def run():
 
     top_foreign = get_top_foreign(results)
 
-    raw_scores = [r["raw_score"] for _, r in results]
-
-    for sym, r in results:
-        pct = sum(s <= r["raw_score"] for s in raw_scores) / len(raw_scores)
-        r["score"] = int(pct * 100)
-
-    results.sort(key=lambda x: x[1]["score"], reverse=True)
+    percentile_scores(results)
 
     save_watchlist(results)
     
@@ -974,7 +913,7 @@ def run():
             pf = r.get("pf20",1)
             badge = pf_badge(pf)
 
-            df_chart = safe_download(sym)
+            df_chart = prices.get(sym)
 
             if df_chart is None:
                 print("Chart skipped (no data)", sym)
@@ -993,9 +932,9 @@ Entry: {int(r['entry_low'])}-{int(r['entry_high'])}
 SL: {int(r['stoploss'])}
 TP: {int(r['tp2'])}
 
-BACKTEST (1 Month) :
-📈 Winrate: {r.get('win20d',0)*100:.0f}%
-⚡ Expectancy: {r.get('exp20',0)*100:.2f}%
+BACKTEST (1W / 1M / 3M) :
+📈 Winrate: {horizon_stats(r, "win{}d", 0)}
+⚡ Expectancy: {horizon_stats(r, "exp{}", 2)}
 💰 ProfitFactor: {pf:.2f} {badge}
 """
             print("Sending chart:", chart)
@@ -1022,6 +961,9 @@ BACKTEST (1 Month) :
 
         try:
 
+            # tweepy client is built at import → load only when enabled
+            from twitter_engine import tweet
+
             if results:
 
                 sym, r = results[0]   # hanya 1 signal terbaik
@@ -1043,6 +985,8 @@ BACKTEST (1 Month) :
         except Exception as e:
             print("Twitter error:", e)
 
+    print("🗄️ Frame cache:", frame_cache.summary())
+    print("📚 Fundamentals:", fundamental_store.summary())
     print("✅ Scan done")
 
     watchlist = []
@@ -1,6 +1,8 @@
 import pandas as pd
+from collections.abc import Mapping
 from config import MIN_AVG_VALUE, DISCOUNT_LEVEL, SCORE_VERSION
 from broker_style import accumulation_strength
+from features import features
 
 
 
@@ -53,16 +55,28 @@ def conviction_tier(score):
     return "TIER-5 NO EDGE"
 
 
+def index_return(ihsg, n=20):
+    """
+    Index n-day return. Accepts the shared market context
+    (utils.market_context, precomputed) or a raw index frame.
+    """
+    if isinstance(ihsg, Mapping):
+        if not ihsg.get("ready"):
+            raise ValueError("market context not ready")
+        return float(ihsg[f"ret{n}"])
+
+    return float(
+        ihsg["Close"].iloc[-1].item() /
+        ihsg["Close"].iloc[-n-1].item()
+        - 1
+    )
+
+
 # ==========================
 # ATR ENGINE (STOPLOSS)
 # ==========================
 def atr(df, period=14):
-    tr1 = (df["High"] - df["Low"]).abs()
-    tr2 = (df["High"] - df["Close"].shift()).abs()
-    tr3 = (df["Low"] - df["Close"].shift()).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-    val = tr.rolling(period).mean().iloc[-1]
+    val = features(df).atr(period).iloc[-1]
     return to_float(val)
 
 
@@ -80,11 +94,10 @@ def entry_and_stop(df):
 # ==========================
 def compute_take_profit(df, entry):
 
-    high = df["High"]
-    low = df["Low"]
+    f = features(df)
 
-    # ATR
-    atr_val = to_float((high - low).rolling(14).mean().iloc[-1])
+    # ATR (high-low range, not true range)
+    atr_val = to_float(f.range_atr(14).iloc[-1])
     if atr_val is None or atr_val <= 0:
         atr_val = entry * 0.02
 
@@ -96,7 +109,7 @@ def compute_take_profit(df, entry):
     tp3 = entry + 5.0 * atr
 
     # resistance
-    resistance = float(high.rolling(20).max().iloc[-2])
+    resistance = float(f.rolling_max("High", 20).iloc[-2])
 
     # ==========================
     # SMART MONEY OVERRIDE
@@ -143,20 +156,21 @@ def core_signals(df):
     if len(df) < 30:
         return None
 
+    f = features(df)
+
     close = to_float(df["Close"].iloc[-1])
     if close <= 0 :
         return None
     vol_today = to_float(df["Volume"].iloc[-1])
 
-    avgvol = to_float(df["Volume"].rolling(20).mean().iloc[-2])
+    avgvol = to_float(f.rolling_mean("Volume", 20).iloc[-2])
     if close is None or vol_today is None or avgvol is None:
         return None
 
     # ==========================
     # Liquidity Proxy (Ultra Safe)
     # ==========================
-    avg_value_series = (df["Close"] * df["Volume"]).rolling(20).mean()
-    avg_value = to_float(avg_value_series.iloc[-2])
+    avg_value = to_float(f.rolling_mean("Value", 20).iloc[-2])
 
     if avg_value is None:
         avg_value = 0
@@ -168,7 +182,7 @@ def core_signals(df):
     # ==========================
     # Value proxy discount
     # ==========================
-    high_52w = to_float(df["Close"].max())
+    high_52w = to_float(f.peak())
     if high_52w is None or high_52w == 0:
         high_52w = close
 
@@ -178,8 +192,8 @@ def core_signals(df):
     # ==========================
     # Compression
     # ==========================
-    high20 = to_float(df["High"].rolling(20).max().iloc[-1])
-    low20 = to_float(df["Low"].rolling(20).min().iloc[-1])
+    high20 = to_float(f.rolling_max("High", 20).iloc[-1])
+    low20 = to_float(f.rolling_min("Low", 20).iloc[-1])
 
     if high20 is None or low20 is None or low20 == 0:
         return None
@@ -208,7 +222,7 @@ def core_signals(df):
     # ==========================
     # Breakout confirm
     # ==========================
-    prev_high20 = to_float(df["Close"].rolling(20).max().iloc[-2])
+    prev_high20 = to_float(f.rolling_max("Close", 20).iloc[-2])
     if prev_high20 is None:
         return None
 
@@ -289,11 +303,7 @@ def evaluate_v2(df, ihsg_df):
             df["Close"].iloc[-21].item() 
             - 1
         )
-        idx_ret = float(
-            ihsg_df["Close"].iloc[-1].item() / 
-            ihsg_df["Close"].iloc[-21].item() 
-            - 1
-        )
+        idx_ret = index_return(ihsg_df, 20)
 
         rs = stock_ret - idx_ret
     except Exception:
@@ -304,8 +314,10 @@ def evaluate_v2(df, ihsg_df):
     if rs > 0.07:
         score += 20
 
-    ma20 = df["Close"].rolling(20).mean().iloc[-1]
-    ma50 = df["Close"].rolling(50).mean().iloc[-1]
+    f = features(df)
+
+    ma20 = f.rolling_mean("Close", 20).iloc[-1]
+    ma50 = f.rolling_mean("Close", 50).iloc[-1]
     trend_ok = bool(ma20 > ma50)
 
     if trend_ok:
@@ -342,8 +354,10 @@ def evaluate_v3(df, ihsg_df):
     elif ret3m > 0.10:
         score += 10
 
+    f = features(df)
+
     # Sharpe proxy
-    returns = df["Close"].pct_change().dropna()
+    returns = f.series("Return").dropna()
     if len(returns) > 30:
         std = returns.std()
         
@@ -358,7 +372,7 @@ def evaluate_v3(df, ihsg_df):
             score += 8
 
     # Drawdown control
-    peak = to_float(df["Close"].max())
+    peak = to_float(f.peak())
 
     if peak is None or peak == 0:
         return None
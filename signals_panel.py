@@ -0,0 +1,713 @@
+import warnings
+import numpy as np
+import pandas as pd
+from collections.abc import Mapping
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import MIN_AVG_VALUE, MIN_SCORE, DISCOUNT_LEVEL, SCORE_VERSION
+
+
+# =========================================
+# PANEL SIGNAL ENGINE
+# =========================================
+#
+# Same rules as signals.evaluate, for the whole universe at once.
+#
+# Input: aligned (date × ticker) arrays, e.g. utils.price_store.load_panel()
+# or utils.panel_store.align(frames). Each column is right-aligned first
+# (missing bars pushed to the top), so X[-k] is the k-th last bar of every
+# ticker, exactly like df.iloc[-k] on the per-ticker frame.
+#
+# Windows that reach into missing history give NaN, like pandas rolling.
+#
+# Two bar modes share one rule body (_rules):
+#   evaluate_panel    last bar only        → (N,) per field
+#   evaluate_history  every bar, no loop   → (T, N) per field
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# bars in the scanner's "3mo" download: the frame evaluate() sees
+SCAN_BARS = 63
+
+
+def _right_align(panel, cols, lookback=None):
+
+    close = np.asarray(panel["Close"])[:, cols]
+
+    # stable sort on "has bar": empty rows first, bars keep their order
+    order = np.argsort(~np.isnan(close), axis=0, kind="stable")
+
+    out = {}
+    for f in FIELDS:
+        arr = np.asarray(panel[f])[:, cols] if f in panel else np.full(close.shape, np.nan)
+        out[f] = np.take_along_axis(arr, order, axis=0)
+
+    if lookback is not None:
+        out = {f: a[-lookback:] for f, a in out.items()}
+
+    return out, order
+
+
+def _win(x, n, end=0):
+    """
+    Rows [-n-end, -end) → the rolling(n) window ending `end` bars ago.
+    """
+
+    if n + end > len(x):
+        return np.full((n,) + x.shape[1:], np.nan)
+
+    return x[len(x) - n - end: len(x) - end]
+
+
+def _shift(x, k):
+    """
+    Series.shift(k) along the bar axis (k < 0 looks ahead).
+    """
+
+    if k == 0:
+        return x
+
+    out = np.full(x.shape, np.nan)
+
+    if abs(k) < len(x):
+        if k > 0:
+            out[k:] = x[:-k]
+        else:
+            out[:k] = x[-k:]
+
+    return out
+
+
+def _roll(x, n, fn):
+    """
+    rolling(n) reduced by fn, NaN until the window is full.
+    """
+
+    out = np.full(x.shape, np.nan)
+
+    if n <= len(x):
+        out[n - 1:] = fn(sliding_window_view(x, n, axis=0), axis=-1)
+
+    return out
+
+
+def _roll_partial(x, n, fn):
+    """
+    Up to n rows ending at each row (tail(n) of a frame that may be
+    shorter). fn must skip NaN.
+    """
+
+    pad = np.full((n - 1,) + x.shape[1:], np.nan)
+
+    return fn(sliding_window_view(np.concatenate([pad, x]), n, axis=0), axis=-1)
+
+
+def _expanding(x, fn):
+    """
+    Expanding nanmean / nanstd(ddof=1) via running sums.
+    """
+
+    ok = ~np.isnan(x)
+    n = np.cumsum(ok, axis=0)
+    s = np.cumsum(np.where(ok, x, 0), axis=0)
+
+    if fn is np.nanmean:
+        return s / n
+
+    s2 = np.cumsum(np.where(ok, x * x, 0), axis=0)
+
+    return np.sqrt(np.maximum(s2 - s * s / n, 0) / (n - 1))
+
+
+def _nanstd(x, axis):
+    return np.nanstd(x, axis=axis, ddof=1)
+
+
+# =========================================
+# BAR MODES
+# =========================================
+class _LastBar:
+    """
+    Windows ending on the last row → (N,) arrays.
+    The frame is the whole right-aligned (lookback-cut) panel.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.bars = (~np.isnan(p["Close"])).sum(axis=0)
+
+    def now(self, x):
+        return x[-1]
+
+    def back(self, x, k):
+        """
+        x.iloc[-k] (NaN when history is shorter).
+        """
+
+        if k > len(x):
+            return np.full(x.shape[1:], np.nan)
+
+        return x[-k]
+
+    def roll(self, x, n, fn, end=0):
+        return fn(_win(x, n, end), axis=0)
+
+    def tail(self, x, n, fn):
+        return fn(x[-n:], axis=0)
+
+    def frame(self, x, fn, skip=0):
+        return fn(x, axis=0)
+
+    def peak(self, x):
+        return self.frame(np.where(np.isnan(x), -np.inf, x), np.max)
+
+
+class _EveryBar:
+    """
+    Windows ending on every row → (T, N) arrays.
+
+    The frame at row t is the last `lookback` bars up to t
+    (None: every bar up to t), i.e. what evaluate() would have
+    been given on that day.
+    """
+
+    def __init__(self, p, lookback):
+
+        self.p = p
+        self.lookback = lookback
+
+        close = p["Close"]
+        first = len(close) - (~np.isnan(close)).sum(axis=0)
+        rows = np.arange(len(close))[:, None]
+
+        bars = np.clip(rows - first + 1, 0, None)
+
+        if lookback is not None:
+            bars = np.minimum(bars, lookback)
+
+        self.bars = bars
+
+    def now(self, x):
+        return x
+
+    def back(self, x, k):
+        return _shift(x, k - 1)
+
+    def roll(self, x, n, fn, end=0):
+        return _shift(_roll(x, n, fn), end)
+
+    def tail(self, x, n, fn):
+        return _roll_partial(x, n, fn)
+
+    def frame(self, x, fn, skip=0):
+        """
+        fn over the frame rows ending at each row; `skip` drops the
+        oldest rows (returns: the first bar of a frame has none).
+        """
+
+        if self.lookback is None:
+            return _expanding(x, fn)
+
+        return _roll_partial(x, self.lookback - skip, fn)
+
+    def peak(self, x):
+
+        if self.lookback is None:
+            return np.fmax.accumulate(x, axis=0)
+
+        return _roll_partial(x, self.lookback, np.nanmax)
+
+
+# =========================================
+# RULES (shared by both bar modes)
+# =========================================
+def _take_profit(m, h, l, entry):
+    """
+    Vectorized signals.compute_take_profit.
+    """
+
+    atr_val = m.roll(h - l, 14, np.mean)
+    atr_val = np.where(atr_val > 0, atr_val, entry * 0.02)
+
+    tp1 = entry + 1.5 * atr_val
+    tp2 = entry + 3.0 * atr_val
+    tp3 = entry + 5.0 * atr_val
+
+    resistance = m.roll(h, 20, np.max, end=1)
+
+    tp2 = np.where(
+        resistance > entry,
+        np.maximum(tp1 * 1.1, np.minimum(tp2, resistance)),
+        tp2
+    )
+
+    tp1, tp2, tp3 = np.sort(np.stack([tp1, tp2, tp3]), axis=0)
+
+    low_tp = tp1 <= entry
+    tp1 = np.where(low_tp, entry * 1.02, tp1)
+    tp2 = np.where(low_tp, entry * 1.05, tp2)
+    tp3 = np.where(low_tp, entry * 1.10, tp3)
+
+    return tp1, tp2, tp3, resistance, atr_val
+
+
+def _rules(m, idx_ret, version):
+    """
+    signals.core_signals + evaluate_v1..v4 on whichever bars m selects.
+    idx_ret: index 20-bar return (scalar or per bar), None → RS 0.
+    """
+
+    h, l, c, v = (m.p[f] for f in ("High", "Low", "Close", "Volume"))
+    bars = m.bars
+    prev_close = _shift(c, 1)
+
+    # ==========================
+    # CORE SIGNALS
+    # ==========================
+    close = m.now(c)
+    vol_today = m.now(v)
+
+    avgvol = m.roll(v, 20, np.mean, end=1)
+    avg_value = m.roll(c * v, 20, np.mean, end=1)
+
+    liquidity_penalty = avg_value < MIN_AVG_VALUE
+
+    # broker_style.accumulation_strength
+    ret5 = close / m.back(c, 6) - 1
+    tight = m.tail((h - l) / c, 5, np.nanmean) < 0.02
+    vol_pressure = m.tail(v, 5, np.nanmean) > 1.8 * m.roll(v, 20, np.mean)
+    broker_accum = (np.abs(ret5) < 0.03) & tight & vol_pressure
+
+    high_52w = m.peak(c)
+    high_52w = np.where(high_52w > 0, high_52w, close)
+
+    discount_52w = close / high_52w - 1
+    undervalued_proxy = discount_52w < DISCOUNT_LEVEL
+
+    high20 = m.roll(h, 20, np.max)
+    low20 = m.roll(l, 20, np.min)
+
+    compression = (high20 / low20 - 1) < 0.15
+
+    capitulation = vol_today > 2.0 * avgvol
+
+    absorption = (vol_today > 1.7 * avgvol) & ((m.now(h) - m.now(l)) < close * 0.025)
+
+    prev_high20 = m.roll(c, 20, np.max, end=1)
+    breakout_confirm = (close > prev_high20) & (vol_today > 2.0 * avgvol)
+
+    # (Volume.tail(5) > avgvol).sum() >= 2
+    multi_accum = m.tail(
+        v, 5,
+        lambda w, axis: (w > np.expand_dims(avgvol, axis)).sum(axis=axis)
+    ) >= 2
+
+    # ==========================
+    # V1
+    # ==========================
+    score = (
+        40 * breakout_confirm
+        + 20 * absorption
+        + 15 * multi_accum
+        + 20 * (undervalued_proxy & compression)
+        + 15 * broker_accum
+        + 10 * (capitulation & undervalued_proxy)
+        - 15 * liquidity_penalty
+    ).astype(float)
+    score = np.maximum(score, 0)
+
+    # true range ATR (signals.atr)
+    tr = np.fmax(np.fmax(np.abs(h - l), np.abs(h - prev_close)), np.abs(l - prev_close))
+    atr14 = m.roll(tr, 14, np.mean)
+
+    entry_low = close - 0.5 * atr14
+    entry_high = close + 0.5 * atr14
+    stoploss = close - 1.5 * atr14
+
+    out = {
+        "score": score,
+        "close": close,
+        "avg_value": avg_value,
+        "discount_52w": discount_52w,
+        "absorption": absorption,
+        "broker_accum": broker_accum,
+        "multi_accum": multi_accum,
+        "compression": compression,
+        "capitulation": capitulation,
+        "breakout_confirm": breakout_confirm,
+        "liquidity_penalty": liquidity_penalty,
+        "entry_low": entry_low,
+        "entry_high": entry_high,
+        "stoploss": stoploss,
+    }
+
+    # ==========================
+    # V2
+    # ==========================
+    if version != "v1":
+
+        if idx_ret is None:
+            rs = np.zeros(np.shape(close))
+        else:
+            # short history / no index bar → evaluate_v2 falls back to 0
+            rs = close / m.back(c, 21) - 1 - idx_ret
+            rs = np.where((bars >= 21) & ~np.isnan(idx_ret), rs, 0.0)
+
+        trend_ok = m.roll(c, 20, np.mean) > m.roll(c, 50, np.mean)
+
+        score = score + 10 * (rs > 0.03) + 20 * (rs > 0.07) + 10 * trend_ok
+        score = np.maximum(score, 0)
+
+        out.update({
+            "score": score,
+            "trend_ok": trend_ok,
+            "relative_strength": rs,
+        })
+
+    # ==========================
+    # V3 / V4
+    # ==========================
+    if version not in ("v1", "v2"):
+
+        ret3m = np.where(bars >= 60, close / m.back(c, 60) - 1, 0.0)
+
+        score = score + 20 * (ret3m > 0.25) + 10 * ((ret3m > 0.10) & (ret3m <= 0.25))
+
+        # Sharpe proxy on pct_change().dropna() of the frame
+        r = c / prev_close - 1
+        mean_r = m.frame(r, np.nanmean, skip=1)
+        std_r = m.frame(r, _nanstd, skip=1)
+        sharpe = np.where(std_r > 0, mean_r / std_r, 0.0)
+        sharpe = np.where(bars - 1 > 30, sharpe, np.nan)
+
+        score = score + 15 * (sharpe > 0.15) + 8 * ((sharpe > 0.08) & (sharpe <= 0.15))
+
+        drawdown = close / m.peak(c) - 1
+
+        score = score - 25 * (drawdown < -0.50) - 15 * ((drawdown < -0.35) & (drawdown >= -0.50))
+        score = np.maximum(score, 0)
+
+        tp1, tp2, tp3, resistance, atr_tp = _take_profit(m, h, l, entry_high)
+
+        out.update({
+            "score": score,
+            "momentum3m": ret3m,
+            "sharpe": sharpe,
+            "drawdown": drawdown,
+            "tp1": tp1,
+            "tp2": tp2,
+            "tp3": tp3,
+            "resistance": resistance,
+            "atr": atr_tp,
+        })
+
+    # ==========================
+    # VALID (= per-ticker evaluate not None)
+    # ==========================
+    valid = (bars >= 30) & (close > 0) & (low20 != 0)
+
+    if version not in ("v1", "v2", "v3"):
+        gap_spike = np.abs(close / m.back(c, 2) - 1) > 0.15
+        valid &= ~gap_spike
+        out["gap_spike"] = gap_spike
+
+    out["valid"] = valid
+
+    return out
+
+
+def _columns(panel, tickers):
+
+    if tickers is None:
+        tickers = list(panel["tickers"])
+
+    tickers = [t for t in tickers if t in panel["col"]]
+    cols = np.array([panel["col"][t] for t in tickers], dtype=int)
+
+    return tickers, cols
+
+
+def last_bars(panel, tickers, n):
+    """
+    Last n bars of every ticker, right-aligned: {field: (n, N) array}.
+    Row -1 is each ticker's own last bar (NaN-padded on top).
+    """
+
+    tickers, cols = _columns(panel, tickers)
+    out, _ = _right_align(panel, cols, lookback=n)
+
+    return tickers, out
+
+
+# =========================================
+# LAST BAR (SCANNER)
+# =========================================
+def evaluate_panel(panel, tickers=None, ihsg=None, lookback=None, version=SCORE_VERSION):
+    """
+    Score every ticker on its last bar.
+
+    panel    dict of aligned arrays (see utils.panel_store.load)
+    tickers  subset to score (default: whole panel)
+    ihsg     market context (utils.market_context) or index return
+             over 20 bars as a float; None → relative strength 0
+    lookback keep only the last N rows (match the per-ticker
+             download period, e.g. SCAN_BARS for "3mo")
+
+    Returns DataFrame indexed by ticker with the same keys as
+    signals.evaluate plus a "valid" column (False where the
+    per-ticker evaluate would return None).
+    """
+
+    tickers, cols = _columns(panel, tickers)
+
+    p, _ = _right_align(panel, cols, lookback)
+
+    if isinstance(ihsg, (int, float)):
+        idx_ret = float(ihsg)
+    elif ihsg is not None and ihsg.get("ready"):
+        idx_ret = float(ihsg["ret20"])
+    else:
+        idx_ret = None
+
+    # NaN columns (short history) are expected: silence empty-slice noise
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        out = _rules(_LastBar(p), idx_ret, version)
+
+    return pd.DataFrame(out, index=pd.Index(tickers, name="ticker"))
+
+
+def evaluate_frames(frames, ihsg=None, version=SCORE_VERSION):
+    """
+    evaluate_panel on {ticker: DataFrame} (e.g. download_prices output).
+    """
+
+    from utils import panel_store
+
+    panel = panel_store.align(frames, FIELDS)
+
+    if panel is None:
+        return pd.DataFrame()
+
+    return evaluate_panel(panel, ihsg=ihsg, version=version)
+
+
+# keys of the per-ticker signals.evaluate result, by version
+RESULT_KEYS = {
+    "v1": [
+        "score", "discount_52w", "absorption", "broker_accum", "multi_accum",
+        "entry_low", "entry_high", "stoploss",
+    ],
+}
+RESULT_KEYS["v2"] = RESULT_KEYS["v1"] + ["trend_ok", "relative_strength"]
+RESULT_KEYS["v3"] = RESULT_KEYS["v2"] + [
+    "momentum3m", "drawdown", "tp1", "tp2", "tp3", "resistance", "atr",
+]
+RESULT_KEYS["v4"] = RESULT_KEYS["v3"]
+
+
+def result(table, ticker, version=SCORE_VERSION):
+    """
+    One row as the dict signals.evaluate would return (None if not valid).
+    """
+
+    if ticker not in table.index:
+        return None
+
+    row = table.loc[ticker]
+
+    if not row["valid"]:
+        return None
+
+    return {
+        k: bool(row[k]) if isinstance(row[k], (bool, np.bool_)) else float(row[k])
+        for k in RESULT_KEYS.get(version, RESULT_KEYS["v3"])
+    }
+
+
+# =========================================
+# EVERY BAR (HISTORY)
+# =========================================
+def _index_returns(ihsg, dates, n=20):
+    """
+    Index n-bar return on each panel date (NaN without an index bar).
+    ihsg: market context or index Close Series.
+    """
+
+    if ihsg is None:
+        return None
+
+    if isinstance(ihsg, Mapping):
+        if not ihsg.get("ready"):
+            return None
+        ihsg = pd.Series(np.asarray(ihsg["close"]), index=pd.DatetimeIndex(ihsg["dates"]))
+
+    ret = ihsg / ihsg.shift(n) - 1
+
+    return ret.reindex(pd.DatetimeIndex(dates)).to_numpy(dtype=float)
+
+
+def _to_dates(x, order, has_bar):
+    """
+    Right-aligned rows back onto the panel's date axis.
+    """
+
+    out = np.empty(x.shape, dtype=x.dtype)
+    np.put_along_axis(out, order, x, axis=0)
+
+    if out.dtype == bool:
+        out &= has_bar
+    else:
+        out = np.where(has_bar, out, np.nan)
+
+    return out
+
+
+def evaluate_history(panel, tickers=None, ihsg=None, lookback=SCAN_BARS, version=SCORE_VERSION):
+    """
+    Score and flags on every bar of every ticker, in one pass.
+
+    Each bar is scored on the frame evaluate() would have seen that
+    day: the last `lookback` bars (None: all bars so far). RS uses
+    the index 20-bar return as of the same date.
+
+    Returns a panel-shaped dict (see utils.panel_store.load):
+    {"dates", "tickers", "col", field: (T, N) array} with the
+    evaluate_panel columns as fields. Days without a bar are
+    NaN / False.
+    """
+
+    tickers, cols = _columns(panel, tickers)
+
+    p, order = _right_align(panel, cols)
+    has_bar = ~np.isnan(np.asarray(panel["Close"])[:, cols])
+
+    idx_ret = _index_returns(ihsg, panel["dates"])
+
+    if idx_ret is not None:
+        idx_ret = np.take_along_axis(
+            np.broadcast_to(idx_ret[:, None], has_bar.shape), order, axis=0
+        )
+
+    # NaN columns (short history) are expected: silence empty-slice noise
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        out = _rules(_EveryBar(p, lookback), idx_ret, version)
+
+    history = {
+        "dates": panel["dates"],
+        "tickers": tickers,
+        "col": {t: j for j, t in enumerate(tickers)},
+    }
+
+    for k, x in out.items():
+        history[k] = _to_dates(np.asarray(x), order, has_bar)
+
+    return history
+
+
+def forward_returns(panel, horizon, tickers=None):
+    """
+    Close `horizon` bars later / Close - 1, per ticker's own bars.
+    (T, N) on the panel's date axis, NaN where the future is unknown.
+    """
+
+    tickers, cols = _columns(panel, tickers)
+
+    p, order = _right_align(panel, cols)
+    has_bar = ~np.isnan(np.asarray(panel["Close"])[:, cols])
+
+    c = p["Close"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fwd = _shift(c, -horizon) / c - 1
+
+    return _to_dates(fwd, order, has_bar)
+
+
+# =========================================
+# CONDITIONAL FORWARD-RETURN STUDY
+# =========================================
+STUDY_SIGNALS = [
+    "breakout_confirm",
+    "absorption",
+    "multi_accum",
+    "compression",
+    "capitulation",
+    "broker_accum",
+    "trend_ok",
+    "score",            # score >= MIN_SCORE
+]
+
+
+def signal_study(history, panel, horizons=(5, 10, 20), signals=STUDY_SIGNALS, min_score=MIN_SCORE):
+    """
+    Forward returns after each signal vs every valid bar.
+
+    One row per (signal, horizon):
+    n, winrate, avg, median, base (unconditional avg), edge (avg - base).
+    """
+
+    valid = history["valid"]
+    rows = []
+
+    for hz in horizons:
+
+        fwd = forward_returns(panel, hz, tickers=history["tickers"])
+        known = valid & ~np.isnan(fwd)
+        base = float(fwd[known].mean()) if known.any() else np.nan
+
+        for name in signals:
+
+            if name not in history:
+                continue
+
+            flag = history[name] >= min_score if name == "score" else history[name]
+            r = fwd[known & flag]
+
+            if len(r) == 0:
+                rows.append([name, hz, 0, np.nan, np.nan, np.nan, base, np.nan])
+                continue
+
+            avg = float(r.mean())
+
+            rows.append([
+                name, hz, len(r),
+                float((r > 0).mean()),
+                avg,
+                float(np.median(r)),
+                base,
+                avg - base,
+            ])
+
+    return pd.DataFrame(
+        rows,
+        columns=["signal", "horizon", "n", "winrate", "avg", "median", "base", "edge"]
+    )
+
+
+def study_universe(horizons=(5, 10, 20, 60), lookback=SCAN_BARS):
+    """
+    signal_study over the cached price panel (no network).
+    """
+
+    from utils import price_store, panel_store
+
+    panel = price_store.load_panel()
+
+    if panel is None:
+        print("❌ Price panel empty")
+        return None
+
+    index = panel_store.frame(panel, "^JKSE", ["Close"])
+    ihsg = index["Close"] if index is not None else None
+
+    tickers = [t for t in panel["tickers"] if not t.startswith("^")]
+
+    history = evaluate_history(panel, tickers=tickers, ihsg=ihsg, lookback=lookback)
+
+    return signal_study(history, panel, horizons=horizons)
+
+
+if __name__ == "__main__":
+    print(study_universe().to_string(index=False))
@@ -20,7 +20,7 @@ fi
 # ==============================
 
 echo "🌍 Updating foreign data from IDX..."
-python3 flow_engine/foreign_auto.py
+python3 -m flow_engine.foreign_auto
 
 
 # ==============================
@@ -28,7 +28,15 @@ python3 flow_engine/foreign_auto.py
 # ==============================
 
 echo "📦 Saving daily foreign snapshot..."
-python3 flow_engine/foreign_store.py
+python3 -m flow_engine.foreign_store
+
+
+# ==============================
+# REFRESH STALE FUNDAMENTALS
+# ==============================
+
+echo "📚 Refreshing fundamentals store..."
+python3 -m flow_engine.fundamental_store
 
 
 # ==============================
@@ -39,6 +47,14 @@ echo "📈 Running scanner..."
 python3 scanner.py
 
 
+# ==============================
+# INTRADAY FOREIGN SNAPSHOTS
+# ==============================
+
+echo "📸 Starting intraday foreign snapshots..."
+python3 -m flow_engine.foreign_intraday &
+
+
 # ==============================
 # START ENTRY ENGINE
 # ==============================
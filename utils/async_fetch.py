@@ -0,0 +1,130 @@
+import asyncio
+import random
+import threading
+
+from config import FETCH_CONCURRENCY, FETCH_TIMEOUT, FETCH_RETRIES
+from utils.rate_guard import YAHOO_BUCKET
+
+BACKOFF_BASE = 0.7
+BACKOFF_MAX = 10.0
+
+
+# =========================================
+# ASYNC FETCH LAYER
+# =========================================
+#
+# fn(key) is a blocking fetch (yfinance is sync). It runs in a
+# worker thread; raising an exception means "retry".
+#
+# - token bucket      → request rate shared with utils.rate_guard
+#                       (cost(key) tokens per attempt, default 1)
+# - semaphore         → bounded in-flight requests
+# - wait_for          → per-key timeout (no retry until the
+#                       timed-out thread has finished)
+# - jittered backoff  → full jitter exponential
+
+def backoff(attempt):
+    """
+    Full-jitter exponential backoff delay (seconds).
+    """
+
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+async def acquire(bucket, n=1):
+
+    while True:
+
+        wait = bucket.take(n)
+
+        if wait <= 0:
+            return
+
+        await asyncio.sleep(wait)
+
+
+async def _fetch_one(key, fn, bucket, sem, timeout, retries, cost):
+
+    async with sem:
+
+        for attempt in range(retries):
+
+            await acquire(bucket, cost(key) if cost else 1)
+
+            task = asyncio.ensure_future(asyncio.to_thread(fn, key))
+
+            try:
+                res = await asyncio.wait_for(asyncio.shield(task), timeout)
+                return key, res
+
+            except asyncio.TimeoutError:
+                print(f"⚠️ Fetch timeout {key} (attempt {attempt+1})")
+
+                # a worker thread cannot be cancelled: never retry while
+                # the old request still runs (fn bounds it with its own
+                # transport timeout); a late answer is still used
+                try:
+                    return key, await task
+                except Exception as e:
+                    print(f"⚠️ Fetch failed {key} (attempt {attempt+1}) -> {e}")
+
+            except Exception as e:
+                print(f"⚠️ Fetch failed {key} (attempt {attempt+1}) -> {e}")
+
+            if attempt < retries - 1:
+                await asyncio.sleep(backoff(attempt))
+
+    return key, None
+
+
+async def fetch_all_async(
+    keys,
+    fn,
+    bucket=YAHOO_BUCKET,
+    concurrency=FETCH_CONCURRENCY,
+    timeout=FETCH_TIMEOUT,
+    retries=FETCH_RETRIES,
+    cost=None
+):
+    """
+    Fetch every key concurrently. Returns {key: result or None}.
+
+    cost(key): HTTP requests one call of fn(key) makes (bucket tokens).
+    """
+
+    sem = asyncio.Semaphore(concurrency)
+
+    done = await asyncio.gather(*[
+        _fetch_one(k, fn, bucket, sem, timeout, retries, cost)
+        for k in keys
+    ])
+
+    return dict(done)
+
+
+def fetch_all(keys, fn, **kwargs):
+    """
+    Sync facade. Safe to call from code that already runs an
+    event loop (the fetch then runs on a helper thread).
+    """
+
+    keys = list(keys)
+
+    if not keys:
+        return {}
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(fetch_all_async(keys, fn, **kwargs))
+
+    out = {}
+
+    def runner():
+        out.update(asyncio.run(fetch_all_async(keys, fn, **kwargs)))
+
+    t = threading.Thread(target=runner)
+    t.start()
+    t.join()
+
+    return out
@@ -1,5 +1,67 @@
+import os
+import itertools
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# =========================
+# ARRAY HELPERS
+# =========================
+#
+# Simulators run on contiguous NumPy arrays and jump from event
+# to event (next BUY, first TP/SL hit) instead of touching every
+# row through pandas scalar indexing.
+
+# first scan window after an entry; doubles until a hit is found
+SCAN_CHUNK = 32
+
+
+def _arrays(df, *cols):
+    return [np.ascontiguousarray(df[c].to_numpy(dtype=float)) for c in cols]
+
+
+def _flags(df, col):
+    """
+    Bar indices where the signal column is set (pd.notna).
+    """
+    return np.flatnonzero(pd.notna(df[col]).to_numpy())
+
+
+def _next(idx, after):
+    """
+    First index in sorted idx that is >= after, or None.
+    """
+
+    k = np.searchsorted(idx, after)
+
+    if k == len(idx):
+        return None
+
+    return int(idx[k])
+
+
+def _first_hit(test, start, n):
+    """
+    First bar >= start where test(lo, hi) (bool array for bars lo..hi-1)
+    is True, scanning in doubling chunks. None if never.
+    """
+
+    lo = start
+    size = SCAN_CHUNK
+
+    while lo < n:
+
+        hi = min(n, lo + size)
+        hit = test(lo, hi)
+
+        if hit.any():
+            return lo + int(hit.argmax())
+
+        lo = hi
+        size *= 2
+
+    return None
+
 
 # =========================
 # SIGNAL BACKTEST
@@ -8,29 +70,30 @@ import numpy as np
 
 def backtest_signal(df, fee=0.001):
 
-    trades = []
-    position = None
-    entry = None
+    close, = _arrays(df, "Close")
 
-    for i in range(len(df)):
+    return _signal(close, _flags(df, "BUY"), _flags(df, "SELL"), fee)
 
-        price = df["Close"].iloc[i]
 
-        buy = df["BUY"].iloc[i]
-        sell = df["SELL"].iloc[i]
+def _signal(close, buys, sells, fee):
 
-        if pd.notna(buy) and position is None:
+    trades = []
+    i = _next(buys, 0)
 
-            entry = price
-            position = True
+    while i is not None:
 
-        elif pd.notna(sell) and position:
+        # exit is checked from the bar after entry (elif on the entry bar)
+        j = _next(sells, i + 1)
 
-            ret = (price - entry) / entry
-            ret -= fee * 2
+        if j is None:
+            break
 
-            trades.append(ret)
-            position = None
+        ret = (close[j] - close[i]) / close[i]
+        ret -= fee * 2
+
+        trades.append(ret)
+
+        i = _next(buys, j + 1)
 
     return trades
 
@@ -39,37 +102,42 @@ def backtest_signal(df, fee=0.001):
 # TP SL BACKTEST
 # =========================
 
-def backtest_tp_sl(df, sl=0.07, tp=0.15):
+def backtest_tp_sl(df, sl=0.07, tp=0.15, fee=0.001):
 
-    trades = []
-    position = None
-    entry = None
+    close, high, low = _arrays(df, "Close", "High", "Low")
 
-    for i in range(len(df)):
+    return _tp_sl(close, high, low, _flags(df, "BUY"), sl, tp, fee)
 
-        price = df["Close"].iloc[i]
 
-        if pd.notna(df["BUY"].iloc[i]) and position is None:
+def _tp_sl(close, high, low, buys, sl, tp, fee):
 
-            entry = price
-            position = True
+    n = len(close)
 
-        if position:
+    trades = []
+    i = _next(buys, 0)
+
+    while i is not None:
 
-            high = df["High"].iloc[i]
-            low = df["Low"].iloc[i]
+        entry = close[i]
+        up = entry * (1 + tp)
+        down = entry * (1 - sl)
 
-            if high >= entry * (1 + tp):
+        # entry bar itself can exit
+        j = _first_hit(
+            lambda a, b: (high[a:b] >= up) | (low[a:b] <= down),
+            i, n
+        )
 
-                ret = tp - 0.002
-                trades.append(ret)
-                position = None
+        if j is None:
+            break
 
-            elif low <= entry * (1 - sl):
+        # TP has priority when both are touched on the same bar
+        if high[j] >= up:
+            trades.append(tp - fee * 2)
+        else:
+            trades.append(-sl - fee * 2)
 
-                ret = -sl - 0.002
-                trades.append(ret)
-                position = None
+        i = _next(buys, j + 1)
 
     return trades
 
@@ -78,36 +146,62 @@ def backtest_tp_sl(df, sl=0.07, tp=0.15):
 # TRAILING STOP BACKTEST
 # =========================
 
-def backtest_trailing(df, trail=0.08):
+def backtest_trailing(df, trail=0.08, fee=0.001):
+
+    close, high, low = _arrays(df, "Close", "High", "Low")
+
+    return _trailing(close, high, low, _flags(df, "BUY"), trail, fee)
+
+
+def _trailing(close, high, low, buys, trail, fee):
+
+    n = len(close)
 
     trades = []
-    position = None
-    entry = None
-    high_since_entry = None
+    i = _next(buys, 0)
 
-    for i in range(len(df)):
+    while i is not None:
 
-        price = df["Close"].iloc[i]
+        entry = close[i]
+        peak = entry
 
-        if pd.notna(df["BUY"].iloc[i]) and position is None:
+        # NaN entry never stops out: position stays open to the end
+        if np.isnan(entry):
+            break
 
-            entry = price
-            high_since_entry = price
-            position = True
+        exit_bar = None
+        stop = None
 
-        if position:
+        lo = i
+        size = SCAN_CHUNK
 
-            high_since_entry = max(high_since_entry, df["High"].iloc[i])
+        while lo < n:
 
-            stop = high_since_entry * (1 - trail)
+            hi = min(n, lo + size)
 
-            if df["Low"].iloc[i] <= stop:
+            # highest high since entry, carried across chunks
+            run = np.fmax.accumulate(np.fmax(high[lo:hi], peak))
+            stops = run * (1 - trail)
+            hit = low[lo:hi] <= stops
 
-                ret = (stop - entry) / entry
-                ret -= 0.002
-                trades.append(ret)
+            if hit.any():
+                k = int(hit.argmax())
+                exit_bar = lo + k
+                stop = stops[k]
+                break
 
-                position = None
+            peak = run[-1]
+            lo = hi
+            size *= 2
+
+        if exit_bar is None:
+            break
+
+        ret = (stop - entry) / entry
+        ret -= fee * 2
+        trades.append(ret)
+
+        i = _next(buys, exit_bar + 1)
 
     return trades
 
@@ -121,7 +215,7 @@ def calc_stats(trades):
     if len(trades) == 0:
         return None
 
-    trades = np.array(trades)
+    trades = np.asarray(trades, dtype=float)
 
     wins = trades[trades > 0]
     losses = trades[trades <= 0]
@@ -138,11 +232,8 @@ def calc_stats(trades):
 
     expectancy = (winrate * avg_win) - ((1-winrate) * avg_loss)
 
-    equity = 1
-    for t in trades:
-        equity *= (1 + t)
-
-    roi = equity - 1
+    # compounded equity
+    roi = np.prod(1 + trades) - 1
 
     return {
         "trades": len(trades),
@@ -153,12 +244,30 @@ def calc_stats(trades):
         "avg_win": avg_win,
         "avg_loss": avg_loss
     }
-    
-def run_backtest(df, sl=0.07, tp=0.15, fee=0.001):
+
+def run_backtest(df, sl=0.07, tp=0.15, fee=0.001, trail=0.08):
+    """
+    Stats of the three simulators, memoized on disk by the hash of
+    the price / signal columns and parameters (utils.result_cache).
+    """
+
+    from utils import result_cache
+
+    close, high, low = _arrays(df, "Close", "High", "Low")
+
+    return result_cache.cached(
+        "run_backtest",
+        [close, high, low, _flags(df, "BUY"), _flags(df, "SELL")],
+        lambda: _run_backtest(df, sl, tp, fee, trail),
+        sl=sl, tp=tp, fee=fee, trail=trail
+    )
+
+
+def _run_backtest(df, sl, tp, fee, trail):
 
     signal_trades = backtest_signal(df, fee)
-    tp_trades = backtest_tp_sl(df, sl, tp)
-    trail_trades = backtest_trailing(df)
+    tp_trades = backtest_tp_sl(df, sl, tp, fee)
+    trail_trades = backtest_trailing(df, trail, fee)
 
     signal_stats = calc_stats(signal_trades)
     tp_stats = calc_stats(tp_trades)
@@ -168,4 +277,204 @@ def run_backtest(df, sl=0.07, tp=0.15, fee=0.001):
         "signal": signal_stats,
         "tp_sl": tp_stats,
         "trailing": trail_stats
-    }
\ No newline at end of file
+    }
+
+
+# =========================
+# PARAMETER SWEEP
+# =========================
+#
+# Grid of SL / TP / trail / fee over the whole universe on a
+# process pool. Workers memory-map the price panel and the BUY
+# mask from disk once (pool initializer); a task is just a
+# parameter tuple, no DataFrame is pickled.
+#
+# Config rows are memoized (utils.result_cache) on a hash of the
+# price slice and BUY mask: rerunning on unchanged bars only
+# simulates the configs not seen before.
+
+SWEEP_DIR = "data/sweep"
+
+SWEEP_SL = (0.05, 0.07, 0.10)
+SWEEP_TP = (0.10, 0.15, 0.20, 0.30)
+SWEEP_TRAIL = (0.05, 0.08, 0.12)
+SWEEP_FEE = (0.001, 0.0015)
+
+# configs with fewer pooled trades rank after every other config
+# (one or two winners give profit_factor = inf)
+SWEEP_MIN_TRADES = 30
+
+_worker = {}
+
+
+def _init_worker(panel_dir, fields, mask_file, cols):
+
+    from utils import panel_store
+
+    panel = panel_store.load(panel_dir, fields, mmap=True)
+    buy = np.load(mask_file, mmap_mode="r")
+
+    # one ticker per row: contiguous slices for the simulators
+    _worker["close"] = np.ascontiguousarray(panel["Close"][:, cols].T)
+    _worker["high"] = np.ascontiguousarray(panel["High"][:, cols].T)
+    _worker["low"] = np.ascontiguousarray(panel["Low"][:, cols].T)
+    _worker["buys"] = [np.flatnonzero(buy[:, j]) for j in range(buy.shape[1])]
+
+
+def _sweep_task(task):
+
+    strategy, sl, tp, trail, fee = task
+
+    close, high, low = _worker["close"], _worker["high"], _worker["low"]
+
+    pooled = []
+    rois = []
+
+    for j, buys in enumerate(_worker["buys"]):
+
+        if strategy == "tp_sl":
+            trades = _tp_sl(close[j], high[j], low[j], buys, sl, tp, fee)
+        else:
+            trades = _trailing(close[j], high[j], low[j], buys, trail, fee)
+
+        if trades:
+            pooled += trades
+            rois.append(calc_stats(trades)["roi"])
+
+    stats = calc_stats(pooled)
+
+    if stats is None:
+        return None
+
+    # pooled trades of many tickers do not compound: keep per-ticker ROI
+    stats.pop("roi")
+
+    return {
+        "strategy": strategy,
+        "sl": sl,
+        "tp": tp,
+        "trail": trail,
+        "fee": fee,
+        **stats,
+        "tickers": len(rois),
+        "avg_ticker_roi": float(np.mean(rois)),
+    }
+
+
+def sweep_buy_mask(panel, tickers, min_score=None):
+    """
+    BUY on every bar where the scanner's own score passes
+    (signals_panel.evaluate_history, valid & score >= MIN_SCORE).
+    """
+
+    from config import MIN_SCORE
+    from signals_panel import evaluate_history
+    from utils import panel_store
+
+    if min_score is None:
+        min_score = MIN_SCORE
+
+    index = panel_store.frame(panel, "^JKSE", ["Close"])
+    ihsg = index["Close"] if index is not None else None
+
+    history = evaluate_history(panel, tickers=tickers, ihsg=ihsg)
+
+    return history["valid"] & (history["score"] >= min_score)
+
+
+def run_sweep(
+    sl=SWEEP_SL,
+    tp=SWEEP_TP,
+    trail=SWEEP_TRAIL,
+    fee=SWEEP_FEE,
+    buy=None,
+    tickers=None,
+    workers=None,
+    rank_by="profit_factor",
+    min_trades=SWEEP_MIN_TRADES
+):
+    """
+    Parameter sweep of the TP/SL and trailing-stop simulators.
+
+    buy: (date × ticker) bool mask aligned with the price panel
+    columns in `tickers` (default: scanner score history).
+
+    Returns one row per configuration, pooled over the universe,
+    ranked by `rank_by` ("profit_factor" or "expectancy"). Configs
+    under `min_trades` trades, and infinite profit factors, rank last.
+    Rows already computed on the same bars come from the result cache.
+    """
+
+    from utils import price_store, result_cache
+
+    panel = price_store.load_panel()
+
+    if panel is None:
+        print("❌ Price panel empty")
+        return pd.DataFrame()
+
+    if tickers is None:
+        tickers = [t for t in panel["tickers"] if not t.startswith("^")]
+
+    tickers = [t for t in tickers if t in panel["col"]]
+    cols = [panel["col"][t] for t in tickers]
+
+    if buy is None:
+        buy = sweep_buy_mask(panel, tickers)
+
+    buy = np.asarray(buy, dtype=bool)
+
+    tasks = (
+        [("tp_sl", s, t, None, f) for s, t, f in itertools.product(sl, tp, fee)] +
+        [("trailing", None, None, tr, f) for tr, f in itertools.product(trail, fee)]
+    )
+
+    # one digest of the inputs, then one cache key per config
+    data = result_cache.key(
+        "sweep_data",
+        [np.asarray(panel[f])[:, cols] for f in ("Close", "High", "Low")] + [buy]
+    )
+    keys = [result_cache.key("run_sweep", [], data=data, task=task) for task in tasks]
+
+    cached = {k: result_cache.get(k) for k in keys}
+    todo = [task for task, k in zip(tasks, keys) if cached[k] is None]
+
+    print(f"🧪 Sweep {len(tasks)} configs x {len(tickers)} tickers ({len(tasks) - len(todo)} cached)")
+
+    if todo:
+
+        os.makedirs(SWEEP_DIR, exist_ok=True)
+        mask_file = f"{SWEEP_DIR}/buy.npy"
+        np.save(mask_file, buy)
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(price_store.PANEL_DIR, price_store.FIELDS, mask_file, cols)
+        ) as pool:
+            fresh = dict(zip(todo, pool.map(_sweep_task, todo)))
+
+        for task, k in zip(tasks, keys):
+            if task in fresh and fresh[task] is not None:
+                cached[k] = fresh[task]
+                result_cache.put(k, fresh[task])
+
+    print("🗄️ Result cache:", result_cache.summary())
+
+    rows = [cached[k] for k in keys if cached[k] is not None]
+
+    if not rows:
+        return pd.DataFrame()
+
+    table = pd.DataFrame(rows)
+
+    enough = table["trades"] >= min_trades
+    finite = np.isfinite(table[rank_by])
+
+    order = np.lexsort((-table[rank_by].where(finite, 0).to_numpy(), ~finite.to_numpy(), ~enough.to_numpy()))
+
+    return table.iloc[order].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    print(run_sweep().head(20).to_string())
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def tick_size(price):
 
     if price < 200:
@@ -27,4 +30,22 @@ def floor_tick(price):
 def ceil_tick(price):
 
     tick = tick_size(price)
-    return (int(price / tick) + 1) * tick
\ No newline at end of file
+    return (int(price / tick) + 1) * tick
+
+
+def tick_sizes(prices):
+    """
+    tick_size over a NumPy array of prices (NaN → NaN).
+    """
+
+    prices = np.asarray(prices, dtype=float)
+
+    ticks = np.select(
+        [prices < 200, prices < 500, prices < 2000, prices < 5000],
+        [1, 2, 5, 10],
+        25
+    ).astype(float)
+
+    ticks[np.isnan(prices)] = np.nan
+
+    return ticks
@@ -5,7 +5,8 @@ import pandas as pd
 import mplfinance as mpf
 import matplotlib.pyplot as plt
 
-from utils.yahoo_pro import download_price
+from features import features
+from utils.market_context import market_context
 from matplotlib.lines import Line2D
 from matplotlib.patches import Patch
 import matplotlib
@@ -39,17 +40,12 @@ ACC_ZONE_COLOR = "#06b6d4"
 SL_COLOR = "#ff4d4d"
 TP_COLOR = "#00ff88"
 
-os.makedirs("charts", exist_ok=True)
-
-IHSG_DATA = download_price("^JKSE")
-
-if IHSG_DATA is None or IHSG_DATA.empty:
-    IHSG_DATA = pd.DataFrame()
+CHART_DIR = "charts"
 
 def generate_chart(sym, r, df):
 
     sym_clean = sym.replace(".JK","")
-    file = f"charts/{sym_clean}.png"
+    file = f"{CHART_DIR}/{sym_clean}.png"
 
     # chart cache
     if os.path.exists(file):
@@ -73,6 +69,10 @@ def generate_chart(sym, r, df):
         if not all(c in df.columns for c in cols):
             return None
 
+        # indicators come from the caller's frame, so the feature memo
+        # built by the scan / signals for it is reused here
+        f = features(df)
+
         df = df[cols].copy()
 
         for c in cols:
@@ -113,49 +113,49 @@ def generate_chart(sym, r, df):
         # INDICATORS
         # =========================
 
-        df["EMA21"] = df["Close"].ewm(span=21, adjust=False).mean()
+        def on(s):
+            return s.set_axis(pd.to_datetime(s.index)).reindex(df.index)
+
+        df["EMA21"] = on(f.ema("Close", 21))
 
-        df["MA50"] = df["Close"].rolling(50).mean()
+        df["MA50"] = on(f.rolling_mean("Close", 50))
 
-        df["EMA9"] = df["Close"].ewm(span=9, adjust=False).mean()
+        df["EMA9"] = on(f.ema("Close", 9))
 
         typical = (df["High"] + df["Low"] + df["Close"]) / 3
 
-        df["VWAP"] = ((typical * df["Volume"]).rolling(20).sum() / df["Volume"].rolling(20).sum())
+        df["VWAP"] = ((typical * df["Volume"]).rolling(20).sum() / on(f.rolling_sum("Volume", 20)))
 
         trend_up = df["EMA9"] > df["EMA21"]
         trend_down = df["EMA9"] < df["EMA21"]
 
-        vol_confirm = df["Volume"] > df["Volume"].rolling(20).mean()
+        vol20 = on(f.rolling_mean("Volume", 20))
+
+        vol_confirm = df["Volume"] > vol20
 
         # =========================
         # ATR
         # =========================
 
-        df["ATR"] = (
-            pd.concat([
-                df["High"] - df["Low"],
-                abs(df["High"] - df["Close"].shift()),
-                abs(df["Low"] - df["Close"].shift())
-            ], axis=1).max(axis=1)
-        ).rolling(14).mean()
+        df["ATR"] = on(f.atr(14))
 
         volatility_ok = df["ATR"] > df["Close"] * 0.01
 
         # =========================
         # Relative Strength vs IHSG
         # =========================
-        if not IHSG_DATA.empty:
-            ihsg = IHSG_DATA["Close"].pct_change().rolling(20).sum()
-            ihsg = ihsg.reindex(df.index).ffill()
+        ctx = market_context()
+
+        if ctx["ready"]:
+            ihsg = pd.Series(ctx["rs_baseline"], index=ctx["dates"]).reindex(df.index).ffill()
+            ihsg_ma = pd.Series(ctx["rs_baseline_ma50"], index=ctx["dates"]).reindex(df.index).ffill()
         else:
             ihsg = pd.Series(0, index=df.index)
-
-        ihsg_ma = ihsg.rolling(50).mean()
+            ihsg_ma = ihsg.rolling(50).mean()
 
         market_bull = ihsg > ihsg_ma
 
-        stock_rs = df["Close"].pct_change().rolling(20).sum()
+        stock_rs = on(f.rolling_sum("Return", 20))
 
         rs_strength = stock_rs > ihsg
         rs_label = "RS STRONG" if rs_strength.iloc[-1] else "RS WEAK"
@@ -164,19 +164,19 @@ def generate_chart(sym, r, df):
         # Liquidity Filter
         # =========================
 
-        df["Value"] = df["Close"] * df["Volume"]
+        df["Value"] = on(f.series("Value"))
 
-        liquid = df["Value"].rolling(20).mean() > 20_000_000_000
+        liquid = on(f.rolling_mean("Value", 20)) > 20_000_000_000
 
         # =========================
         # Accumulation Detector
         # =========================
 
-        df["Range"] = df["High"] - df["Low"]
+        df["Range"] = on(f.series("Range"))
 
         volatility_contract = (
-            df["Range"].rolling(10).mean() <
-            df["Range"].rolling(50).mean()
+            on(f.rolling_mean("Range", 10)) <
+            on(f.rolling_mean("Range", 50))
         )
 
         # =========================
@@ -258,7 +258,7 @@ def generate_chart(sym, r, df):
         momentum_buy = (
             (df["Close"] > df["Open"]) &
             (df["Close"] > df["High"].shift(1)) &
-            (df["Volume"] > df["Volume"].rolling(20).mean()*1.2)
+            (df["Volume"] > vol20*1.2)
         )
 
         momentum_sell = (
@@ -600,6 +600,7 @@ def generate_chart(sym, r, df):
         )
 
         fig.subplots_adjust(left=0.28, right=0.97, top=0.82, bottom=0.10)
+        os.makedirs(CHART_DIR, exist_ok=True)
         fig.savefig(file,dpi=120, facecolor=fig.get_facecolor(), pil_kwargs={"optimize": True, "compress_level": 9})
 
         if not os.path.exists(file):
@@ -0,0 +1,137 @@
+import time
+from collections import OrderedDict
+
+from config import FRAME_CACHE_MB, FRAME_CACHE_TTL
+from utils.market_clock import market_open
+
+
+# =========================================
+# IN-PROCESS FRAME CACHE (LRU BY BYTES)
+# =========================================
+#
+# Shared by scanner, chart_generator and entry_engine through
+# utils.yahoo_pro. Evicts least recently used frames once the
+# byte budget is exceeded; pinned keys (index series) are never
+# evicted. During market hours entries expire after
+# FRAME_CACHE_TTL seconds, outside the sessions daily bars do
+# not move so entries never expire.
+
+MAX_BYTES = FRAME_CACHE_MB * 1024 * 1024
+
+_entries = OrderedDict()   # key -> (df, nbytes, stamp)
+_pinned = set()
+_bytes = 0
+
+stats = {
+    "hits": 0,
+    "misses": 0,
+    "expired": 0,
+    "evictions": 0,
+}
+
+
+def frame_bytes(df):
+
+    try:
+        return int(df.memory_usage(deep=True).sum())
+    except Exception:
+        return 0
+
+
+def _drop(key):
+
+    global _bytes
+
+    df, nbytes, stamp = _entries.pop(key)
+    _bytes -= nbytes
+
+
+def _expired(stamp):
+
+    if not market_open():
+        return False
+
+    return time.time() - stamp > FRAME_CACHE_TTL
+
+
+def get(key):
+
+    entry = _entries.get(key)
+
+    if entry is None:
+        stats["misses"] += 1
+        return None
+
+    if _expired(entry[2]):
+        _drop(key)
+        stats["expired"] += 1
+        stats["misses"] += 1
+        return None
+
+    _entries.move_to_end(key)
+    stats["hits"] += 1
+
+    return entry[0]
+
+
+def put(key, df, pin=False):
+
+    global _bytes
+
+    if df is None:
+        return
+
+    if key in _entries:
+        _drop(key)
+
+    nbytes = frame_bytes(df)
+
+    _entries[key] = (df, nbytes, time.time())
+    _bytes += nbytes
+
+    if pin:
+        _pinned.add(key)
+
+    _evict()
+
+
+def pin(key):
+    _pinned.add(key)
+
+
+def _evict():
+
+    if _bytes <= MAX_BYTES:
+        return
+
+    for key in list(_entries):
+
+        if _bytes <= MAX_BYTES:
+            break
+
+        if key in _pinned:
+            continue
+
+        _drop(key)
+        stats["evictions"] += 1
+
+
+def clear():
+
+    global _bytes
+
+    _entries.clear()
+    _pinned.clear()
+    _bytes = 0
+
+
+def summary():
+
+    total = stats["hits"] + stats["misses"]
+    rate = stats["hits"] / total if total else 0
+
+    return (
+        f"{len(_entries)} frames | {_bytes/1e6:.1f} MB | "
+        f"hit {rate*100:.0f}% ({stats['hits']}/{total}) | "
+        f"expired {stats['expired']} | evicted {stats['evictions']}"
+    )
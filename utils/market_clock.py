@@ -0,0 +1,47 @@
+import os
+from datetime import datetime
+
+# optional list of IDX exchange holidays, one YYYY-MM-DD per line
+HOLIDAY_FILE = "data/idx_holidays.csv"
+
+_holidays = {}    # mtime -> set of dates
+
+
+def holidays(path=HOLIDAY_FILE):
+
+    if not os.path.exists(path):
+        return set()
+
+    stamp = os.path.getmtime(path)
+
+    if stamp not in _holidays:
+        with open(path) as f:
+            days = {line.strip()[:10] for line in f if line.strip()}
+        _holidays.clear()
+        _holidays[stamp] = days
+
+    return _holidays[stamp]
+
+
+# =========================
+# IDX MARKET CLOCK
+# =========================
+def trading_day(now=None):
+    """
+    Weekday and not an exchange holiday.
+    """
+
+    now = now or datetime.now()
+
+    return now.weekday() < 5 and now.strftime("%Y-%m-%d") not in holidays()
+
+
+def market_open(now=None):
+
+    now = now or datetime.now()
+    t = now.hour * 60 + now.minute
+
+    session1 = 9*60 <= t <= 11*60+30
+    session2 = 13*60+30 <= t <= 15*60
+
+    return trading_day(now) and (session1 or session2)
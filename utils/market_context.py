@@ -0,0 +1,165 @@
+import time
+import numpy as np
+import pandas as pd
+from types import MappingProxyType
+
+from utils.yahoo_pro import download_price
+
+INDEX_SYMBOL = "^JKSE"
+
+# after a failed load, don't retry for this long (offline runs)
+FAIL_TTL = 300
+
+_failed = {}
+
+
+# =========================================
+# LAZY INDEX PROVIDER
+# =========================================
+def index_frame(symbol=INDEX_SYMBOL):
+    """
+    Market index frame, loaded on first use.
+
+    Served from the shared frame cache when the scanner already
+    fetched it; nothing is downloaded at import time.
+    Returns an empty DataFrame when unavailable.
+    """
+
+    failed_at = _failed.get(symbol)
+
+    if failed_at is not None and time.time() - failed_at < FAIL_TTL:
+        return pd.DataFrame()
+
+    try:
+        df = download_price(symbol)
+    except Exception as e:
+        print("Index download error", symbol, e)
+        df = None
+
+    if df is None or df.empty:
+        _failed[symbol] = time.time()
+        return pd.DataFrame()
+
+    _failed.pop(symbol, None)
+
+    return df
+
+
+# =========================================
+# SHARED MARKET CONTEXT
+# =========================================
+#
+# Index indicators are computed once per bar and handed out as a
+# read-only mapping; per-symbol code reads it instead of adding
+# MA columns to the index frame.
+
+_ctx = {}
+
+
+def _readonly(arr):
+
+    arr = np.array(arr, dtype=float)
+    arr.flags.writeable = False
+
+    return arr
+
+
+def _ret(close, n):
+
+    if len(close) <= n or close[-n-1] == 0:
+        return 0.0
+
+    return float(close[-1] / close[-n-1] - 1)
+
+
+def _empty_context(symbol):
+
+    return MappingProxyType({
+        "symbol": symbol,
+        "ready": False,
+        "bars": 0,
+        "trend": "UNKNOWN",
+        "regime": "UNKNOWN",
+        "regime5": "NEUTRAL",
+        "ret5": 0.0,
+        "ret20": 0.0,
+        "close": _readonly([]),
+        "ma20": _readonly([]),
+        "ma50": _readonly([]),
+        "dates": pd.DatetimeIndex([]),
+        "rs_baseline": _readonly([]),
+        "rs_baseline_ma50": _readonly([]),
+    })
+
+
+def market_context(symbol=INDEX_SYMBOL):
+    """
+    Read-only market context for the latest index bar:
+
+    trend        UPTREND / DOWNTREND / SIDEWAYS (close vs MA20 vs MA50)
+    regime       RISK-ON / RISK-OFF / NEUTRAL from trend
+    regime5      RISK-ON / RISK-OFF / NEUTRAL from 5-day return
+    ret5, ret20  index returns (relative strength baselines)
+    rs_baseline  rolling 20-day sum of daily returns (chart RS line),
+                 aligned with dates like close / ma20 / ma50
+    """
+
+    df = index_frame(symbol)
+
+    if df.empty or "Close" not in df.columns:
+        return _empty_context(symbol)
+
+    key = (df.index[-1], float(df["Close"].iloc[-1]), len(df))
+    hit = _ctx.get(symbol)
+
+    if hit is not None and hit[0] == key:
+        return hit[1]
+
+    close_s = pd.to_numeric(df["Close"], errors="coerce")
+    close = close_s.to_numpy(dtype=float)
+
+    ma20 = close_s.rolling(20).mean().to_numpy()
+    ma50 = close_s.rolling(50).mean().to_numpy()
+
+    trend = "SIDEWAYS"
+
+    if close[-1] > ma20[-1] > ma50[-1]:
+        trend = "UPTREND"
+    elif close[-1] < ma20[-1] < ma50[-1]:
+        trend = "DOWNTREND"
+
+    regime = {"UPTREND": "RISK-ON", "DOWNTREND": "RISK-OFF"}.get(trend, "NEUTRAL")
+
+    ret5 = _ret(close, 5)
+    ret20 = _ret(close, 20)
+
+    regime5 = "NEUTRAL"
+
+    if len(close) >= 6:
+        if ret5 < -0.03:
+            regime5 = "RISK-OFF"
+        elif ret5 > 0.02:
+            regime5 = "RISK-ON"
+
+    rs_baseline = close_s.pct_change().rolling(20).sum()
+
+    ctx = MappingProxyType({
+        "symbol": symbol,
+        "ready": True,
+        "bars": len(close),
+        "trend": trend,
+        "regime": regime,
+        "regime5": regime5,
+        "ret5": ret5,
+        "ret20": ret20,
+        "close": _readonly(close),
+        "ma20": _readonly(ma20),
+        "ma50": _readonly(ma50),
+        "dates": df.index,
+        "rs_baseline": _readonly(rs_baseline),
+        "rs_baseline_ma50": _readonly(rs_baseline.rolling(50).mean()),
+    })
+
+    _ctx[symbol] = (key, ctx)
+
+    return ctx
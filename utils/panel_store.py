@@ -0,0 +1,445 @@
+import os
+import json
+import fcntl
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+
+
+# =========================================
+# COLUMNAR PANEL STORE
+# =========================================
+#
+# One directory per panel:
+#
+#   dates.npy       datetime64[D]  (T,)
+#   tickers.json    list of N tickers (column order)
+#   <Field>.npy     float64        (T, N)   NaN = no bar
+#
+# Field files are plain .npy so they can be memory-mapped
+# (np.load mmap_mode="r") and shared without copying.
+#
+# Several processes write the same stores (scanner, entry engine,
+# foreign snapshotter, replay). A writer holds an exclusive flock on
+# .lock for the whole read-merge-write; readers take it shared while
+# opening the files, so they never mix files of two versions.
+#
+# Appending dates after the last stored one (the daily bar) writes
+# the new rows at the end of each field file and bumps its .npy
+# header in place; dates.npy is replaced last and stays the commit
+# point (extra rows of an interrupted append are ignored). Rows that
+# repeat stored values are dropped first. Anything else (new
+# tickers, earlier or revised dates) rewrites the panel.
+
+DATES_FILE = "dates.npy"
+TICKERS_FILE = "tickers.json"
+LOCK_FILE = ".lock"
+
+_memo = {}
+
+
+def _stamp(path):
+
+    f = f"{path}/{DATES_FILE}"
+
+    if not os.path.exists(f):
+        return None
+
+    st = os.stat(f)
+
+    # replaced atomically on every write → new inode
+    return st.st_ino, st.st_mtime_ns
+
+
+def exists(path):
+    return _stamp(path) is not None
+
+
+@contextmanager
+def _locked(path, mode):
+    """
+    flock on the panel's lock file (fcntl.LOCK_SH / LOCK_EX).
+    """
+
+    os.makedirs(path, exist_ok=True)
+
+    fd = os.open(f"{path}/{LOCK_FILE}", os.O_RDWR | os.O_CREAT, 0o644)
+
+    try:
+        fcntl.flock(fd, mode)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def load(path, fields, mmap=True):
+    """
+    Load a panel.
+
+    Returns dict:
+    {"dates": ndarray, "tickers": list, "col": {ticker: j}, field: ndarray}
+    or None if the panel does not exist.
+
+    Memoized per process until the panel is rewritten.
+    """
+
+    stamp = _stamp(path)
+
+    if stamp is None:
+        return None
+
+    key = (path, tuple(fields), mmap)
+    hit = _memo.get(key)
+
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+
+    with _locked(path, fcntl.LOCK_SH):
+        stamp = _stamp(path)
+        panel = _read(path, fields, mmap)
+
+    _memo[key] = (stamp, panel)
+
+    return panel
+
+
+def _read(path, fields, mmap):
+    """
+    Open one panel version (caller holds the lock).
+    Field arrays must match the dates / tickers axes.
+    """
+
+    with open(f"{path}/{TICKERS_FILE}") as f:
+        tickers = json.load(f)
+
+    panel = {
+        "dates": np.load(f"{path}/{DATES_FILE}"),
+        "tickers": tickers,
+        "col": {t: j for j, t in enumerate(tickers)},
+    }
+
+    shape = (len(panel["dates"]), len(tickers))
+    mode = "r" if mmap else None
+
+    for field in fields:
+
+        file = f"{path}/{field}.npy"
+
+        if os.path.exists(file):
+            panel[field] = np.load(file, mmap_mode=mode)
+        else:
+            panel[field] = np.full(shape, np.nan)
+
+        # rows of an append cut short before dates.npy was written
+        if panel[field].shape[0] > shape[0] and panel[field].shape[1:] == shape[1:]:
+            panel[field] = panel[field][:shape[0]]
+
+        if panel[field].shape != shape:
+            raise ValueError(f"Panel {path}: {field} {panel[field].shape} != {shape}")
+
+    return panel
+
+
+def frame(panel, ticker, fields):
+    """
+    One ticker as a DataFrame (DatetimeIndex), rows without data dropped.
+    """
+
+    j = panel["col"].get(ticker)
+
+    if j is None:
+        return None
+
+    data = {f: np.asarray(panel[f][:, j]) for f in fields}
+
+    df = pd.DataFrame(data, index=pd.DatetimeIndex(panel["dates"], name="Date"))
+    df = df.dropna(how="all")
+
+    if df.empty:
+        return None
+
+    return df
+
+
+def align(frames, fields):
+    """
+    In-memory panel from {ticker: DataFrame}: same layout as load().
+    """
+
+    frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+    tickers = list(frames)
+
+    if not tickers:
+        return None
+
+    dates = np.unique(np.concatenate([
+        np.asarray(pd.DatetimeIndex(df.index).values, dtype="datetime64[D]")
+        for df in frames.values()
+    ]))
+
+    panel = {
+        "dates": dates,
+        "tickers": tickers,
+        "col": {t: j for j, t in enumerate(tickers)},
+    }
+
+    for field in fields:
+        panel[field] = np.full((len(dates), len(tickers)), np.nan)
+
+    for j, df in enumerate(frames.values()):
+
+        rows = np.searchsorted(
+            dates,
+            np.asarray(pd.DatetimeIndex(df.index).values, dtype="datetime64[D]")
+        )
+
+        for field in fields:
+            if field in df.columns:
+                panel[field][rows, j] = pd.to_numeric(df[field], errors="coerce").to_numpy(dtype=float)
+
+    return panel
+
+
+def _save(path, name, arr):
+    """
+    Atomic write: readers holding an old mmap keep a valid file.
+    """
+
+    tmp = f"{path}/.{name}.{os.getpid()}.tmp"
+
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+
+    os.replace(tmp, f"{path}/{name}")
+
+
+def upsert(path, fields, frames):
+    """
+    Merge {ticker: DataFrame} into the panel.
+
+    New dates/tickers extend the panel; non-NaN new values
+    overwrite existing cells. Appending a daily bar is the
+    common case: one new row, same columns, written in place
+    without rewriting the stored rows.
+    """
+
+    frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+
+    if not frames:
+        return
+
+    new = align(frames, fields)
+
+    upsert_arrays(path, fields, new["dates"], new["tickers"], new)
+
+
+def upsert_arrays(path, fields, dates, tickers, arrays):
+    """
+    Merge aligned arrays ({field: (len(dates), len(tickers))}) into
+    the panel, same rules as upsert(). Writing the same values twice
+    leaves the panel unchanged.
+
+    Runs under the panel's exclusive lock: concurrent writers are
+    serialized and each one merges into the latest version.
+    """
+
+    with _locked(path, fcntl.LOCK_EX):
+        _upsert_locked(path, fields, dates, tickers, arrays)
+
+
+def _unchanged_rows(old, fields, new_dates, tickers, arrays):
+    """
+    Bool per new row: the date is stored and every non-NaN value
+    equals the stored one (re-sending it changes nothing).
+    """
+
+    old_dates = old["dates"]
+
+    if not len(old_dates):
+        return np.zeros(len(new_dates), dtype=bool)
+
+    rows = np.minimum(np.searchsorted(old_dates, new_dates), len(old_dates) - 1)
+    same = old_dates[rows] == new_dates
+
+    idx = np.flatnonzero(same)
+
+    if not len(idx):
+        return same
+
+    cols = np.array([old["col"].get(t, -1) for t in tickers], dtype=int)
+
+    for field in fields:
+
+        if field not in arrays:
+            continue
+
+        vals = np.asarray(arrays[field], dtype=float)[idx]
+
+        stored = np.asarray(old[field][rows[idx]])[:, np.maximum(cols, 0)]
+        stored[:, cols < 0] = np.nan
+
+        changed = (~np.isnan(vals) & (vals != stored)).any(axis=1)
+        same[idx[changed]] = False
+
+    return same
+
+
+def _tail(file, rows, n):
+    """
+    (fp, header position, header length, data offset) of a float64
+    C-order (>= rows, n) .npy whose header can be rewritten in place.
+    None otherwise (caller rewrites the whole file).
+    """
+
+    if not os.path.exists(file):
+        return None
+
+    fp = open(file, "r+b")
+
+    try:
+        version = np.lib.format.read_magic(fp)
+
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(fp)
+            pos = 10
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(fp)
+            pos = 12
+
+        if fortran or dtype != np.float64 or len(shape) != 2 or shape[0] < rows or shape[1] != n:
+            fp.close()
+            return None
+
+        return fp, pos, fp.tell() - pos, fp.tell()
+
+    except Exception:
+        fp.close()
+        return None
+
+
+def _append_locked(path, old, fields, new_dates, tickers, arrays):
+    """
+    Append rows dated after the last stored date to every field
+    file in place. False (nothing written) when it does not apply.
+    """
+
+    old_dates = old["dates"]
+    rows, n = len(old_dates), len(old["tickers"])
+
+    if not len(new_dates) or (rows and new_dates[0] <= old_dates[-1]):
+        return False
+
+    if np.any(np.diff(new_dates) <= np.timedelta64(0, "D")):
+        return False
+
+    if any(t not in old["col"] for t in tickers):
+        return False
+
+    tails = {}
+
+    for field in fields:
+
+        tail = _tail(f"{path}/{field}.npy", rows, n)
+
+        if tail is None:
+            break
+
+        tails[field] = tail
+
+    header = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d, %d), }" % (rows + len(new_dates), n)
+
+    try:
+        if len(tails) < len(fields) or any(len(header) + 1 > t[2] for t in tails.values()):
+            return False
+
+        cols = np.array([old["col"][t] for t in tickers], dtype=int)
+
+        for field, (fp, pos, size, offset) in tails.items():
+
+            block = np.full((len(new_dates), n), np.nan)
+
+            if field in arrays:
+                block[:, cols] = np.asarray(arrays[field], dtype=float)
+
+            # rows first, header after: the old header still
+            # describes a valid array if this is interrupted
+            fp.seek(offset + rows * n * 8)
+            fp.write(block.tobytes())
+            fp.truncate()
+            fp.flush()
+
+            fp.seek(pos)
+            fp.write((header.ljust(size - 1) + "\n").encode("latin1"))
+            fp.flush()
+
+    finally:
+        for fp, *_ in tails.values():
+            fp.close()
+
+    _save(path, DATES_FILE, np.concatenate([old_dates, new_dates]))
+
+    return True
+
+
+def _upsert_locked(path, fields, dates, tickers, arrays):
+
+    old = _read(path, fields, mmap=True) if exists(path) else None
+
+    new_dates = np.asarray(pd.DatetimeIndex(dates).values, dtype="datetime64[D]")
+    tickers = list(tickers)
+
+    if old is not None:
+
+        keep = ~_unchanged_rows(old, fields, new_dates, tickers, arrays)
+
+        if not keep.any():
+            return
+
+        new_dates = new_dates[keep]
+        arrays = {f: np.asarray(arrays[f], dtype=float)[keep] for f in fields if f in arrays}
+
+        if _append_locked(path, old, fields, new_dates, tickers, arrays):
+            return
+
+    if old is None:
+        old_dates = np.array([], dtype="datetime64[D]")
+        old_tickers = []
+    else:
+        old_dates = old["dates"]
+        old_tickers = old["tickers"]
+
+    merged = np.union1d(old_dates, new_dates)
+    known = set(old_tickers)
+    merged_tickers = old_tickers + [t for t in dict.fromkeys(tickers) if t not in known]
+    col = {t: j for j, t in enumerate(merged_tickers)}
+
+    # rows of the old / new data inside the merged date axis
+    old_rows = np.searchsorted(merged, old_dates)
+    new_rows = np.searchsorted(merged, new_dates)
+    new_cols = np.array([col[t] for t in tickers], dtype=int)
+
+    for field in fields:
+
+        arr = np.full((len(merged), len(merged_tickers)), np.nan)
+
+        if old is not None:
+            arr[old_rows, :len(old_tickers)] = old[field]
+
+        if field in arrays:
+
+            vals = np.asarray(arrays[field], dtype=float)
+            ok = ~np.isnan(vals)
+            r, c = np.nonzero(ok)
+
+            arr[new_rows[r], new_cols[c]] = vals[ok]
+
+        _save(path, f"{field}.npy", arr)
+
+    tmp = f"{path}/.{TICKERS_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(merged_tickers, f)
+    os.replace(tmp, f"{path}/{TICKERS_FILE}")
+
+    # dates last: its inode/mtime is the panel version stamp
+    _save(path, DATES_FILE, merged)
@@ -0,0 +1,97 @@
+import os
+import glob
+import pandas as pd
+
+from utils import panel_store
+
+PANEL_DIR = "data/price_panel"
+LEGACY_DIR = "data/price_cache"
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+# =========================================
+# LEGACY CSV MIGRATION
+# =========================================
+def _legacy_symbol(file):
+
+    name = os.path.basename(file)[:-4]
+
+    # index symbols (^JKSE) were cached as-is, stocks without .JK
+    if name.startswith("^"):
+        return name
+
+    return f"{name}.JK"
+
+
+def migrate_csv_cache():
+    """
+    Import data/price_cache/*.csv into the panel (one write).
+    """
+
+    frames = {}
+
+    for f in sorted(glob.glob(f"{LEGACY_DIR}/*.csv")):
+        try:
+            df = pd.read_csv(f, index_col=0)
+            df.index = pd.to_datetime(df.index)
+            frames[_legacy_symbol(f)] = df
+        except:
+            continue
+
+    if frames:
+        panel_store.upsert(PANEL_DIR, FIELDS, frames)
+        print(f"📦 Price panel migrated: {len(frames)} tickers")
+
+    return len(frames)
+
+
+# =========================================
+# READ
+# =========================================
+def load_panel(mmap=True):
+    """
+    Whole universe as aligned (date × ticker) arrays.
+
+    Returns dict with "dates", "tickers", "col" and one
+    memory-mapped array per field, or None if empty.
+    """
+
+    if not panel_store.exists(PANEL_DIR) and os.path.isdir(LEGACY_DIR):
+        migrate_csv_cache()
+
+    return panel_store.load(PANEL_DIR, FIELDS, mmap=mmap)
+
+
+def get_frame(symbol):
+
+    panel = load_panel()
+
+    if panel is None:
+        return None
+
+    return panel_store.frame(panel, symbol, FIELDS)
+
+
+def get_frames(symbols):
+    """
+    {symbol: DataFrame or None} from one panel load.
+    """
+
+    panel = load_panel()
+
+    if panel is None:
+        return {s: None for s in symbols}
+
+    return {s: panel_store.frame(panel, s, FIELDS) for s in symbols}
+
+
+# =========================================
+# WRITE
+# =========================================
+def append_bars(frames):
+    """
+    Upsert {symbol: DataFrame} (new daily bars or full history).
+    """
+
+    panel_store.upsert(PANEL_DIR, FIELDS, frames)
@@ -1,14 +1,60 @@
 import time
+import threading
 
-LAST_CALL = 0
+from config import YAHOO_RATE, YAHOO_BURST
 
-def guard(min_delay=0.2):
-    global LAST_CALL
 
-    now = time.time()
-    diff = now - LAST_CALL
+# =========================================
+# TOKEN BUCKET
+# =========================================
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests/second, bursts up to `burst`.
+    take() never sleeps, it returns how long the caller must wait.
 
-    if diff < min_delay:
-        time.sleep(min_delay - diff)
+    take(n) charges n requests at once (a batched call): once
+    min(n, burst) tokens are there it goes through and the bucket
+    goes into debt, so later callers wait until it is paid back.
+    """
 
-    LAST_CALL = time.time()
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, n=1):
+
+        need = min(n, self.burst)
+
+        with self.lock:
+
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+            if self.tokens >= need:
+                self.tokens -= n
+                return 0.0
+
+            return (need - self.tokens) / self.rate
+
+
+# shared by every Yahoo caller (sync guard + async fetcher)
+YAHOO_BUCKET = TokenBucket(YAHOO_RATE, YAHOO_BURST)
+
+
+def guard(bucket=YAHOO_BUCKET):
+    """
+    Blocking acquire for sync callers.
+    """
+
+    while True:
+
+        wait = bucket.take()
+
+        if wait <= 0:
+            return
+
+        time.sleep(wait)
@@ -0,0 +1,168 @@
+import os
+import glob
+import pickle
+import hashlib
+import numpy as np
+
+from config import RESULT_CACHE_MB
+
+
+# =========================================
+# PERSISTENT RESULT CACHE (CONTENT HASH)
+# =========================================
+#
+# Memoizes backtest and parameter-sweep results on disk
+# (utils.backtest_engine). The key is a hash of the input price
+# arrays plus the function name and parameters: a rerun on bars
+# that did not change is a hit, any new or revised bar is a miss.
+#
+# One pickle per entry under CACHE_DIR. Hits refresh the file
+# mtime; once the directory exceeds RESULT_CACHE_MB the least
+# recently used entries are deleted.
+
+CACHE_DIR = "data/result_cache"
+MAX_BYTES = RESULT_CACHE_MB * 1024 * 1024
+
+_bytes = None    # directory size, scanned on first write
+_MISS = object()
+
+stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+}
+
+
+def key(name, arrays, **params):
+    """
+    Hex digest of name + params + array contents (dtype and shape included).
+    """
+
+    h = hashlib.sha1(name.encode())
+    h.update(repr(sorted(params.items())).encode())
+
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f"{a.dtype}{a.shape}".encode())
+        h.update(a.tobytes())
+
+    return h.hexdigest()
+
+
+def _path(k):
+    return f"{CACHE_DIR}/{k}.pkl"
+
+
+def get(k, default=None):
+
+    path = _path(k)
+
+    try:
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+    except Exception:
+        stats["misses"] += 1
+        return default
+
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    stats["hits"] += 1
+
+    return value
+
+
+def put(k, value):
+
+    global _bytes
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    if _bytes is None:
+        _bytes = sum(os.path.getsize(f) for f in glob.glob(f"{CACHE_DIR}/*.pkl"))
+
+    path = _path(k)
+    tmp = f"{CACHE_DIR}/.{k}.tmp"
+
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception:
+        return
+
+    _bytes += os.path.getsize(path)
+
+    if _bytes > MAX_BYTES:
+        _evict()
+
+
+def _evict():
+    """
+    Drop least recently used entries down to 90% of the budget.
+    """
+
+    global _bytes
+
+    files = []
+
+    for f in glob.glob(f"{CACHE_DIR}/*.pkl"):
+        try:
+            st = os.stat(f)
+            files.append((st.st_mtime, st.st_size, f))
+        except OSError:
+            continue
+
+    files.sort()
+    _bytes = sum(size for _, size, _ in files)
+
+    for _, size, f in files:
+
+        if _bytes <= MAX_BYTES * 0.9:
+            break
+
+        try:
+            os.remove(f)
+        except OSError:
+            continue
+
+        _bytes -= size
+        stats["evictions"] += 1
+
+
+def cached(name, arrays, compute, **params):
+    """
+    compute() memoized on (name, arrays, params).
+    """
+
+    k = key(name, arrays, **params)
+    value = get(k, _MISS)
+
+    if value is _MISS:
+        value = compute()
+        put(k, value)
+
+    return value
+
+
+def clear():
+
+    global _bytes
+
+    for f in glob.glob(f"{CACHE_DIR}/*.pkl"):
+        os.remove(f)
+
+    _bytes = 0
+
+
+def summary():
+
+    total = stats["hits"] + stats["misses"]
+    rate = stats["hits"] / total if total else 0
+
+    return (
+        f"hit {rate*100:.0f}% ({stats['hits']}/{total}) | "
+        f"{(_bytes or 0)/1e6:.1f} MB | evicted {stats['evictions']}"
+    )
@@ -1,54 +1,272 @@
 import yfinance as yf
 import pandas as pd
-import time
-import random
-import os
+import re
 
-CACHE_DIR = "data/price_cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
+from config import FETCH_RETRIES, FETCH_TIMEOUT, FETCH_CONCURRENCY, YAHOO_BURST
+from utils import price_store
+from utils import frame_cache
+from utils.async_fetch import fetch_all
+
+# first cached bar may start a few days after the period
+# boundary (weekend / holiday) and still count as covered
+COVER_TOLERANCE_DAYS = 7
+
+# yf.download sends one HTTP request per ticker: a chunk is one
+# burst of requests, so it is no larger than the token bucket burst
+CHUNK_SIZE = YAHOO_BURST
+
+
+# =========================================
+# CACHE HELPERS
+# =========================================
+def _normalize_index(df):
+
+    df.index = pd.to_datetime(df.index)
+
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+
+    df.index.name = "Date"
+
+    return df
+
+
+def _merge(cached, fresh):
+    """
+    Append fresh bars to cached history.
+    Fresh bars win on duplicate dates (last bar may have been intraday).
+    """
+
+    if cached is None or cached.empty:
+        return fresh
+
+    if fresh is None or fresh.empty:
+        return cached
+
+    df = pd.concat([cached, fresh[cached.columns.intersection(fresh.columns)]])
+    df = df[~df.index.duplicated(keep="last")]
+
+    return df.sort_index()
+
+
+def _period_start(period):
+    """
+    "3mo" → Timestamp 3 months ago. None for "max".
+    """
+
+    m = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+
+    if not m:
+        return None
+
+    n, unit = int(m.group(1)), m.group(2)
+
+    offset = {
+        "d": pd.DateOffset(days=n),
+        "wk": pd.DateOffset(weeks=n),
+        "mo": pd.DateOffset(months=n),
+        "y": pd.DateOffset(years=n),
+    }[unit]
+
+    return pd.Timestamp.now().normalize() - offset
+
+
+def _delta_start(cached, period):
+    """
+    Date to fetch from, or None when a full period download is needed.
+    """
+
+    if cached is None or cached.empty:
+        return None
+
+    start = _period_start(period)
+
+    if start is not None:
+        if cached.index[0] > start + pd.Timedelta(days=COVER_TOLERANCE_DAYS):
+            return None
+
+    # refetch the last cached bar too (may be a partial session)
+    return cached.index[-1].strftime("%Y-%m-%d")
+
+
+def _trim(df, period):
+
+    start = _period_start(period)
+
+    if start is None:
+        return df
+
+    return df[df.index >= start]
 
 
 # =========================================
 # DOWNLOAD WITH CACHE + RETRY + FALLBACK
 # =========================================
-def download_price(symbol, period="3mo", retries=3):
+def download_price(symbol, period="3mo", retries=FETCH_RETRIES):
+    """
+    Single ticker download (delta fetch on top of the cache).
+    """
+
+    return download_prices([symbol], period=period, retries=retries).get(symbol)
+
+
+# =========================================
+# BATCH DOWNLOAD (MULTI TICKER)
+# =========================================
+def _download_chunk(chunk, period, start=None):
+    """
+    One yf.download call for a whole chunk; raises to trigger a retry.
+    Returns raw frame with (ticker, field) columns.
+
+    yfinance requests one ticker per HTTP call, at most
+    FETCH_CONCURRENCY of them in flight (its `threads`).
+
+    The request timeout is passed to yfinance, so a slow call ends
+    on its own instead of leaving a stuck worker thread behind.
+
+    Delta fetches (start given) accept an empty answer:
+    no new bars yet is not a failure.
+    """
+
+    if start is None:
+        raw = yf.download(
+            list(chunk),
+            period=period,
+            group_by="ticker",
+            progress=False,
+            threads=FETCH_CONCURRENCY,
+            timeout=FETCH_TIMEOUT
+        )
+    else:
+        raw = yf.download(
+            list(chunk),
+            start=start,
+            group_by="ticker",
+            progress=False,
+            threads=FETCH_CONCURRENCY,
+            timeout=FETCH_TIMEOUT
+        )
+
+    if raw is None or raw.empty:
+        if start is not None:
+            return None
+        raise Exception("Empty chunk")
+
+    return raw
+
+
+def _split_frame(raw, symbol):
+    """
+    Extract one ticker from a batched download.
+    """
+
+    if raw is None:
+        return None
+
+    cols = raw.columns
+
+    if isinstance(cols, pd.MultiIndex):
+
+        if symbol in cols.get_level_values(0):
+            df = raw[symbol]
+        elif symbol in cols.get_level_values(1):
+            df = raw.xs(symbol, axis=1, level=1)
+        else:
+            return None
+
+    else:
+        # single ticker chunk can come back flat
+        df = raw
+
+    df = df[[c for c in price_store.FIELDS if c in df.columns]]
+    df = df.dropna(how="all")
+
+    if df.empty or "Close" not in df.columns:
+        return None
+
+    return _normalize_index(df.copy())
+
+
+def download_prices(symbols, period="3mo", chunk_size=CHUNK_SIZE, retries=FETCH_RETRIES, min_rows=30):
+    """
+    Batched, cache-first price download.
+
+    The price panel (utils.price_store) is the primary store: tickers whose
+    cache already covers the period only fetch the bars after the
+    last cached date, everything else gets a full period download.
+    Tickers are grouped by fetch start and downloaded in chunks of
+    chunk_size, one yf.download call per chunk.
+    Fresh bars are merged, de-duplicated and persisted in one write.
+    Tickers that fail fall back to their cache.
+
+    Chunks go through utils.async_fetch one at a time (yf.download
+    keeps module-global state): each chunk draws one token bucket
+    token per ticker (one HTTP request each), jittered backoff,
+    per-chunk timeout.
+
+    Frames already in the in-process frame cache are served
+    from memory; index symbols (^JKSE) are pinned there.
+
+    Returns dict {symbol: DataFrame} trimmed to the period.
+    """
+
+    out = {}
+
+    todo = []
+    for sym in dict.fromkeys(symbols):
+        df = frame_cache.get((sym, period))
+        if df is not None:
+            out[sym] = df
+        else:
+            todo.append(sym)
+
+    if not todo:
+        return out
+
+    cache = price_store.get_frames(todo)
+
+    # group by fetch start: one group per last cached date
+    groups = {}
+    for sym in todo:
+        groups.setdefault(_delta_start(cache[sym], period), []).append(sym)
+
+    chunks = [
+        (start, tuple(group[i:i + chunk_size]))
+        for start, group in groups.items()
+        for i in range(0, len(group), chunk_size)
+    ]
 
-    cache_file = f"{CACHE_DIR}/{symbol.replace('.JK','')}.csv"
+    raw = fetch_all(
+        chunks,
+        lambda c: _download_chunk(c[1], period, start=c[0]),
+        concurrency=1,
+        retries=retries,
+        cost=lambda c: len(c[1])
+    )
 
-    for attempt in range(retries):
+    updated = {}
 
-        try:
-            df = yf.download(
-                symbol,
-                period=period,
-                progress=False,
-                threads=False
-            )
+    for key in chunks:
 
-            if df is None or df.empty or len(df) < 30:
-                raise Exception("Invalid data")
+        for sym in key[1]:
 
-            # Fix Yahoo MultiIndex bug
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
+            new = _split_frame(raw.get(key), sym)
+            df = _merge(cache[sym], new)
 
-            # SAVE CACHE
-            df.to_csv(cache_file)
+            if new is not None and df is not None:
+                updated[sym] = new
 
-            return df
+            if df is not None:
+                df = _trim(df, period)
 
-        except Exception as e:
-            time.sleep(0.7 + random.random())
+            if df is not None and len(df) >= min_rows:
+                out[sym] = df
+                frame_cache.put((sym, period), df, pin=sym.startswith("^"))
+            else:
+                print(f"❌ TOTAL FAIL {sym}")
 
-    # =========================
-    # FALLBACK TO CACHE
-    # =========================
-    if os.path.exists(cache_file):
-        try:
-            df = pd.read_csv(cache_file, index_col=0)
-            return df
-        except:
-            pass
+    # one panel write for the whole batch
+    if updated:
+        price_store.append_bars(updated)
 
-    print(f"❌ TOTAL FAIL {symbol}")
-    return None
+    return out